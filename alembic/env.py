@@ -1,8 +1,6 @@
 import os
 import sys
 from logging.config import fileConfig
-from models import Base, User, Group, Poll, Question, Answer, UserPollProgress, UserAnswer
-target_metadata = Base.metadata
 
 from alembic import context
 from sqlalchemy import engine_from_config, pool, create_engine
@@ -20,18 +18,11 @@ sys.path.insert(0, PROJECT_ROOT)
 load_dotenv(os.path.join(PROJECT_ROOT, ".env"))
 
 # ------------------------------------------------------------------------------
-#              2) Импортируем Base и ВСЕ модели (чтобы metadata был полный)
+#              2) Импортируем models целиком (чтобы metadata был полный)
 # ------------------------------------------------------------------------------
-from models import (
-    Base,
-    User,
-    Group,
-    Poll,
-    Question,
-    Answer,
-    UserPollProgress,
-    UserAnswer,
-)
+# импорт модуля регистрирует в Base.metadata каждую таблицу, в том числе новые —
+# перечислять классы не нужно
+import models
 
 # ------------------------------------------------------------------------------
 #                3) Настройка Alembic и переопределение URL
@@ -54,7 +45,7 @@ config.set_main_option("sqlalchemy.url", SYNC_DATABASE_URL)
 fileConfig(config.config_file_name)
 
 # Указываем Alembic, по каким метаданным генерить
-target_metadata = Base.metadata
+target_metadata = models.Base.metadata
 
 
 # ------------------------------------------------------------------------------
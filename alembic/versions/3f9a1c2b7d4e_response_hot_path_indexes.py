@@ -0,0 +1,51 @@
+"""indexes for responses/completions hot paths
+
+Revision ID: 3f9a1c2b7d4e
+Revises: 
+Create Date: 2026-10-17 12:00:00.000000
+
+Таблицы создаёт init_db() (create_all), но на уже существующей БД он не
+добавляет индексы. Эта миграция доводит старые базы до models.py;
+на свежей базе все индексы уже есть и пропускаются (if_not_exists).
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2b7d4e'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    # (имя, таблица, колонки, unique)
+    ("ix_questions_poll_id",                  "questions",        ["poll_id"],                  False),
+    ("ix_answers_question_id",                "answers",          ["question_id"],              False),
+    ("ix_responses_question_id_answer_id",    "responses",        ["question_id", "answer_id"], False),
+    ("ix_responses_answer_id",                "responses",        ["answer_id"],                False),
+    ("ix_responses_user_id_question_id",      "responses",        ["user_id", "question_id"],   False),
+    ("ix_poll_completions_poll_id",           "poll_completions", ["poll_id"],                  False),
+    ("uq_poll_completions_user_id_poll_id",   "poll_completions", ["user_id", "poll_id"],       True),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # перед уникальным индексом убираем повторные отметки, оставляя самую раннюю
+    op.execute(sa.text(
+        "DELETE FROM poll_completions a "
+        "USING poll_completions b "
+        "WHERE a.user_id = b.user_id AND a.poll_id = b.poll_id AND a.id > b.id"
+    ))
+    for name, table, columns, unique in INDEXES:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
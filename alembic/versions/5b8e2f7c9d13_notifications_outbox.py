@@ -0,0 +1,47 @@
+"""notifications outbox
+
+Revision ID: 5b8e2f7c9d13
+Revises: a1d4e8c0b6f2
+Create Date: 2026-10-17 20:10:00.000000
+
+Outbox рассылки (services.broadcast). На базе, где таблицу уже создал
+init_db() (create_all), добавляются только недостающие индексы.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b8e2f7c9d13'
+down_revision: Union[str, None] = 'a1d4e8c0b6f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("notifications"):
+        op.create_table(
+            "notifications",
+            sa.Column("id",              sa.BigInteger(), primary_key=True),
+            sa.Column("kind",            sa.String(), nullable=False),
+            sa.Column("ref_id",          sa.Integer(), nullable=False),
+            sa.Column("chat_id",         sa.BigInteger(), nullable=False),
+            sa.Column("body",            sa.Text(), nullable=False),
+            sa.Column("status",          sa.String(), nullable=False, server_default="pending"),
+            sa.Column("attempts",        sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("next_attempt_at", sa.DateTime(timezone=True), nullable=False,
+                      server_default=sa.func.now()),
+            sa.Column("sent_at",         sa.DateTime(timezone=True), nullable=True),
+        )
+    op.create_index("uq_notifications_kind_ref_chat", "notifications",
+                    ["kind", "ref_id", "chat_id"], unique=True, if_not_exists=True)
+    op.create_index("ix_notifications_pending", "notifications", ["next_attempt_at", "id"],
+                    postgresql_where=sa.text("status = 'pending'"), if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("notifications", if_exists=True)
@@ -0,0 +1,39 @@
+"""indexes for paged user listing
+
+Revision ID: 7c2e5d9a1f30
+Revises: 3f9a1c2b7d4e
+Create Date: 2026-10-17 18:00:00.000000
+
+Просмотр пользователей фильтрует по роли или группе и листает keyset-ом
+по id — составные индексы (role, id) и (group_id, id) отдают страницу
+без сортировки и без чтения лишних строк.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2e5d9a1f30'
+down_revision: Union[str, None] = '3f9a1c2b7d4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = [
+    # (имя, таблица, колонки)
+    ("ix_users_role_id",     "users", ["role", "id"]),
+    ("ix_users_group_id_id", "users", ["group_id", "id"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, table, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,41 @@
+"""fsm_states table
+
+Revision ID: a1d4e8c0b6f2
+Revises: 7c2e5d9a1f30
+Create Date: 2026-10-17 20:00:00.000000
+
+Состояния FSM в Postgres (services.fsm_storage). На базе, где таблицу уже
+создал init_db() (create_all), миграция ничего не делает.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1d4e8c0b6f2'
+down_revision: Union[str, None] = '7c2e5d9a1f30'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if not sa.inspect(op.get_bind()).has_table("fsm_states"):
+        op.create_table(
+            "fsm_states",
+            sa.Column("chat",       sa.BigInteger(), primary_key=True),
+            sa.Column("user",       sa.BigInteger(), primary_key=True),
+            sa.Column("state",      sa.String(), nullable=True),
+            sa.Column("data",       postgresql.JSONB(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False,
+                      server_default=sa.func.now()),
+        )
+    op.create_index("ix_fsm_states_updated_at", "fsm_states", ["updated_at"], if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("fsm_states", if_exists=True)
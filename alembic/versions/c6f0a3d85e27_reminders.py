@@ -0,0 +1,58 @@
+"""reminder schedules and runs
+
+Revision ID: c6f0a3d85e27
+Revises: 5b8e2f7c9d13
+Create Date: 2026-10-17 20:20:00.000000
+
+Напоминания не прошедшим опрос (services.reminders). На базе, где таблицы
+уже создал init_db() (create_all), добавляются только недостающие индексы.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f0a3d85e27'
+down_revision: Union[str, None] = '5b8e2f7c9d13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("reminder_schedules"):
+        op.create_table(
+            "reminder_schedules",
+            sa.Column("id",          sa.Integer(), primary_key=True),
+            sa.Column("poll_id",     sa.Integer(), sa.ForeignKey("polls.id"),
+                      nullable=False, unique=True),
+            sa.Column("every_hours", sa.Integer(), nullable=True),
+            sa.Column("next_run_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("last_run_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_by",  sa.BigInteger(), nullable=False),
+        )
+    op.create_index("ix_reminder_schedules_next_run_at", "reminder_schedules",
+                    ["next_run_at"], if_not_exists=True)
+
+    if not inspector.has_table("reminder_runs"):
+        op.create_table(
+            "reminder_runs",
+            sa.Column("id",          sa.Integer(), primary_key=True),
+            sa.Column("schedule_id", sa.Integer(), nullable=False),
+            sa.Column("poll_id",     sa.Integer(), nullable=False),
+            sa.Column("due_at",      sa.DateTime(timezone=True), nullable=False),
+            sa.Column("recipients",  sa.Integer(), nullable=False, server_default="0"),
+            sa.Column("created_at",  sa.DateTime(timezone=True), nullable=False,
+                      server_default=sa.func.now()),
+        )
+    op.create_index("uq_reminder_runs_schedule_id_due_at", "reminder_runs",
+                    ["schedule_id", "due_at"], unique=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("reminder_runs", if_exists=True)
+    op.drop_table("reminder_schedules", if_exists=True)
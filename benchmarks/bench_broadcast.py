@@ -0,0 +1,89 @@
+"""
+Отправка рассылки (services.broadcast.Broadcaster.send_batch) через StubBot.
+
+«Сервер» считает сообщения в скользящем окне 1 с и отвечает 429 (RetryAfter),
+если окно превышено, — так видно, что TokenBucket держит лимит, а время
+рассылки близко к теоретическому (получатели - burst) / rate.
+БД не нужна: пачки строятся в памяти.
+    python benchmarks/bench_broadcast.py --recipients 10000 --rate 1000 [--latency 0.05]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import deque
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("BOT_TOKEN", "123456:STUB-benchmark-token")
+
+from aiogram.utils.exceptions import RetryAfter
+
+from services.broadcast import Broadcaster, Outgoing
+from stub_bot import StubBot
+
+
+class FloodBot(StubBot):
+    """StubBot с лимитом «сервера»: больше ``limit`` сообщений за секунду — 429."""
+
+    def __init__(self, limit: float, flood: float, **kwargs):
+        super().__init__(**kwargs)
+        self.limit    = limit
+        self.flood    = flood          # доля случайных 429 сверх лимита
+        self.window   = deque()
+        self.max_rate = 0
+        self.floods   = 0
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        if method == "sendMessage":
+            now = time.monotonic()
+            while self.window and now - self.window[0] > 1.0:
+                self.window.popleft()
+            if len(self.window) >= self.limit or random.random() < self.flood:
+                self.floods += 1
+                raise RetryAfter(1)
+            self.window.append(now)
+            self.max_rate = max(self.max_rate, len(self.window))
+        return await super().request(method, data, files, **kwargs)
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--recipients", type=int, default=10_000)
+    ap.add_argument("--rate", type=float, default=1000, help="лимит рассылки, сообщений/с")
+    ap.add_argument("--burst", type=int, default=30)
+    ap.add_argument("--server-limit", type=float, default=None,
+                    help="лимит «сервера» за 1 с (по умолчанию rate + burst)")
+    ap.add_argument("--latency", type=float, default=0.05, help="задержка Bot API, с")
+    ap.add_argument("--concurrency", type=int, default=64)
+    ap.add_argument("--batch", type=int, default=500)
+    ap.add_argument("--flood", type=float, default=0.0, help="доля случайных 429")
+    args = ap.parse_args()
+
+    bot = FloodBot(limit=args.server_limit or args.rate + args.burst,
+                   flood=args.flood, latency=args.latency)
+    sender = Broadcaster(rate=args.rate, burst=args.burst, chat_interval=1.0,
+                         concurrency=args.concurrency, batch=args.batch,
+                         max_attempts=5, poll_interval=1.0)
+    sender._bot = bot
+    rows = [Outgoing(i, 10_000_000 + i, "📣 Новый опрос", 0) for i in range(args.recipients)]
+
+    sent = retry = failed = 0
+    t0 = time.perf_counter()
+    for i in range(0, len(rows), args.batch):
+        res = await sender.send_batch(rows[i:i + args.batch])
+        sent, retry, failed = sent + len(res.sent), retry + len(res.retry), failed + len(res.failed)
+    took = time.perf_counter() - t0
+
+    ideal = max(0, args.recipients - args.burst) / args.rate
+    print(f"recipients:  {args.recipients}  (rate {args.rate:g}/s, burst {args.burst}, "
+          f"latency {args.latency * 1000:.0f} ms, concurrency {args.concurrency})")
+    print(f"elapsed:     {took:8.2f} s   theoretical: {ideal:8.2f} s   ({took / ideal if ideal else 0:.2f}x)")
+    print(f"max in 1 s:  {bot.max_rate}  (server limit {bot.limit:g}), 429 answers: {bot.floods}")
+    print(f"sent {sent}, to retry {retry}, failed {failed}")
+    await (await bot.get_session()).close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,125 @@
+"""
+Сохранение опроса: прежний вариант (commit + refresh + flush на каждый вопрос)
+против services.polls.create_poll (одна транзакция, INSERT на каждую таблицу).
+
+Запуск (нужна БД из .env, созданные опросы затем удаляются):
+    python benchmarks/bench_create_poll.py --questions 10 50 200 --options 4
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, event
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal, engine, init_db
+from models import Answer, Poll, Question
+from services.polls import NewQuestion, create_poll
+
+MARK = -535353   # polls.created_by опросов бенчмарка
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+def build_questions(n: int, options: int) -> list[NewQuestion]:
+    # через один — текстовый вопрос, как в реальных опросах
+    return [NewQuestion(f"question {i}",
+                        tuple(f"option {j}" for j in range(options)) if i % 2 == 0 else ())
+            for i in range(n)]
+
+
+async def legacy_create(questions: list[NewQuestion]) -> int:
+    # прежний код process_more_questions
+    async with AsyncSessionLocal() as s:
+        poll = Poll(title="bench", target_role="all", group_id=None, created_by=MARK)
+        s.add(poll)
+        await s.commit()
+        await s.refresh(poll)
+        for q in questions:
+            q_obj = Question(poll_id=poll.id, question_text=q.text,
+                             question_type="single_choice" if q.answers else "text")
+            s.add(q_obj)
+            await s.flush()
+            for ans in q.answers:
+                s.add(Answer(question_id=q_obj.id, answer_text=ans))
+        await s.commit()
+        return poll.id
+
+
+async def bulk_create(questions: list[NewQuestion]) -> int:
+    return await create_poll("bench", "all", MARK, questions)
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as s:
+        poll_ids = select(Poll.id).where(Poll.created_by == MARK)
+        q_ids = select(Question.id).where(Question.poll_id.in_(poll_ids))
+        await s.execute(delete(Answer).where(Answer.question_id.in_(q_ids)))
+        await s.execute(delete(Question).where(Question.poll_id.in_(poll_ids)))
+        await s.execute(delete(Poll).where(Poll.created_by == MARK))
+        await s.commit()
+
+
+async def check(poll_id: int, questions: list[NewQuestion]):
+    # варианты должны попасть к своим вопросам
+    async with AsyncSessionLocal() as s:
+        rows = (await s.execute(
+            select(Question.question_text, Answer.answer_text)
+            .outerjoin(Answer, Answer.question_id == Question.id)
+            .where(Question.poll_id == poll_id)
+            .order_by(Question.id, Answer.id)
+        )).all()
+    got = {}
+    for q_text, a_text in rows:
+        got.setdefault(q_text, [])
+        if a_text is not None:
+            got[q_text].append(a_text)
+    assert got == {q.text: list(q.answers) for q in questions}, "answers attached to wrong questions"
+
+
+async def measure(fn, questions, repeat: int):
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            poll_id = await fn(questions)
+        elapsed = (time.perf_counter() - t0) / repeat
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    await check(poll_id, questions)
+    return counter.count // repeat, elapsed * 1000
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--questions", type=int, nargs="+", default=[10, 50, 200])
+    ap.add_argument("--options", type=int, default=4)
+    ap.add_argument("--repeat", type=int, default=10)
+    args = ap.parse_args()
+
+    await init_db()
+    print(f"{'questions':>9} | {'legacy q':>8} {'legacy ms':>9} | {'bulk q':>8} {'bulk ms':>9}")
+    try:
+        for n in args.questions:
+            questions = build_questions(n, args.options)
+            lq, lt = await measure(legacy_create, questions, args.repeat)
+            bq, bt = await measure(bulk_create, questions, args.repeat)
+            print(f"{n:>9} | {lq:>8} {lt:>9.2f} | {bq:>8} {bt:>9.2f}")
+    finally:
+        await cleanup()
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
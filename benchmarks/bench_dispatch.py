@@ -0,0 +1,155 @@
+"""
+Микробенчмарк маршрутизации текстовых кнопок: прежняя цепочка
+``text=``/``roles=``-фильтров + if-ы route_menu против CommandRegistry.
+
+Хендлеры — пустышки, БД и сеть не используются: меряется только путь
+апдейта через Dispatcher (middleware, фильтры, поиск хендлера).
+    python benchmarks/bench_dispatch.py --updates 20000
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from handlers.commands import CommandRegistry
+from handlers.common import BACK
+from handlers.filters import RoleFilter, STAFF_ROLES
+from handlers.middleware import UserMiddleware
+from handlers.group_management import GroupStates
+from handlers.poll_creation import PollCreation
+from handlers.poll_editor import PollEditorStates
+from handlers.poll_take import PollTakeStates
+from handlers.profile import ProfileStates
+from handlers.user_management import UserMgmtStates
+from services.users import user_cache
+from stub_bot import StubBot
+from synthetic import message
+
+MENU = ["👥 Пользователи", "📝 Опросы", "🏷 Группы", "📊 Статистика"]
+USERS_ITEMS = ["🗑 Удалить пользователя", "Просмотр пользователей",
+               "➕ Добавить пользователя", "✏️ Редактировать пользователя"]
+
+# прежний порядок регистрации: (кнопки, роли, state) и шаги FSM модулей
+LEGACY = [
+    ("states", ProfileStates),
+    ("text", ["🗑 Удалить пользователя"], STAFF_ROLES, None),
+    ("state", "waiting_for_deletion"),
+    ("text", ["Просмотр пользователей"], STAFF_ROLES, None),
+    ("text", ["➕ Добавить пользователя", "✏️ Редактировать пользователя"], STAFF_ROLES, None),
+    ("text", USERS_ITEMS, None, None),
+    ("states", UserMgmtStates),
+    ("text", ["➕ Создать группу"], None, None),
+    ("text", ["🔀 Назначить группу"], None, None),
+    ("states", GroupStates),
+    ("text", ["➕ Создать опрос"], STAFF_ROLES, None),
+    ("text", ["➕ Создать опрос"], None, None),
+    ("states", PollCreation),
+    ("text", ["✏️ Редактировать опрос"], STAFF_ROLES, "*"),
+    ("text", ["✏️ Редактировать опрос"], None, "*"),
+    ("states", PollEditorStates),
+    ("text", ["🗑 Удалить опрос"], None, None),
+    ("text", ["📊 Статистика"], None, None),
+    ("text", ["📋 Пройти опрос"], None, None),
+    ("states", PollTakeStates),
+]
+ROUTE_MENU_CHAIN = MENU + USERS_ITEMS + [
+    "➕ Создать группу", "🔀 Назначить группу", "➕ Создать опрос", "✏️ Редактировать опрос",
+    "🗑 Удалить опрос", "📊 Статистика", "📋 Пройти опрос", BACK,
+]
+ALL_TEXTS = list(dict.fromkeys(ROUTE_MENU_CHAIN))
+
+
+async def noop(message: types.Message):
+    return None
+
+
+def base_dispatcher() -> Dispatcher:
+    bot = StubBot()
+    dp  = Dispatcher(bot, storage=MemoryStorage())
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+    dp.filters_factory.bind(RoleFilter, event_handlers=[dp.message_handlers])
+    dp.middleware.setup(UserMiddleware())
+    return dp
+
+
+def legacy_dispatcher() -> Dispatcher:
+    dp = base_dispatcher()
+    for entry in LEGACY:
+        kind = entry[0]
+        if kind == "states":
+            for st in entry[1].all_states:
+                dp.register_message_handler(noop, state=st)
+        elif kind == "state":
+            dp.register_message_handler(noop, state=entry[1])
+        else:
+            _, texts, roles, state = entry
+            kwargs = {"roles": roles} if roles else {}
+            dp.register_message_handler(noop, text=texts, state=state, **kwargs)
+
+    async def route_menu(message: types.Message):
+        txt = message.text.strip()
+        for candidate in ROUTE_MENU_CHAIN:     # if txt == ...: return ...
+            if txt == candidate:
+                return None
+    dp.register_message_handler(route_menu, content_types=types.ContentTypes.TEXT, state=None)
+    return dp
+
+
+def registry_dispatcher() -> Dispatcher:
+    dp = base_dispatcher()
+    registry = CommandRegistry()
+    registry.register(dp)
+    for text in ALL_TEXTS:
+        roles = STAFF_ROLES if text in USERS_ITEMS + ["➕ Создать опрос", "✏️ Редактировать опрос"] else None
+        registry.add(text, noop, roles=roles, any_state=text == "✏️ Редактировать опрос")
+    for entry in LEGACY:
+        if entry[0] == "states":
+            for st in entry[1].all_states:
+                dp.register_message_handler(noop, state=st)
+        elif entry[0] == "state":
+            dp.register_message_handler(noop, state=entry[1])
+    return dp
+
+
+async def run(dp: Dispatcher, updates: list[dict]) -> float:
+    t0 = time.perf_counter()
+    for raw in updates:
+        await asyncio.create_task(dp.updates_handler.notify(types.Update(**raw)))
+    return time.perf_counter() - t0
+
+
+class _Me:
+    role = "teacher"
+    group_id = None
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--updates", type=int, default=20_000)
+    ap.add_argument("--users", type=int, default=100)
+    args = ap.parse_args()
+
+    for uid in range(1, args.users + 1):
+        user_cache.set(uid, _Me())
+    # кнопки, которые раньше доходили до route_menu, в том числе подменю
+    updates = [message(random.randrange(1, args.users + 1), random.choice(ALL_TEXTS))
+               for _ in range(args.updates)]
+
+    for name, build in (("legacy", legacy_dispatcher), ("registry", registry_dispatcher)):
+        dp = build()
+        await run(dp, updates[:500])    # прогрев
+        took = await run(dp, updates)
+        print(f"{name:9}: {took / len(updates) * 1e6:7.1f} µs/update, "
+              f"{len(updates) / took:9.0f} upd/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,199 @@
+"""
+Сквозной бенчмарк сценариев: настоящий Dispatcher с register_handlers,
+StubBot вместо Telegram и БД из .env.
+
+Сценарии (каждый пользователь идёт по своему сценарию последовательно,
+пользователи — параллельно):
+    take_poll — /start → «📋 Пройти опрос» → выбор опроса (callback) → ответы на все вопросы
+    stats     — учитель: «📊 Статистика» → выбор опроса (callback)
+    export    — учитель: выгрузка CSV (callback)
+
+Для каждого сценария печатает p50/p95/p99 задержки апдейта и апдейты в секунду.
+После take_poll проверяет, что ответы и отметки о прохождении действительно
+записаны — сценарий, не дошедший до хендлеров, не сойдёт за быстрый.
+Пишет опрос, пользователей и ответы в отдельный диапазон ID и чистит за собой.
+    python benchmarks/bench_flows.py --students 300 --teachers 30 --questions 10
+"""
+import argparse
+import asyncio
+import dataclasses
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiogram import Bot, Dispatcher, types
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+
+from config import load_config
+from database import AsyncSessionLocal, engine, init_db
+from handlers import register_middlewares, register_handlers
+from handlers.keyboards import poll_cb
+from models import Answer, FSMRecord, Poll, PollCompletion, Question, Response, User
+from services.fsm_storage import build_storage
+from services.polls import PollSnapshot, get_poll_snapshot, invalidate_poll
+from services.response_writer import response_writer
+from services.users import upsert_users
+from stub_bot import StubBot
+from synthetic import callback, message
+
+BENCH_TG_BASE = 7_000_000_000
+TEACHER_BASE  = BENCH_TG_BASE + 1_000_000
+
+
+# ——— данные ————————————————————————————————————————————————————
+async def seed(students: list[int], teachers: list[int], questions: int) -> PollSnapshot:
+    await upsert_users([{"tg_id": tg, "role": "student"} for tg in students]
+                       + [{"tg_id": tg, "role": "teacher"} for tg in teachers])
+    async with AsyncSessionLocal() as s:
+        poll = Poll(title=f"bench {time.time_ns()}", target_role="student",
+                    group_id=None, created_by=TEACHER_BASE)
+        for i in range(questions):
+            text_q = i % 5 == 4          # каждый пятый — свободный ответ
+            q = Question(question_text=f"Вопрос {i + 1}",
+                         question_type="text" if text_q else "single_choice")
+            if not text_q:
+                q.answers = [Answer(answer_text=f"Вариант {j + 1}") for j in range(4)]
+            poll.questions.append(q)
+        s.add(poll)
+        await s.commit()
+    invalidate_poll(poll.id)
+    return await get_poll_snapshot(poll.id)
+
+
+async def cleanup(poll_id: int):
+    async with AsyncSessionLocal() as s:
+        q_ids = select(Question.id).where(Question.poll_id == poll_id)
+        await s.execute(delete(Response).where(Response.question_id.in_(q_ids)))
+        await s.execute(delete(PollCompletion).where(PollCompletion.poll_id == poll_id))
+        await s.execute(delete(Answer).where(Answer.question_id.in_(q_ids)))
+        await s.execute(delete(Question).where(Question.poll_id == poll_id))
+        await s.execute(delete(Poll).where(Poll.id == poll_id))
+        await s.execute(delete(User).where(User.tg_id >= BENCH_TG_BASE))
+        await s.execute(delete(FSMRecord).where(FSMRecord.user >= BENCH_TG_BASE))
+        await s.commit()
+
+
+# ——— сценарии: список апдейтов для одного пользователя ————————————————
+def take_poll_flow(uid: int, poll) -> list[dict]:
+    updates = [message(uid, "/start"), message(uid, "📋 Пройти опрос"),
+               callback(uid, poll_cb.new("take", "pick", poll.id))]
+    for q in poll.questions:
+        answer = random.choice(q.options).text if q.options else f"ответ {uid}"
+        updates.append(message(uid, answer))
+    return updates
+
+
+def stats_flow(uid: int, poll) -> list[dict]:
+    return [message(uid, "📊 Статистика"), callback(uid, poll_cb.new("stats", "pick", poll.id))]
+
+
+def export_flow(uid: int, poll) -> list[dict]:
+    return [callback(uid, f"export_csv_{poll.id}")]
+
+
+FLOWS = {"take_poll": take_poll_flow, "stats": stats_flow, "export": export_flow}
+
+
+async def check_taken(poll, students: list[int]):
+    """Каждый студент ответил на все вопросы и отмечен как прошедший опрос."""
+    await response_writer.flush()
+    async with AsyncSessionLocal() as s:
+        q_ids = select(Question.id).where(Question.poll_id == poll.id)
+        responses = (await s.execute(
+            select(func.count()).select_from(Response).where(Response.question_id.in_(q_ids))
+        )).scalar_one()
+        completions = (await s.execute(
+            select(func.count()).select_from(PollCompletion).where(PollCompletion.poll_id == poll.id)
+        )).scalar_one()
+    expected = len(students) * len(poll.questions)
+    if responses != expected or completions != len(students):
+        raise SystemExit(f"take_poll did not complete: responses {responses}/{expected}, "
+                         f"completions {completions}/{len(students)}")
+
+
+# ——— прогон ——————————————————————————————————————————————————————
+def build_dispatcher(storage: str, api_latency: float) -> Dispatcher:
+    cfg = dataclasses.replace(load_config(), FSM_STORAGE=storage)
+    bot = StubBot(latency=api_latency)
+    dp  = Dispatcher(bot, storage=build_storage(cfg))
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+    register_middlewares(dp)
+    register_handlers(dp)
+    return dp
+
+
+async def run_flow(dp: Dispatcher, scripts: list[list[dict]]) -> dict:
+    latencies, errors = [], 0
+
+    async def user(script):
+        nonlocal errors
+        for raw in script:
+            update = types.Update(**raw)
+            t0 = time.perf_counter()
+            try:
+                # как в polling/webhook: каждый апдейт в своей задаче (свой контекст FSM)
+                await asyncio.create_task(dp.updates_handler.notify(update))
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(user(s) for s in scripts))
+    took = time.perf_counter() - t0
+
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+
+    return {"updates": len(latencies), "errors": errors, "seconds": took,
+            "p50": pct(0.50), "p95": pct(0.95), "p99": pct(0.99)}
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--flows", default="take_poll,stats,export")
+    ap.add_argument("--students", type=int, default=300)
+    ap.add_argument("--teachers", type=int, default=30)
+    ap.add_argument("--questions", type=int, default=10)
+    ap.add_argument("--repeat", type=int, default=3, help="повторов stats/export на учителя")
+    ap.add_argument("--storage", choices=["postgres", "memory"], default="postgres")
+    ap.add_argument("--api-latency", type=float, default=0.0, help="задержка Bot API, с")
+    args = ap.parse_args()
+
+    students = [BENCH_TG_BASE + i for i in range(args.students)]
+    teachers = [TEACHER_BASE + i for i in range(args.teachers)]
+
+    await init_db()
+    poll = await seed(students, teachers, args.questions)
+    dp = build_dispatcher(args.storage, args.api_latency)
+    try:
+        print(f"{'flow':10} {'updates':>8} {'errors':>6} {'upd/s':>9} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+        for name in args.flows.split(","):
+            flow = FLOWS[name]
+            if name == "take_poll":
+                scripts = [flow(uid, poll) for uid in students]
+            else:
+                scripts = [sum((flow(uid, poll) for _ in range(args.repeat)), [])
+                           for uid in teachers]
+            r = await run_flow(dp, scripts)
+            if name == "take_poll":
+                await check_taken(poll, students)
+            print(f"{name:10} {r['updates']:8} {r['errors']:6} {r['updates'] / r['seconds']:9.1f} "
+                  f"{r['p50']:8.1f} {r['p95']:8.1f} {r['p99']:8.1f}")
+        print(f"Bot API calls: {dict(dp.bot.calls)}")
+    finally:
+        await response_writer.close()
+        await dp.storage.close()
+        await cleanup(poll.id)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,86 @@
+"""
+Накладные расходы FSM-хранилища на один апдейт: MemoryStorage vs PostgresStorage.
+
+Каждый «апдейт» повторяет то, что делает типичный шаг опроса:
+get_state (фильтр) → get_data → update_data → set_state.
+
+Запуск (нужна БД из .env; пишет в fsm_states и потом чистит за собой):
+    python benchmarks/bench_fsm_storage.py --users 200 --updates 20
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from sqlalchemy import delete, event
+
+from database import AsyncSessionLocal, engine, init_db
+from models import FSMRecord
+from services.fsm_storage import PostgresStorage
+
+BENCH_CHAT_BASE = 9_000_000_000
+
+
+async def one_update(storage, uid: int, step: int):
+    chat = user = BENCH_CHAT_BASE + uid
+    await storage.get_state(chat=chat, user=user)
+    data = await storage.get_data(chat=chat, user=user)
+    await storage.update_data(chat=chat, user=user,
+                              index=data.get("index", 0) + 1, poll_id=1)
+    await storage.set_state(chat=chat, user=user, state=f"PollTakeStates:answering{step % 2}")
+
+
+async def run(storage, users: int, updates: int) -> list[float]:
+    timings = []
+
+    async def user_flow(uid):
+        for step in range(updates):
+            t0 = time.perf_counter()
+            await one_update(storage, uid, step)
+            timings.append(time.perf_counter() - t0)
+
+    await asyncio.gather(*(user_flow(u) for u in range(users)))
+    return timings
+
+
+def report(name: str, timings: list[float], wall: float, queries: int):
+    timings.sort()
+    p = lambda q: timings[min(len(timings) - 1, int(q * len(timings)))] * 1e6
+    print(f"{name:>10} | updates={len(timings):>6} | mean={statistics.mean(timings) * 1e6:8.1f}µs "
+          f"p50={p(.5):8.1f}µs p99={p(.99):8.1f}µs | wall={wall:6.2f}s | queries={queries}")
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--updates", type=int, default=20)
+    args = ap.parse_args()
+
+    await init_db()
+    queries = 0
+
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    for name, storage in (("memory", MemoryStorage()), ("postgres", PostgresStorage())):
+        queries = 0
+        t0 = time.perf_counter()
+        timings = await run(storage, args.users, args.updates)
+        await storage.close()          # дописываем хвост буфера
+        report(name, timings, time.perf_counter() - t0, queries)
+
+    async with AsyncSessionLocal() as s:
+        await s.execute(delete(FSMRecord).where(FSMRecord.chat >= BENCH_CHAT_BASE))
+        await s.commit()
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+"""
+Планы запросов статистики, «доступных опросов», напоминаний и просмотра пользователей
+до и после индексов из models.py / миграций 3f9a1c2b7d4e, 7c2e5d9a1f30.
+
+Засевает БД из .env синтетическими данными (~1M ответов и 200k пользователей
+по умолчанию), снимает EXPLAIN ANALYZE без индексов, создаёт индексы и снимает ещё раз.
+    python benchmarks/bench_indexes.py --responses 1000000 --roster 200000 [--keep]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.future import select
+from sqlalchemy.schema import CreateIndex
+
+from database import engine, init_db
+from models import Poll, PollCompletion, Question, Answer, Response, User
+from services.polls import available_polls_stmt, poll_page_stmt
+from services.reminders import non_completers_stmt
+from services.users import users_page_stmt
+
+MARK = -424242   # polls.created_by засеянных опросов
+HOT_TABLES = [Question.__table__, Answer.__table__, Response.__table__, PollCompletion.__table__]
+
+
+# индексы просмотра пользователей (уникальный tg_id не трогаем — на нём upsert)
+USER_INDEXES = ("ix_users_role_id", "ix_users_group_id_id")
+
+
+def hot_indexes():
+    return ([idx for t in HOT_TABLES for idx in t.indexes]
+            + [idx for idx in User.__table__.indexes if idx.name in USER_INDEXES])
+
+
+def literal_sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+async def seed(conn, polls: int, questions: int, users: int, responses: int):
+    t0 = time.perf_counter()
+    await conn.execute(text(
+        "INSERT INTO polls (title, target_role, created_by) "
+        "SELECT 'bench ' || g, 'student', :mark FROM generate_series(1, :n) g"
+    ), {"mark": MARK, "n": polls})
+    await conn.execute(text(
+        "INSERT INTO questions (poll_id, question_text, question_type) "
+        "SELECT p.id, 'q' || g, 'single_choice' FROM polls p, generate_series(1, :n) g "
+        "WHERE p.created_by = :mark"
+    ), {"mark": MARK, "n": questions})
+    await conn.execute(text(
+        "INSERT INTO answers (question_id, answer_text) "
+        "SELECT q.id, 'a' || g FROM questions q JOIN polls p ON p.id = q.poll_id, "
+        "generate_series(1, 4) g WHERE p.created_by = :mark"
+    ), {"mark": MARK})
+    await conn.execute(text(
+        "WITH qa AS ("
+        "  SELECT array_agg(a.id ORDER BY a.id) AS ids, array_agg(a.question_id ORDER BY a.id) AS qids "
+        "  FROM answers a JOIN questions q ON q.id = a.question_id "
+        "  JOIN polls p ON p.id = q.poll_id WHERE p.created_by = :mark) "
+        "INSERT INTO responses (user_id, question_id, answer_id) "
+        "SELECT 1 + (random() * (:users - 1))::bigint, qa.qids[r.i], qa.ids[r.i] "
+        "FROM qa, LATERAL (SELECT 1 + (random() * (array_length(qa.ids, 1) - 1))::int AS i "
+        "                  FROM generate_series(1, :n)) r"
+    ), {"mark": MARK, "users": users, "n": responses})
+    await conn.execute(text(
+        "INSERT INTO poll_completions (user_id, poll_id) "
+        "SELECT u, p.id FROM generate_series(1, :users) u, polls p "
+        "WHERE p.created_by = :mark AND random() < 0.3"
+    ), {"mark": MARK, "users": users})
+    print(f"seeded in {time.perf_counter() - t0:.1f}s")
+
+
+async def seed_roster(conn, n: int):
+    # tg_id < MARK — отличимы от настоящих (положительных) id; 90% студентов
+    await conn.execute(text(
+        "INSERT INTO users (tg_id, role) "
+        "SELECT :mark - g, CASE WHEN g % 10 = 0 THEN 'teacher' ELSE 'student' END "
+        "FROM generate_series(1, :n) g ON CONFLICT (tg_id) DO NOTHING"
+    ), {"mark": MARK, "n": n})
+
+
+async def cleanup(conn):
+    polls = "SELECT id FROM polls WHERE created_by = :mark"
+    questions = f"SELECT id FROM questions WHERE poll_id IN ({polls})"
+    for sql in (
+        f"DELETE FROM responses WHERE question_id IN ({questions})",
+        f"DELETE FROM answers WHERE question_id IN ({questions})",
+        f"DELETE FROM questions WHERE poll_id IN ({polls})",
+        f"DELETE FROM poll_completions WHERE poll_id IN ({polls})",
+        "DELETE FROM polls WHERE created_by = :mark",
+        "DELETE FROM users WHERE tg_id <= :mark",
+    ):
+        await conn.execute(text(sql), {"mark": MARK})
+
+
+async def explain(conn, title: str, sql: str):
+    rows = (await conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + sql))).scalars().all()
+    print(f"\n— {title}")
+    for line in rows:
+        print("   ", line)
+
+
+async def run_queries(conn, poll_id: int, user_id: int):
+    # тот же сгруппированный запрос, что в services/poll_stats.py
+    stats = (
+        select(Question.id, Question.question_text, Question.question_type,
+               Answer.id, Answer.answer_text, func.count(Response.id))
+        .outerjoin(Answer, Answer.question_id == Question.id)
+        .outerjoin(Response, Response.answer_id == Answer.id)
+        .where(Question.poll_id == poll_id)
+        .group_by(Question.id, Answer.id)
+    )
+    await explain(conn, "poll statistics", literal_sql(stats))
+
+    # запрос сервиса доступных опросов (NOT EXISTS по poll_completions)
+    await explain(conn, "available polls", literal_sql(available_polls_stmt(user_id)))
+
+    # страница inline-выбора опроса (keyset по id, без OFFSET)
+    await explain(conn, "poll picker page", literal_sql(poll_page_stmt(after=poll_id, limit=8)))
+
+    # кому напомнить: аудитория опроса без прошедших (анти-join по poll_completions)
+    await explain(conn, "reminder non-completers",
+                  literal_sql(non_completers_stmt(poll_id, User.tg_id)))
+
+    # страница просмотра пользователей с фильтром по роли (keyset по id)
+    await explain(conn, "users page (teacher)",
+                  literal_sql(users_page_stmt(role="teacher", after=0, limit=20)))
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--polls", type=int, default=50)
+    ap.add_argument("--questions", type=int, default=20)
+    ap.add_argument("--users", type=int, default=5000)
+    ap.add_argument("--responses", type=int, default=1_000_000)
+    ap.add_argument("--roster", type=int, default=200_000, help="пользователей для просмотра")
+    ap.add_argument("--keep", action="store_true", help="не удалять засеянные данные")
+    args = ap.parse_args()
+
+    await init_db()
+    async with engine.begin() as conn:
+        await seed(conn, args.polls, args.questions, args.users, args.responses)
+        await seed_roster(conn, args.roster)
+        # пользователь, для которого строится список доступных опросов
+        await conn.execute(text(
+            "INSERT INTO users (tg_id, role) VALUES (:mark, 'student') ON CONFLICT (tg_id) DO NOTHING"
+        ), {"mark": MARK})
+    async with engine.connect() as conn:
+        poll_id = (await conn.execute(
+            select(Poll.id).where(Poll.created_by == MARK).limit(1)
+        )).scalar_one()
+
+    try:
+        for phase in ("before", "after"):
+            async with engine.begin() as conn:
+                for idx in hot_indexes():
+                    if phase == "before":
+                        await conn.execute(text(f"DROP INDEX IF EXISTS {idx.name}"))
+                    else:
+                        await conn.execute(CreateIndex(idx))
+                await conn.execute(text("ANALYZE questions, answers, responses, poll_completions, polls, users"))
+            print(f"\n======== {phase.upper()} indexes ========")
+            async with engine.connect() as conn:
+                await run_queries(conn, poll_id, user_id=MARK)
+    finally:
+        if not args.keep:
+            async with engine.begin() as conn:
+                await cleanup(conn)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Сравнение старого N+1 сбора статистики с services.poll_stats.
+
+Запуск (нужна БД из .env, создаёт и затем удаляет временные опросы):
+    python benchmarks/bench_poll_stats.py --questions 5 10 20 40 --responses 50
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import event, func, delete
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal, engine, init_db
+from models import Poll, Question, Answer, Response
+from services.poll_stats import collect_poll_stats
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args):
+        self.count += 1
+
+
+async def seed_poll(n_questions: int, n_responses: int) -> int:
+    async with AsyncSessionLocal() as s:
+        poll = Poll(title=f"bench-{n_questions}", target_role="all", created_by=0)
+        for i in range(n_questions):
+            if i % 2:
+                q = Question(question_text=f"text {i}", question_type="text")
+                q.responses = [Response(user_id=u, response_text=f"answer {u}")
+                               for u in range(n_responses)]
+            else:
+                q = Question(question_text=f"choice {i}", question_type="single_choice")
+                q.answers = [Answer(answer_text=f"option {j}") for j in range(4)]
+            poll.questions.append(q)
+        s.add(poll)
+        await s.flush()
+        for q in poll.questions:
+            if q.question_type == "single_choice":
+                for u in range(n_responses):
+                    s.add(Response(user_id=u, question_id=q.id,
+                                   answer_id=random.choice(q.answers).id))
+        await s.commit()
+        return poll.id
+
+
+async def drop_poll(poll_id: int):
+    async with AsyncSessionLocal() as s:
+        q_ids = select(Question.id).where(Question.poll_id == poll_id)
+        await s.execute(delete(Response).where(Response.question_id.in_(q_ids)))
+        await s.execute(delete(Answer).where(Answer.question_id.in_(q_ids)))
+        await s.execute(delete(Question).where(Question.poll_id == poll_id))
+        await s.execute(delete(Poll).where(Poll.id == poll_id))
+        await s.commit()
+
+
+async def legacy_stats(poll_id: int):
+    # прежний алгоритм из poll_stats_callback: запрос на каждый вопрос
+    async with AsyncSessionLocal() as s:
+        stats = []
+        qs = (await s.execute(
+            select(Question).where(Question.poll_id == poll_id)
+        )).scalars().all()
+        for q in qs:
+            if q.question_type != "text":
+                rows = (await s.execute(
+                    select(Answer.answer_text, func.count(Response.id))
+                    .outerjoin(Response, Response.answer_id == Answer.id)
+                    .where(Answer.question_id == q.id)
+                    .group_by(Answer.answer_text)
+                )).all()
+                stats.append(rows)
+            else:
+                stats.append((await s.execute(
+                    select(Response.response_text).where(Response.question_id == q.id)
+                )).scalars().all())
+        return stats
+
+
+async def engine_stats(poll_id: int):
+    async with AsyncSessionLocal() as s:
+        return await collect_poll_stats(s, poll_id)
+
+
+async def measure(fn, poll_id: int, repeat: int):
+    counter = QueryCounter()
+    event.listen(engine.sync_engine, "before_cursor_execute", counter)
+    try:
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            await fn(poll_id)
+        elapsed = (time.perf_counter() - t0) / repeat
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", counter)
+    return counter.count // repeat, elapsed * 1000
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--questions", type=int, nargs="+", default=[5, 10, 20, 40])
+    ap.add_argument("--responses", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=20)
+    args = ap.parse_args()
+
+    await init_db()
+    print(f"{'questions':>9} | {'legacy q':>8} {'legacy ms':>9} | {'engine q':>8} {'engine ms':>9}")
+    for n in args.questions:
+        poll_id = await seed_poll(n, args.responses)
+        try:
+            lq, lt = await measure(legacy_stats, poll_id, args.repeat)
+            eq, et = await measure(engine_stats, poll_id, args.repeat)
+        finally:
+            await drop_poll(poll_id)
+        print(f"{n:>9} | {lq:>8} {lt:>9.2f} | {eq:>8} {et:>9.2f}")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Засев пользователей на старте: старый цикл SELECT + UPDATE/INSERT на каждый ID
+против одного INSERT ... ON CONFLICT (services.users.upsert_users) и против
+массовой выдачи роли из бота (services.users.bulk_set_role, по запросу на роль).
+
+Запуск (нужна БД из .env; пишет в users ID из отдельного диапазона и чистит за собой):
+    python benchmarks/bench_seed_users.py --users 10000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import delete, event, update
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal, engine, init_db
+from models import User
+from services.users import bulk_set_role, upsert_users
+
+BENCH_TG_BASE = 8_000_000_000
+
+
+async def legacy_seed(ids_by_role: dict):
+    # прежний add_users_to_db
+    async with AsyncSessionLocal() as s:
+        for role, ids in ids_by_role.items():
+            for tg in ids:
+                ex = (await s.execute(select(User).where(User.tg_id == tg))).scalar_one_or_none()
+                if ex:
+                    await s.execute(update(User).where(User.tg_id == tg).values(role=role))
+                else:
+                    s.add(User(tg_id=tg, role=role))
+        await s.commit()
+
+
+async def bulk_seed(ids_by_role: dict):
+    await upsert_users([{"tg_id": tg, "role": role}
+                        for role, ids in ids_by_role.items() for tg in ids])
+
+
+async def bulk_roles(ids_by_role: dict):
+    # «📥 Роль списком»: RETURNING xmax = 0 считает добавленных/обновлённых
+    for role, ids in ids_by_role.items():
+        await bulk_set_role(ids, role)
+
+
+async def cleanup():
+    async with AsyncSessionLocal() as s:
+        await s.execute(delete(User).where(User.tg_id >= BENCH_TG_BASE))
+        await s.commit()
+
+
+async def measure(name: str, seed, ids_by_role: dict):
+    queries = 0
+
+    def count(*_):
+        nonlocal queries
+        queries += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    try:
+        for phase in ("cold", "warm"):     # cold — все INSERT, warm — все UPDATE
+            queries = 0
+            t0 = time.perf_counter()
+            await seed(ids_by_role)
+            dt = time.perf_counter() - t0
+            print(f"{name:8} {phase}: {dt * 1000:9.1f} ms, {queries} queries")
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", count)
+        await cleanup()
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--users", type=int, default=10_000)
+    args = ap.parse_args()
+
+    ids = [BENCH_TG_BASE + i for i in range(args.users)]
+    # как в .env: немного админов и учителей, остальные — студенты
+    ids_by_role = {
+        "admin":   ids[:10],
+        "teacher": ids[10:args.users // 20],
+        "student": ids[args.users // 20:],
+    }
+
+    await init_db()
+    await cleanup()
+    try:
+        await measure("legacy", legacy_seed, ids_by_role)
+        await measure("upsert", bulk_seed, ids_by_role)
+        await measure("bulk", bulk_roles, ids_by_role)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
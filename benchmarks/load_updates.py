@@ -0,0 +1,118 @@
+"""
+Нагрузочный генератор: сколько апдейтов в секунду бот обрабатывает
+в режиме long polling и в режиме webhook.
+
+Бот — StubBot (без обращения к Telegram), обработчики — настоящие,
+БД — из .env. Пример:
+    python benchmarks/load_updates.py --mode both --updates 5000 --users 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import aiohttp
+from aiohttp import web
+from aiogram import Bot, Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from database import engine, init_db
+from handlers import register_middlewares, register_handlers
+from webhook import build_app
+from stub_bot import StubBot
+from synthetic import message
+
+POLL_BATCH = 100   # максимум апдейтов в одном ответе getUpdates
+
+
+def build_dispatcher(api_latency: float) -> Dispatcher:
+    bot = StubBot(latency=api_latency)
+    dp  = Dispatcher(bot, storage=MemoryStorage())
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+    register_middlewares(dp)
+    register_handlers(dp)
+    return dp
+
+
+def make_updates(n: int, users: int, text: str) -> list[dict]:
+    return [message(random.randrange(1, users + 1), text) for _ in range(n)]
+
+
+async def run_polling(dp: Dispatcher, updates: list[dict], rtt: float) -> float:
+    # как executor.start_polling: getUpdates (rtt) → пачка уходит в фоновую задачу
+    t0, tasks = time.perf_counter(), []
+    for i in range(0, len(updates), POLL_BATCH):
+        await asyncio.sleep(rtt)
+        batch = [types.Update(**u) for u in updates[i:i + POLL_BATCH]]
+        tasks.append(asyncio.create_task(dp.process_updates(batch)))
+    await asyncio.gather(*tasks)
+    return time.perf_counter() - t0
+
+
+async def run_webhook(dp: Dispatcher, updates: list[dict], workers: int,
+                      concurrency: int) -> tuple[float, float]:
+    app = build_app(dp, "/webhook", workers=workers, queue_size=len(updates))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    site = web.TCPSite(runner, "127.0.0.1", port)
+    await site.start()
+    url = f"http://127.0.0.1:{port}/webhook"
+
+    pool = app["update_pool"]
+    it = iter(updates)
+    t0 = time.perf_counter()
+    async with aiohttp.ClientSession() as http:
+        async def sender():
+            for u in it:
+                async with http.post(url, json=u) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"webhook answered {resp.status}")
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
+        acked = time.perf_counter() - t0
+        while pool.pending():
+            await asyncio.sleep(0.01)
+    await runner.cleanup()   # дожидается обработки принятых апдейтов
+    return acked, time.perf_counter() - t0
+
+
+async def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mode", choices=["polling", "webhook", "both"], default="both")
+    ap.add_argument("--updates", type=int, default=5000)
+    ap.add_argument("--users", type=int, default=500)
+    ap.add_argument("--text", default="/start")
+    ap.add_argument("--api-latency", type=float, default=0.0, help="задержка Bot API, с")
+    ap.add_argument("--poll-rtt", type=float, default=0.05, help="round trip getUpdates, с")
+    ap.add_argument("--workers", type=int, default=32)
+    ap.add_argument("--concurrency", type=int, default=40, help="параллельных POST (max_connections)")
+    args = ap.parse_args()
+
+    await init_db()
+    updates = make_updates(args.updates, args.users, args.text)
+
+    if args.mode in ("polling", "both"):
+        dp = build_dispatcher(args.api_latency)
+        took = await run_polling(dp, updates, args.poll_rtt)
+        print(f"polling : {len(updates)} updates in {took:6.2f}s → {len(updates) / took:8.1f} upd/s")
+
+    if args.mode in ("webhook", "both"):
+        dp = build_dispatcher(args.api_latency)
+        acked, took = await run_webhook(dp, updates, args.workers, args.concurrency)
+        print(f"webhook : {len(updates)} updates acked in {acked:6.2f}s "
+              f"({len(updates) / acked:8.1f} ack/s), processed in {took:6.2f}s "
+              f"→ {len(updates) / took:8.1f} upd/s")
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
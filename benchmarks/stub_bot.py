@@ -0,0 +1,38 @@
+"""Bot без сети: отвечает на вызовы Bot API заглушками и считает их."""
+import asyncio
+import itertools
+import time
+from collections import Counter
+
+from aiogram import Bot
+
+# валидный по формату, но ненастоящий токен
+STUB_TOKEN = "123456:STUB-benchmark-token"
+
+
+class StubBot(Bot):
+    """
+    ``latency`` — искусственная задержка каждого вызова API (секунды),
+    чтобы приблизить картину к сетевой.
+    """
+
+    def __init__(self, latency: float = 0.0, **kwargs):
+        kwargs.setdefault("parse_mode", "HTML")
+        super().__init__(token=STUB_TOKEN, **kwargs)
+        self.latency  = latency
+        self.calls    = Counter()
+        self._msg_ids = itertools.count(1)
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        self.calls[method] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if method in ("sendMessage", "sendDocument", "editMessageText"):
+            chat_id = int((data or {}).get("chat_id", 0) or 0)
+            return {
+                "message_id": next(self._msg_ids),
+                "date":       int(time.time()),
+                "chat":       {"id": chat_id, "type": "private"},
+                "text":       (data or {}).get("text", ""),
+            }
+        return True
@@ -0,0 +1,40 @@
+"""Генерация синтетических апдейтов Telegram (dict в формате Bot API)."""
+import itertools
+import time
+
+_update_ids = itertools.count(1)
+_message_ids = itertools.count(1)
+
+
+def message(user_id: int, text: str) -> dict:
+    return {
+        "update_id": next(_update_ids),
+        "message": {
+            "message_id": next(_message_ids),
+            "date":       int(time.time()),
+            "chat":       {"id": user_id, "type": "private"},
+            "from":       {"id": user_id, "is_bot": False, "first_name": f"u{user_id}"},
+            "text":       text,
+            **({"entities": [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]}
+               if text.startswith("/") else {}),
+        },
+    }
+
+
+def callback(user_id: int, data: str, message_id: int = 1) -> dict:
+    return {
+        "update_id": next(_update_ids),
+        "callback_query": {
+            "id":            str(next(_update_ids)),
+            "chat_instance": str(user_id),
+            "from":          {"id": user_id, "is_bot": False, "first_name": f"u{user_id}"},
+            "data":          data,
+            "message": {
+                "message_id": message_id,
+                "date":       int(time.time()),
+                "chat":       {"id": user_id, "type": "private"},
+                "from":       {"id": 123456, "is_bot": True, "first_name": "bot"},
+                "text":       "…",
+            },
+        },
+    }
@@ -18,6 +18,73 @@ class Config:
     DB_NAME:      str
     DB_PORT:      int
     GROUP_NAMES:  list[str]
+    # пул соединений с БД
+    DB_POOL_SIZE:            int
+    DB_MAX_OVERFLOW:         int
+    DB_POOL_TIMEOUT:         float
+    DB_POOL_RECYCLE:         int    # сек, -1 — не пересоздавать
+    DB_POOL_PRE_PING:        bool
+    DB_STATEMENT_CACHE_SIZE: int    # кэш prepared statements asyncpg на соединение
+    # кэш пользователей/ролей
+    USER_CACHE_TTL:   float
+    USER_CACHE_SIZE:  int
+    # пользователей на странице просмотра
+    USER_PAGE_SIZE:   int
+    # выгрузка статистики
+    EXPORT_CHUNK_SIZE: int
+    EXPORT_SPOOL_MAX:  int
+    # кэш снимков опросов (вопросы + варианты)
+    POLL_CACHE_TTL:    float
+    POLL_CACHE_SIZE:   int
+    # кэш списков доступных опросов (по пользователю)
+    AVAILABLE_POLLS_TTL:  float
+    AVAILABLE_POLLS_SIZE: int
+    # опросов на странице inline-выбора
+    POLL_PAGE_SIZE: int
+    # отложенная запись ответов
+    RESPONSE_BATCH_SIZE:     int
+    RESPONSE_FLUSH_INTERVAL: float
+    RESPONSE_MAX_RETRIES:    int    # попыток записать пачку при сбоях БД
+    # FSM-хранилище: postgres | redis | memory
+    FSM_STORAGE:        str
+    FSM_TTL:            float
+    FSM_CACHE_TTL:      float
+    FSM_FLUSH_INTERVAL: float
+    FSM_BATCH_SIZE:     int
+    FSM_INSTANCES:      int    # процессов бота на одной таблице fsm_states
+    # черновик создаваемого опроса (в данных FSM)
+    POLL_DRAFT_TTL:            float  # сек
+    POLL_DRAFT_MAX_BYTES:      int
+    POLL_DRAFT_SWEEP_INTERVAL: float  # сек, чистка брошенных черновиков и метрики
+    REDIS_HOST:         str
+    REDIS_PORT:         int
+    REDIS_DB:           int
+    # режим работы: polling | webhook
+    BOT_MODE:                str
+    WEBHOOK_URL:             str    # публичный адрес, напр. https://bot.example.com
+    WEBHOOK_PATH:            str
+    WEBHOOK_SECRET:          str
+    WEBHOOK_MAX_CONNECTIONS: int
+    WEBHOOK_WORKERS:         int    # сколько апдейтов обрабатывается параллельно
+    WEBHOOK_QUEUE_SIZE:      int
+    WEBAPP_HOST:             str
+    WEBAPP_PORT:             int
+    # метрики: /metrics в формате Prometheus (порт 0 — выключено) и сводка в лог
+    METRICS_HOST:         str
+    METRICS_PORT:         int
+    METRICS_LOG_INTERVAL: float   # сек, 0 — не писать
+    # рассылка уведомлений (лимиты Telegram: ~30 сообщений/с всего, ~1/с в один чат)
+    BROADCAST_RATE:          float  # сообщений в секунду на весь бот
+    BROADCAST_BURST:         int
+    BROADCAST_CHAT_INTERVAL: float  # сек между сообщениями в один чат
+    BROADCAST_CONCURRENCY:   int    # одновременных запросов к Bot API
+    BROADCAST_BATCH:         int    # строк outbox за одну выборку
+    BROADCAST_MAX_ATTEMPTS:  int
+    BROADCAST_POLL_INTERVAL: float  # сек, как часто проверять outbox без сигнала
+    # напоминания не прошедшим опрос (расписания — в таблице reminder_schedules)
+    REMINDER_TICK:      float       # сек между проверками расписаний
+    REMINDER_BATCH:     int         # расписаний за одну проверку
+    REMINDER_INTERVALS: list[int]   # периоды на выбор, часы
 
 def load_config() -> Config:
     return Config(
@@ -30,5 +97,58 @@ def load_config() -> Config:
         DB_PASSWORD   = os.getenv("DB_PASSWORD",""),
         DB_NAME       = os.getenv("DB_NAME",""),
         DB_PORT       = int(os.getenv("DB_PORT","5432")),
-        GROUP_NAMES   = os.getenv("GROUP_NAMES","").split(",") if os.getenv("GROUP_NAMES") else []
+        GROUP_NAMES   = os.getenv("GROUP_NAMES","").split(",") if os.getenv("GROUP_NAMES") else [],
+        DB_POOL_SIZE            = int(os.getenv("DB_POOL_SIZE","10")),
+        DB_MAX_OVERFLOW         = int(os.getenv("DB_MAX_OVERFLOW","20")),
+        DB_POOL_TIMEOUT         = float(os.getenv("DB_POOL_TIMEOUT","10")),
+        DB_POOL_RECYCLE         = int(os.getenv("DB_POOL_RECYCLE","1800")),
+        DB_POOL_PRE_PING        = os.getenv("DB_POOL_PRE_PING","1").lower() in ("1","true","yes"),
+        DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE","500")),
+        USER_CACHE_TTL  = float(os.getenv("USER_CACHE_TTL","60")),
+        USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE","10000")),
+        USER_PAGE_SIZE  = int(os.getenv("USER_PAGE_SIZE","20")),
+        EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE","1000")),
+        EXPORT_SPOOL_MAX  = int(os.getenv("EXPORT_SPOOL_MAX", str(4 * 1024 * 1024))),
+        POLL_CACHE_TTL    = float(os.getenv("POLL_CACHE_TTL","300")),
+        POLL_CACHE_SIZE   = int(os.getenv("POLL_CACHE_SIZE","1000")),
+        AVAILABLE_POLLS_TTL  = float(os.getenv("AVAILABLE_POLLS_TTL","60")),
+        AVAILABLE_POLLS_SIZE = int(os.getenv("AVAILABLE_POLLS_SIZE","10000")),
+        POLL_PAGE_SIZE = int(os.getenv("POLL_PAGE_SIZE","8")),
+        RESPONSE_BATCH_SIZE     = int(os.getenv("RESPONSE_BATCH_SIZE","500")),
+        RESPONSE_FLUSH_INTERVAL = float(os.getenv("RESPONSE_FLUSH_INTERVAL","0.5")),
+        RESPONSE_MAX_RETRIES    = int(os.getenv("RESPONSE_MAX_RETRIES","5")),
+        FSM_STORAGE        = os.getenv("FSM_STORAGE","postgres"),
+        FSM_TTL            = float(os.getenv("FSM_TTL", str(7 * 24 * 3600))),
+        FSM_CACHE_TTL      = float(os.getenv("FSM_CACHE_TTL","2")),
+        FSM_FLUSH_INTERVAL = float(os.getenv("FSM_FLUSH_INTERVAL","0.05")),
+        FSM_BATCH_SIZE     = int(os.getenv("FSM_BATCH_SIZE","500")),
+        FSM_INSTANCES      = int(os.getenv("FSM_INSTANCES","1")),
+        POLL_DRAFT_TTL            = float(os.getenv("POLL_DRAFT_TTL", str(24 * 3600))),
+        POLL_DRAFT_MAX_BYTES      = int(os.getenv("POLL_DRAFT_MAX_BYTES", str(128 * 1024))),
+        POLL_DRAFT_SWEEP_INTERVAL = float(os.getenv("POLL_DRAFT_SWEEP_INTERVAL","60")),
+        REDIS_HOST         = os.getenv("REDIS_HOST","localhost"),
+        REDIS_PORT         = int(os.getenv("REDIS_PORT","6379")),
+        REDIS_DB           = int(os.getenv("REDIS_DB","0")),
+        BOT_MODE                = os.getenv("BOT_MODE","polling"),
+        WEBHOOK_URL             = os.getenv("WEBHOOK_URL",""),
+        WEBHOOK_PATH            = os.getenv("WEBHOOK_PATH","/webhook"),
+        WEBHOOK_SECRET          = os.getenv("WEBHOOK_SECRET",""),
+        WEBHOOK_MAX_CONNECTIONS = int(os.getenv("WEBHOOK_MAX_CONNECTIONS","40")),
+        WEBHOOK_WORKERS         = int(os.getenv("WEBHOOK_WORKERS","32")),
+        WEBHOOK_QUEUE_SIZE      = int(os.getenv("WEBHOOK_QUEUE_SIZE","10000")),
+        WEBAPP_HOST             = os.getenv("WEBAPP_HOST","0.0.0.0"),
+        WEBAPP_PORT             = int(os.getenv("WEBAPP_PORT","8080")),
+        METRICS_HOST         = os.getenv("METRICS_HOST","127.0.0.1"),
+        METRICS_PORT         = int(os.getenv("METRICS_PORT","9108")),
+        METRICS_LOG_INTERVAL = float(os.getenv("METRICS_LOG_INTERVAL","300")),
+        BROADCAST_RATE          = float(os.getenv("BROADCAST_RATE","25")),
+        BROADCAST_BURST         = int(os.getenv("BROADCAST_BURST","25")),
+        BROADCAST_CHAT_INTERVAL = float(os.getenv("BROADCAST_CHAT_INTERVAL","1")),
+        BROADCAST_CONCURRENCY   = int(os.getenv("BROADCAST_CONCURRENCY","16")),
+        BROADCAST_BATCH         = int(os.getenv("BROADCAST_BATCH","500")),
+        BROADCAST_MAX_ATTEMPTS  = int(os.getenv("BROADCAST_MAX_ATTEMPTS","5")),
+        BROADCAST_POLL_INTERVAL = float(os.getenv("BROADCAST_POLL_INTERVAL","5")),
+        REMINDER_TICK      = float(os.getenv("REMINDER_TICK","60")),
+        REMINDER_BATCH     = int(os.getenv("REMINDER_BATCH","50")),
+        REMINDER_INTERVALS = list(map(int, os.getenv("REMINDER_INTERVALS","24,72,168").split(","))),
     )
@@ -1,6 +1,10 @@
+import time
+
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import load_config
+from services.metrics import Gauge, Histogram
 
 cfg = load_config()
 Base = declarative_base()
@@ -9,15 +13,49 @@ DATABASE_URL = (
     f"postgresql+asyncpg://"
     f"{cfg.DB_USER}:{cfg.DB_PASSWORD}"
     f"@{cfg.DB_HOST}:{cfg.DB_PORT}/{cfg.DB_NAME}"
+    f"?prepared_statement_cache_size={cfg.DB_STATEMENT_CACHE_SIZE}"
 )
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+POOL_CHECKOUT = Histogram("db_pool_checkout_seconds",
+                          "Время получения соединения из пула (ожидание + pre-ping)")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Пул, который меряет, сколько обработчики ждут свободное соединение."""
+
+    def connect(self):
+        t0 = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            POOL_CHECKOUT.observe(time.perf_counter() - t0)
+
+
+engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    poolclass=InstrumentedPool,
+    pool_size=cfg.DB_POOL_SIZE,
+    max_overflow=cfg.DB_MAX_OVERFLOW,
+    pool_timeout=cfg.DB_POOL_TIMEOUT,
+    pool_recycle=cfg.DB_POOL_RECYCLE,
+    pool_pre_ping=cfg.DB_POOL_PRE_PING,
+)
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False
 )
 
+# пул пересоздаётся при engine.dispose() — берём актуальный при каждом чтении
+def _pool():
+    return engine.sync_engine.pool
+
+Gauge("db_pool_size",        "Размер пула (постоянные соединения)", func=lambda: _pool().size())
+Gauge("db_pool_checked_out", "Соединений выдано обработчикам",      func=lambda: _pool().checkedout())
+Gauge("db_pool_checked_in",  "Свободных соединений в пуле",         func=lambda: _pool().checkedin())
+Gauge("db_pool_overflow",    "Соединений сверх pool_size",          func=lambda: max(0, _pool().overflow()))
+
 async def init_db():
     # регистрируем все таблицы
     import models
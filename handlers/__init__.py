@@ -4,21 +4,41 @@ from .start              import register_start_handlers
 from .profile            import register_profile
 from .user_management    import register_user_management
 from .group_management   import register_group_management
+from .bulk_admin         import register_bulk_admin
 from .poll_creation      import register_poll_creation
+from .poll_import        import register_poll_import
 from .poll_editor        import register_poll_editor
 from .poll_management    import register_poll_management
 from .poll_statistics    import register_poll_statistics
+from .reminders          import register_reminders
 from .poll_take          import register_poll_take
 from .menu               import register_menu
+from .commands           import commands
+from .filters            import RoleFilter
+from .middleware         import MetricsMiddleware, UserMiddleware
+
+def register_middlewares(dp: Dispatcher):
+    # фильтр roles= должен быть привязан до регистрации хендлеров
+    dp.filters_factory.bind(RoleFilter, event_handlers=[
+        dp.message_handlers, dp.callback_query_handlers,
+    ])
+    # первым — чтобы в замер попадали и остальные middleware
+    dp.middleware.setup(MetricsMiddleware())
+    dp.middleware.setup(UserMiddleware())
 
 def register_handlers(dp: Dispatcher):
+    # кнопки меню — раньше шагов FSM (см. CommandRegistry.register)
+    commands.register(dp)
     register_start_handlers(dp)
     register_profile(dp)
     register_user_management(dp)
     register_group_management(dp)
+    register_bulk_admin(dp)
     register_poll_creation(dp)
+    register_poll_import(dp)
     register_poll_editor(dp)
     register_poll_management(dp)
     register_poll_statistics(dp)
+    register_reminders(dp)
     register_poll_take(dp)
     register_menu(dp)
@@ -0,0 +1,133 @@
+# handlers/bulk_admin.py
+import io
+from typing import Optional
+
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.filters.state import StatesGroup, State
+from aiogram.types import ContentType, ReplyKeyboardMarkup
+from aiogram.utils.markdown import quote_html
+
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal
+from models import Group, User
+from services.roster import parse_ids
+from services.users import BulkResult, bulk_assign_group, bulk_set_role
+from . import keyboards
+from .back import return_to_main_menu
+from .commands import commands
+from .common import BACK, BACK_BTN
+from .filters import STAFF_ROLES
+
+# больше в один файл со списком ID не поместится разумный набор
+MAX_FILE_SIZE = 1024 * 1024
+
+ASK_IDS = ("Отправьте Telegram ID пользователей — через пробел, запятую или с новой "
+           "строки — или файл .txt/.csv со списком.")
+
+
+class BulkStates(StatesGroup):
+    waiting_role  = State()
+    waiting_group = State()
+    waiting_ids   = State()
+
+
+def _roles_for(me: User) -> tuple:
+    # преподаватель не может выдавать роль admin (как и в «➕ Добавить пользователя»)
+    return ("admin", "teacher", "student") if me.role == "admin" else ("teacher", "student")
+
+
+# ——— роль списком —————————————————————————————————————————
+async def start_bulk_role(message: types.Message, state: FSMContext, me: User):
+    await state.finish()
+    roles = _roles_for(me)
+    await BulkStates.waiting_role.set()
+    await message.answer("Какую роль выдать?", reply_markup=keyboards.reply(roles, (BACK,)))
+
+
+async def process_bulk_role(message: types.Message, state: FSMContext, me: Optional[User]):
+    txt = message.text.strip().lower()
+    if txt == BACK.lower():
+        await state.finish()
+        return await return_to_main_menu(message)
+    if me is None or txt not in _roles_for(me):
+        return await message.answer("⛔ Выберите роль кнопкой.", reply_markup=BACK_BTN)
+    await state.update_data(bulk_op="role", bulk_value=txt)
+    await BulkStates.waiting_ids.set()
+    await message.answer(ASK_IDS, reply_markup=BACK_BTN)
+
+
+# ——— группа списком ———————————————————————————————————————
+async def start_bulk_group(message: types.Message, state: FSMContext):
+    await state.finish()
+    async with AsyncSessionLocal() as s:
+        names = (await s.execute(select(Group.name).order_by(Group.name))).scalars().all()
+    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
+    for name in names:
+        kb.add(name)
+    kb.add(BACK)
+    await BulkStates.waiting_group.set()
+    await message.answer("Выберите группу или введите название новой:", reply_markup=kb)
+
+
+async def process_bulk_group(message: types.Message, state: FSMContext):
+    txt = message.text.strip()
+    if txt == BACK:
+        await state.finish()
+        return await return_to_main_menu(message)
+    await state.update_data(bulk_op="group", bulk_value=txt)
+    await BulkStates.waiting_ids.set()
+    await message.answer(ASK_IDS, reply_markup=BACK_BTN)
+
+
+# ——— список ID: текст или файл ————————————————————————————————
+async def _read_ids_text(message: types.Message) -> Optional[str]:
+    if message.document is None:
+        return message.text
+    if (message.document.file_size or 0) > MAX_FILE_SIZE:
+        return None
+    buf = await message.document.download(destination_file=io.BytesIO())
+    return buf.getvalue().decode("utf-8-sig", errors="replace")
+
+
+def _report(res: BulkResult, bad: list[str]) -> str:
+    lines = [f"✅ Готово: добавлено {res.inserted}, обновлено {res.updated}, "
+             f"без изменений/не найдено {res.skipped}."]
+    if bad:
+        sample = ", ".join(quote_html(t) for t in bad[:5])
+        lines.append(f"⚠️ Не распознано: {len(bad)} ({sample}{', …' if len(bad) > 5 else ''})")
+    return "\n".join(lines)
+
+
+async def process_bulk_ids(message: types.Message, state: FSMContext):
+    if message.text and message.text.strip() == BACK:
+        await state.finish()
+        return await return_to_main_menu(message)
+
+    text = await _read_ids_text(message)
+    if text is None:
+        return await message.answer("⛔ Файл больше 1 МБ.", reply_markup=BACK_BTN)
+    ids, bad = parse_ids(text)
+    if not ids:
+        return await message.answer("⛔ Не найдено ни одного числового ID. " + ASK_IDS,
+                                    reply_markup=BACK_BTN)
+
+    data = await state.get_data()
+    if data["bulk_op"] == "role":
+        res = await bulk_set_role(ids, data["bulk_value"])
+    else:
+        res = await bulk_assign_group(ids, data["bulk_value"])
+
+    await state.finish()
+    await message.answer(_report(res, bad), reply_markup=BACK_BTN)
+    return await return_to_main_menu(message)
+
+
+def register_bulk_admin(dp: Dispatcher):
+    commands.add(keyboards.BULK_ROLE_BTN,  start_bulk_role,  roles=STAFF_ROLES)
+    commands.add(keyboards.BULK_GROUP_BTN, start_bulk_group, roles=STAFF_ROLES)
+    dp.register_message_handler(process_bulk_role,  state=BulkStates.waiting_role)
+    dp.register_message_handler(process_bulk_group, state=BulkStates.waiting_group)
+    dp.register_message_handler(process_bulk_ids,   state=BulkStates.waiting_ids,
+                                content_types=[ContentType.TEXT, ContentType.DOCUMENT])
@@ -0,0 +1,100 @@
+# handlers/commands.py
+import inspect
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence
+
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.types import ReplyKeyboardMarkup
+
+from models import User
+from services import monitoring
+
+DENY_TEXT = "⛔ У вас нет прав."
+
+
+@dataclass(frozen=True)
+class Command:
+    text:      str
+    handler:   Callable
+    roles:     Optional[frozenset]   # None — доступна всем
+    deny:      str
+    any_state: bool                  # срабатывает и посреди другого сценария
+    params:    frozenset             # какие из state/me принимает хендлер
+
+    def allowed(self, role: Optional[str]) -> bool:
+        return self.roles is None or role in self.roles
+
+
+class CommandRegistry:
+    """
+    Кнопки reply-клавиатуры → хендлеры.
+
+    Вместо цепочки ``text=``-фильтров и if-ов в route_menu весь текст проверяется
+    одним поиском в dict; проверка ролей — здесь же. Клавиатуры строятся из
+    того же реестра, поэтому пользователь видит только доступные ему команды.
+    """
+
+    def __init__(self):
+        self._commands: dict[str, Command] = {}
+        self._any_state: set[str] = set()
+
+    def add(self, text: str, handler: Callable, *,
+            roles: Optional[Iterable[str]] = None,
+            deny: str = DENY_TEXT,
+            any_state: bool = False):
+        params = frozenset(inspect.signature(handler).parameters) & {"state", "me"}
+        self._commands[text] = Command(
+            text=text,
+            handler=handler,
+            roles=frozenset(roles) if roles is not None else None,
+            deny=deny,
+            any_state=any_state,
+            params=params,
+        )
+        if any_state:
+            self._any_state.add(text)
+        else:
+            self._any_state.discard(text)
+
+    def get(self, text: str) -> Optional[Command]:
+        return self._commands.get(text)
+
+    def keyboard(self, rows: Sequence[Sequence[str]], role: Optional[str] = None,
+                 one_time: bool = False) -> ReplyKeyboardMarkup:
+        """Клавиатура из рядов кнопок; команды, недоступные роли, пропускаются."""
+        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=one_time)
+        for row in rows:
+            buttons = [t for t in row
+                       if (cmd := self._commands.get(t)) is None or cmd.allowed(role)]
+            if buttons:
+                kb.row(*buttons)
+        return kb
+
+    # ——— диспетчеризация ————————————————————————————————————————
+    @staticmethod
+    def _text(message: types.Message) -> str:
+        return (message.text or "").strip()
+
+    def _match(self, message: types.Message) -> bool:
+        return self._text(message) in self._commands
+
+    def _match_any_state(self, message: types.Message) -> bool:
+        return self._text(message) in self._any_state
+
+    async def _dispatch(self, message: types.Message, state: FSMContext, me: Optional[User]):
+        cmd = self._commands[self._text(message)]
+        # в метриках — настоящий хендлер команды, а не общий диспетчер
+        monitoring.set_handler(cmd.handler)
+        if not cmd.allowed(me.role if me else None):
+            return await message.answer(cmd.deny)
+        kwargs = {"state": state, "me": me}
+        return await cmd.handler(message, **{k: kwargs[k] for k in cmd.params})
+
+    def register(self, dp: Dispatcher):
+        # регистрируется первым: команды any_state должны перебивать шаги FSM
+        dp.register_message_handler(self._dispatch, self._match_any_state, state="*")
+        dp.register_message_handler(self._dispatch, self._match, state=None)
+
+
+commands = CommandRegistry()
@@ -1,11 +1,12 @@
 from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.utils.payload import prepare_arg
 
 # Текст кнопки «Назад»
 BACK = "🔙 Назад"
 
-# Клавиатура с одной кнопкой «Назад»
-BACK_BTN = ReplyKeyboardMarkup(
+# Клавиатура с одной кнопкой «Назад» (сразу в JSON — не сериализуется на каждый ответ)
+BACK_BTN = prepare_arg(ReplyKeyboardMarkup(
     keyboard=[[KeyboardButton(BACK)]],
     resize_keyboard=True,
     one_time_keyboard=True
-)
+))
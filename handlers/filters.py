@@ -0,0 +1,23 @@
+# handlers/filters.py
+from typing import Iterable, Union
+
+from aiogram.dispatcher.filters import BoundFilter
+from aiogram.dispatcher.handler import ctx_data
+
+# Роли с правом управления пользователями и опросами
+STAFF_ROLES = ("admin", "teacher")
+
+
+class RoleFilter(BoundFilter):
+    """
+    Фильтр ``roles=(...)``: пропускает апдейт, только если роль пользователя,
+    загруженного UserMiddleware, входит в список. Сам в БД не ходит.
+    """
+    key = "roles"
+
+    def __init__(self, roles: Union[str, Iterable[str]]):
+        self.roles = frozenset([roles] if isinstance(roles, str) else roles)
+
+    async def check(self, obj) -> bool:
+        me = ctx_data.get({}).get("me")
+        return me is not None and me.role in self.roles
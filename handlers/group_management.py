@@ -8,7 +8,11 @@ from sqlalchemy import update
 
 from database import AsyncSessionLocal
 from models import Group, User
+from services.groups import ensure_groups
+from services.users import invalidate_users
+from .commands import commands
 from .common import BACK, BACK_BTN
+from .filters import STAFF_ROLES
 from .back   import return_to_main_menu
 
 class GroupStates(StatesGroup):
@@ -21,12 +25,7 @@ async def seed_groups():
     cfg = load_config()
     if not cfg.GROUP_NAMES:
         return
-    async with AsyncSessionLocal() as s:
-        existing = {g.name for g in (await s.execute(select(Group))).scalars()}
-        for name in cfg.GROUP_NAMES:
-            if name not in existing:
-                s.add(Group(name=name))
-        await s.commit()
+    await ensure_groups(cfg.GROUP_NAMES)
 
 async def start_group_creation(message: types.Message, state: FSMContext):
     await GroupStates.waiting_name.set()
@@ -86,18 +85,17 @@ async def process_group_select(message: types.Message, state: FSMContext):
             update(User).where(User.tg_id==user_id).values(group_id=grp.id)
         )
         await s.commit()
+    invalidate_users([user_id])
     await state.finish()
     await message.answer(f"✅ Пользователь {user_id} назначен в группу «{txt}».",
                          reply_markup=BACK_BTN)
     return await return_to_main_menu(message)
 
 def register_group_management(dp: Dispatcher):
-    dp.register_message_handler(start_group_creation,
-                                text="➕ Создать группу", state=None)
+    commands.add("➕ Создать группу", start_group_creation, roles=STAFF_ROLES)
     dp.register_message_handler(process_group_name,
                                 state=GroupStates.waiting_name)
-    dp.register_message_handler(start_group_assignment,
-                                text="🔀 Назначить группу", state=None)
+    commands.add("🔀 Назначить группу", start_group_assignment, roles=STAFF_ROLES)
     dp.register_message_handler(process_group_user,
                                 state=GroupStates.waiting_user_id)
     dp.register_message_handler(process_group_select,
@@ -0,0 +1,241 @@
+# handlers/keyboards.py
+"""
+Фабрика клавиатур.
+
+Клавиатуры отдаются уже сериализованными в JSON — aiogram передаёт строку
+в reply_markup как есть. Статические собираются один раз (главное меню — один
+раз на роль), динамические (списки опросов, вопросов, вариантов) кэшируются
+по ключу и версии содержимого: пока опросы не менялись, повторный показ того же
+списка не строит объекты и не сериализует их заново.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Callable, Hashable, Iterable, Optional, Sequence
+
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, ReplyKeyboardMarkup
+from aiogram.utils.callback_data import CallbackData
+from aiogram.utils.payload import prepare_arg
+
+from services.poll_export import SINKS as EXPORT_FORMATS
+from services.polls import PollPage, polls_version
+from services.users import ROLES, UserPage
+from .commands import commands
+from .common import BACK
+
+# Главные кнопки
+USERS_BTN      = "👥 Пользователи"
+POLLS_BTN      = "📝 Опросы"
+GROUPS_BTN     = "🏷 Группы"
+STATISTICS_BTN = "📊 Статистика"
+TAKE_POLL_BTN  = "📋 Пройти опрос"
+
+# Раскладки меню (тексты кнопок — ключи реестра команд)
+MAIN_MENU = {
+    "admin":   ((USERS_BTN, POLLS_BTN), (GROUPS_BTN, STATISTICS_BTN)),
+    "teacher": ((USERS_BTN, POLLS_BTN), (GROUPS_BTN, STATISTICS_BTN), (TAKE_POLL_BTN,)),
+    None:      ((TAKE_POLL_BTN,),),
+}
+BULK_ROLE_BTN  = "📥 Роль списком"
+BULK_GROUP_BTN = "📥 Группа списком"
+USERS_MENU  = (("Просмотр пользователей", "➕ Добавить пользователя",
+                "✏️ Редактировать пользователя", "🗑 Удалить пользователя"),
+               (BULK_ROLE_BTN, BACK))
+REMIND_BTN      = "⏰ Напоминания"
+IMPORT_POLL_BTN = "📥 Импорт опроса"
+EXPORT_POLL_BTN = "📤 Экспорт опроса"
+POLLS_MENU  = (("➕ Создать опрос", "✏️ Редактировать опрос"), ("🗑 Удалить опрос", REMIND_BTN),
+               (IMPORT_POLL_BTN, EXPORT_POLL_BTN), (BACK,))
+GROUPS_MENU = (("➕ Создать группу", "🔀 Назначить группу"), (BULK_GROUP_BTN, BACK))
+
+# Кнопки постраничного выбора опроса: kind — чей выбор, act — pick | prev | next | back
+poll_cb = CallbackData("pp", "kind", "act", "id")
+
+# Просмотр пользователей: role «-» и group «0» — без фильтра, cur — id-курсор страницы
+users_cb = CallbackData("ub", "act", "role", "group", "cur")
+
+# Напоминания по опросу: act — now | every | off | back, hours — период для every
+remind_cb = CallbackData("rm", "act", "poll", "hours")
+
+# Выбор аудитории опроса
+TARGETS = {"студенты": "student", "учителя": "teacher", "все": "all"}
+
+
+def dump(markup) -> str:
+    """Сериализация так же, как это сделал бы сам aiogram."""
+    return prepare_arg(markup)
+
+
+# ——— статические ———————————————————————————————————————————————
+@lru_cache(maxsize=None)
+def reply(*rows: Sequence[str], one_time: bool = True) -> str:
+    """Reply-клавиатура из рядов кнопок, ряды — кортежи строк."""
+    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=one_time)
+    for row in rows:
+        kb.row(*row)
+    return dump(kb)
+
+
+@lru_cache(maxsize=None)
+def main_menu(role: Optional[str]) -> str:
+    return dump(commands.keyboard(MAIN_MENU.get(role, MAIN_MENU[None]), role))
+
+
+@lru_cache(maxsize=None)
+def submenu(rows: tuple, role: Optional[str]) -> str:
+    return dump(commands.keyboard(rows, role, one_time=True))
+
+
+def targets() -> str:
+    return reply(tuple(TARGETS), (BACK,))
+
+
+# ——— динамические —————————————————————————————————————————————
+class _JsonCache:
+    """LRU {ключ: (версия, json)}; запись с устаревшей версией пересобирается."""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple[int, str]]" = OrderedDict()
+
+    def get(self, key: Hashable, version: int, build: Callable[[], object]) -> str:
+        entry = self._data.get(key)
+        if entry is not None and entry[0] == version:
+            self._data.move_to_end(key)
+            return entry[1]
+        value = dump(build())
+        self._data[key] = (version, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+        return value
+
+
+_dynamic = _JsonCache(maxsize=4096)
+
+
+def choice_list(kind: str, items: Iterable[tuple[int, str]]) -> str:
+    """
+    Reply-клавиатура «по кнопке на строку + Назад» из пар (id, текст).
+    Только для содержимого опросов: ключ — id, тексты отслеживает polls_version().
+    ``kind`` разделяет списки разных сущностей с одинаковыми id.
+    """
+    items = tuple(items)
+
+    def build():
+        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
+        for _, text in items:
+            kb.row(text)
+        kb.row(BACK)
+        return kb
+    return _dynamic.get((kind,) + tuple(i for i, _ in items), polls_version(), build)
+
+
+def inline_list(kind: str, items: Iterable[tuple[int, str]], prefix: str,
+                back: Optional[str] = None) -> str:
+    """Inline-клавиатура: кнопка (текст, callback ``prefix + id``) на строку и «Назад»."""
+    items = tuple(items)
+
+    def build():
+        kb = InlineKeyboardMarkup(row_width=1)
+        for i, text in items:
+            kb.add(InlineKeyboardButton(text, callback_data=f"{prefix}{i}"))
+        if back:
+            kb.add(InlineKeyboardButton(BACK, callback_data=back))
+        return kb
+    key = (kind, prefix, back) + tuple(i for i, _ in items)
+    return _dynamic.get(key, polls_version(), build)
+
+
+def poll_page(kind: str, page: PollPage) -> str:
+    """Страница inline-выбора опроса: опрос на строку, «◀️ / ▶️» и «Назад»."""
+    def build():
+        kb = InlineKeyboardMarkup(row_width=1)
+        for p in page.items:
+            kb.add(InlineKeyboardButton(p.title, callback_data=poll_cb.new(kind, "pick", p.id)))
+        nav = []
+        if page.has_prev:
+            nav.append(InlineKeyboardButton("◀️", callback_data=poll_cb.new(kind, "prev", page.items[0].id)))
+        if page.has_next:
+            nav.append(InlineKeyboardButton("▶️", callback_data=poll_cb.new(kind, "next", page.items[-1].id)))
+        if nav:
+            kb.row(*nav)
+        kb.row(InlineKeyboardButton(BACK, callback_data=poll_cb.new(kind, "back", 0)))
+        return kb
+    key = ("page", kind, page.has_prev, page.has_next) + tuple(p.id for p in page.items)
+    return _dynamic.get(key, polls_version(), build)
+
+
+def stats_actions(poll_id: int) -> str:
+    """Кнопки под статистикой опроса: выгрузки и «Назад»."""
+    def build():
+        kb = InlineKeyboardMarkup().row(
+            InlineKeyboardButton("⬇️ Скачать CSV", callback_data=f"export_csv_{poll_id}"),
+        )
+        if "xlsx" in EXPORT_FORMATS:
+            kb.insert(InlineKeyboardButton("⬇️ Скачать XLSX", callback_data=f"export_xlsx_{poll_id}"))
+        kb.row(InlineKeyboardButton(BACK, callback_data="stat_back"))
+        return kb
+    # содержимое зависит только от id — версия не нужна
+    return _dynamic.get(("stats_actions", poll_id), 0, build)
+
+
+def users_browser(page: UserPage, role: Optional[str], group_id: Optional[int]) -> InlineKeyboardMarkup:
+    """
+    Кнопки просмотра пользователей: листание, фильтр по роли и группе, выгрузка.
+    Не кэшируется — страницы пользователей не версионируются.
+    """
+    r, g = role or "-", group_id or 0
+    kb = InlineKeyboardMarkup()
+    nav = []
+    if page.has_prev:
+        nav.append(InlineKeyboardButton("◀️", callback_data=users_cb.new("prev", r, g, page.items[0].id)))
+    if page.has_next:
+        nav.append(InlineKeyboardButton("▶️", callback_data=users_cb.new("next", r, g, page.items[-1].id)))
+    if nav:
+        kb.row(*nav)
+    kb.row(*(
+        InlineKeyboardButton(("✅ " if (x or None) == role else "") + (x or "все"),
+                             callback_data=users_cb.new("flt", x or "-", g, 0))
+        for x in ("",) + ROLES
+    ))
+    kb.row(
+        InlineKeyboardButton("🏷 Группа…", callback_data=users_cb.new("grp", r, g, 0)),
+        InlineKeyboardButton("⬇️ Скачать CSV", callback_data=users_cb.new("exp", r, g, 0)),
+    )
+    return kb
+
+
+def users_groups(groups: Iterable[tuple[int, str]], role: Optional[str]) -> InlineKeyboardMarkup:
+    """Выбор группы для фильтра просмотра (роль сохраняется)."""
+    r = role or "-"
+    kb = InlineKeyboardMarkup(row_width=2)
+    kb.add(*(InlineKeyboardButton(name, callback_data=users_cb.new("flt", r, gid, 0))
+             for gid, name in groups))
+    kb.row(InlineKeyboardButton("Все группы", callback_data=users_cb.new("flt", r, 0, 0)))
+    return kb
+
+
+def period(hours: int) -> str:
+    if hours % 168 == 0:
+        return "раз в неделю" if hours == 168 else f"раз в {hours // 168} нед."
+    if hours % 24 == 0:
+        return "раз в день" if hours == 24 else f"раз в {hours // 24} дн."
+    return f"раз в {hours} ч"
+
+
+def reminder_actions(poll_id: int, every_hours: Optional[int], scheduled: bool,
+                     intervals: Sequence[int]) -> str:
+    """Кнопки напоминаний опроса: «сейчас», периоды (текущий отмечен), выключить, назад."""
+    def build():
+        kb = InlineKeyboardMarkup(row_width=len(intervals) or 1)
+        kb.row(InlineKeyboardButton("🔔 Напомнить сейчас",
+                                    callback_data=remind_cb.new("now", poll_id, 0)))
+        kb.add(*(InlineKeyboardButton(("✅ " if h == every_hours else "") + period(h),
+                                      callback_data=remind_cb.new("every", poll_id, h))
+                 for h in intervals))
+        if scheduled:
+            kb.row(InlineKeyboardButton("🔕 Выключить", callback_data=remind_cb.new("off", poll_id, 0)))
+        kb.row(InlineKeyboardButton(BACK, callback_data=remind_cb.new("back", poll_id, 0)))
+        return kb
+    # от содержимого опросов не зависит — версия не нужна
+    return _dynamic.get(("remind", poll_id, every_hours, scheduled, tuple(intervals)), 0, build)
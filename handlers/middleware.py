@@ -0,0 +1,53 @@
+# handlers/middleware.py
+from typing import Optional
+
+from aiogram import types
+from aiogram.dispatcher.handler import ctx_data, current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from models import User
+from services import monitoring
+from services.users import get_user
+
+
+class MetricsMiddleware(BaseMiddleware):
+    """
+    Время обработки апдейта целиком (включая остальные middleware и фильтры),
+    число SQL-запросов и время в БД — с привязкой к имени сработавшего хендлера.
+    """
+
+    async def on_pre_process_update(self, update: types.Update, data: dict):
+        monitoring.begin_update()
+
+    async def on_process_message(self, message: types.Message, data: dict):
+        monitoring.set_handler(current_handler.get())
+
+    async def on_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        monitoring.set_handler(current_handler.get())
+
+    async def on_post_process_update(self, update: types.Update, results, data: dict):
+        monitoring.end_update()
+
+
+class UserMiddleware(BaseMiddleware):
+    """
+    Загружает пользователя один раз на апдейт и передаёт его
+    в хендлеры и фильтры как аргумент ``me`` (None — не зарегистрирован).
+    """
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        data["me"] = await get_user(message.from_user.id)
+
+    async def on_pre_process_callback_query(self, query: types.CallbackQuery, data: dict):
+        data["me"] = await get_user(query.from_user.id)
+
+
+async def current_user(tg_id: int) -> Optional[User]:
+    """
+    Пользователь текущего апдейта, уже найденный middleware.
+    Вне апдейта (или если middleware не сработал) — обычный поиск через кэш.
+    """
+    data = ctx_data.get(None)
+    if data is not None and "me" in data:
+        return data["me"]
+    return await get_user(tg_id)
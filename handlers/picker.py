@@ -0,0 +1,90 @@
+# handlers/picker.py
+from typing import Awaitable, Callable, Iterable, Optional
+
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.utils.exceptions import MessageNotModified
+
+from models import User
+from services import monitoring
+from services.polls import PollPage
+from . import keyboards
+from .common import BACK_BTN
+from .menu   import send_main_menu
+
+# (id пользователя, after, before) → страница
+PageLoader = Callable[[int, Optional[int], Optional[int]], Awaitable[PollPage]]
+# (callback, id опроса, state, me) — вызывается при выборе опроса
+PickHandler = Callable[[types.CallbackQuery, int, FSMContext, Optional[User]], Awaitable]
+
+
+class PollPicker:
+    """
+    Постраничный inline-выбор опроса.
+
+    Страницы грузятся keyset-ом по id (см. services.polls.get_polls_page),
+    в callback-данных кнопки — id опроса, поэтому выбор не ищет опрос по
+    названию. ``kind`` отличает один выбор от другого (take, delete, ...).
+    """
+
+    def __init__(self, kind: str, prompt: str, empty: str,
+                 load: PageLoader, on_pick: PickHandler,
+                 roles: Optional[Iterable[str]] = None,
+                 deny: str = "⛔ У вас нет прав."):
+        self.kind    = kind
+        self.prompt  = prompt
+        self.empty   = empty
+        self.load    = load
+        self.on_pick = on_pick
+        self.roles   = tuple(roles) if roles is not None else None
+        self.deny    = deny
+
+    async def show(self, message: types.Message):
+        """Отправить первую страницу."""
+        page = await self.load(message.from_user.id, None, None)
+        if not page.items:
+            return await message.answer(self.empty, reply_markup=BACK_BTN)
+        return await message.answer(self.prompt, reply_markup=keyboards.poll_page(self.kind, page))
+
+    async def _callback(self, query: types.CallbackQuery, callback_data: dict,
+                        state: FSMContext, me: Optional[User]):
+        act = callback_data["act"]
+        if act == "pick":
+            # в метриках — обработчик конкретного выбора, а не общий picker
+            monitoring.set_handler(self.on_pick)
+            await query.answer()
+            return await self.on_pick(query, int(callback_data["id"]), state, me)
+
+        if act == "back":
+            await query.answer()
+            await state.finish()
+            await query.message.delete()
+            # сообщение от бота — пользователя берём из апдейта (middleware)
+            return await send_main_menu(query.message, me)
+
+        cursor = int(callback_data["id"])
+        page = await self.load(query.from_user.id,
+                               cursor if act == "next" else None,
+                               cursor if act == "prev" else None)
+        if not page.items:
+            # страница опустела (опросы удалили) — начинаем сначала
+            page = await self.load(query.from_user.id, None, None)
+        if not page.items:
+            await query.answer(self.empty)
+            return await query.message.delete()
+        try:
+            await query.message.edit_reply_markup(keyboards.poll_page(self.kind, page))
+        except MessageNotModified:
+            pass
+        await query.answer()
+
+    async def _deny(self, query: types.CallbackQuery):
+        return await query.answer(self.deny, show_alert=True)
+
+    def register(self, dp: Dispatcher):
+        flt = keyboards.poll_cb.filter(kind=self.kind)
+        if self.roles is None:
+            dp.register_callback_query_handler(self._callback, flt, state="*")
+            return
+        dp.register_callback_query_handler(self._callback, flt, state="*", roles=self.roles)
+        dp.register_callback_query_handler(self._deny, flt, state="*")
@@ -4,17 +4,17 @@ import logging
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import State, StatesGroup
-from aiogram.types import (
-    ReplyKeyboardMarkup,
-    KeyboardButton,
-    ReplyKeyboardRemove
-)
-from sqlalchemy.future import select
-
-from database import AsyncSessionLocal
-from models import User, Poll, Question, Answer
+from aiogram.types import ReplyKeyboardRemove
 from handlers.back import return_to_main_menu
 from handlers.common import BACK, BACK_BTN
+from handlers import keyboards
+from handlers.commands import commands
+from handlers.filters import STAFF_ROLES
+from services.broadcast import publish_poll
+from services.poll_drafts import (
+    DraftError, DraftExpired, add_option, add_question, draft_questions, start_draft,
+)
+from services.poll_format import MAX_TITLE
 
 class PollCreation(StatesGroup):
     waiting_for_title          = State()
@@ -23,20 +23,17 @@ class PollCreation(StatesGroup):
     waiting_for_answer_options = State()
     waiting_for_more_questions = State()
 
-# временный буфер {tg_id: [ { "text": str, "answers": [str,...] }, ... ]}
-poll_creation_buffer: dict[int, list[dict]] = {}
+async def _draft_failed(message: types.Message, state: FSMContext, e: DraftError):
+    if isinstance(e, DraftExpired):
+        await state.finish()
+        await message.answer(str(e))
+        return await return_to_main_menu(message)
+    # остаёмся в том же шаге
+    return await message.answer(f"⛔ {e}")
 
 async def start_poll_creation(message: types.Message, state: FSMContext):
+    # права проверяет фильтр roles= при регистрации
     await state.finish()
-    tg = message.from_user.id
-
-    # проверяем права
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(
-            select(User).where(User.tg_id == tg)
-        )).scalar_one_or_none()
-    if not me or me.role not in ("admin", "teacher"):
-        return await message.answer("⛔ У вас нет прав для создания опросов.")
 
     # шаг 1: спрашиваем заголовок
     await PollCreation.waiting_for_title.set()
@@ -53,38 +50,32 @@ async def process_poll_title(message: types.Message, state: FSMContext):
         await state.finish()
         return await return_to_main_menu(message)
 
+    if len(txt) > MAX_TITLE:
+        return await message.answer(f"⛔ Заголовок длиннее {MAX_TITLE} символов.")
+
     # валидный title
     await state.update_data(title=txt)
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add(KeyboardButton("студенты"), KeyboardButton("учителя"), KeyboardButton("все"))
-    kb.add(BACK)
-
     await PollCreation.waiting_for_target.set()
-    await message.answer("Для кого предназначен опрос?", reply_markup=kb)
+    await message.answer("Для кого предназначен опрос?", reply_markup=keyboards.targets())
 
 
 async def process_poll_target(message: types.Message, state: FSMContext):
     txt = message.text.strip().lower()
-    tg = message.from_user.id
 
     # BACK?
     if txt == BACK.lower():
-        poll_creation_buffer.pop(tg, None)
         await state.finish()
         return await return_to_main_menu(message)
 
-    mapping = {"студенты": "student", "учителя": "teacher", "все": "all"}
-    if txt not in mapping:
+    if txt not in keyboards.TARGETS:
         # остаёмся в том же шаге, показываем повторно клавиатуру
-        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        kb.add(KeyboardButton("студенты"), KeyboardButton("учителя"), KeyboardButton("все"))
-        kb.add(BACK)
-        return await message.answer("⛔ Выберите вариант кнопками.", reply_markup=kb)
+        return await message.answer("⛔ Выберите вариант кнопками.", reply_markup=keyboards.targets())
 
     # принятый target
-    await state.update_data(target_role=mapping[txt])
-    poll_creation_buffer[tg] = []
+    await state.update_data(target_role=keyboards.TARGETS[txt])
+    # черновик вопросов — в данных FSM, вместе с title и target_role
+    await start_draft(state)
 
     await PollCreation.waiting_for_question_text.set()
     await message.answer("Введите текст первого вопроса:", reply_markup=ReplyKeyboardRemove())
@@ -92,19 +83,17 @@ async def process_poll_target(message: types.Message, state: FSMContext):
 
 async def process_question_text(message: types.Message, state: FSMContext):
     txt = message.text.strip()
-    tg  = message.from_user.id
 
     if txt == BACK:
-        poll_creation_buffer.pop(tg, None)
         await state.finish()
         return await return_to_main_menu(message)
 
-    buf = poll_creation_buffer.setdefault(tg, [])
-    buf.append({"text": txt, "answers": []})
+    try:
+        await add_question(state, txt)
+    except DraftError as e:
+        return await _draft_failed(message, state, e)
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add("✅ Готово", "❌ Нет вариантов")
-    kb.add(BACK)   # ← вот здесь
+    kb = keyboards.reply(("✅ Готово", "❌ Нет вариантов"), (BACK,))
 
     await PollCreation.waiting_for_answer_options.set()
     await message.answer(
@@ -117,29 +106,25 @@ async def process_question_text(message: types.Message, state: FSMContext):
 
 async def process_answer_options(message: types.Message, state: FSMContext):
     txt = message.text.strip()
-    tg  = message.from_user.id
 
     # BACK?
     if txt == BACK:
-        poll_creation_buffer.pop(tg, None)
         await state.finish()
         return await return_to_main_menu(message)
 
-    buf = poll_creation_buffer.get(tg, [])
-    last = buf[-1]
-
     # закончили сбор вариантов?
     if txt in ("✅ Готово", "❌ Нет вариантов"):
-        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        kb.add(KeyboardButton("➕ Добавить вопрос"), KeyboardButton("✅ Завершить опрос"))
-        kb.add(BACK)
+        kb = keyboards.reply(("➕ Добавить вопрос", "✅ Завершить опрос"), (BACK,))
 
         await PollCreation.waiting_for_more_questions.set()
         note = "Варианты сохранены." if txt == "✅ Готово" else "Вопрос без вариантов."
         return await message.answer(note, reply_markup=kb)
 
     # добавляем вариант
-    last["answers"].append(txt)
+    try:
+        await add_option(state, txt)
+    except DraftError as e:
+        return await _draft_failed(message, state, e)
     return await message.answer(f"Добавлен вариант: {txt}")
 
 
@@ -149,7 +134,6 @@ async def process_more_questions(message: types.Message, state: FSMContext):
 
     # BACK?
     if txt == BACK:
-        poll_creation_buffer.pop(tg, None)
         await state.finish()
         return await return_to_main_menu(message)
 
@@ -159,38 +143,24 @@ async def process_more_questions(message: types.Message, state: FSMContext):
 
     if txt == "✅ Завершить опрос":
         data = await state.get_data()
-        questions = poll_creation_buffer.get(tg, [])
+        try:
+            questions = await draft_questions(state)
+        except DraftError as e:
+            return await _draft_failed(message, state, e)
         if not questions:
             return await message.answer("⛔ Добавьте хотя бы один вопрос.")
 
-        # сохраняем всё в БД
-        async with AsyncSessionLocal() as s:
-            poll = Poll(
-                title=data["title"],
-                target_role=data["target_role"],
-                group_id=None,
-                created_by=tg
-            )
-            s.add(poll)
-            await s.commit()
-            await s.refresh(poll)
-
-            for q in questions:
-                qtype = "single_choice" if q["answers"] else "text"
-                q_obj = Question(
-                    poll_id=poll.id,
-                    question_text=q["text"],
-                    question_type=qtype
-                )
-                s.add(q_obj)
-                await s.flush()
-                for ans in q["answers"]:
-                    s.add(Answer(question_id=q_obj.id, answer_text=ans))
-            await s.commit()
-
-        poll_creation_buffer.pop(tg, None)
+        # черновик больше не нужен: при сбое ниже повтор не создаст второй опрос
         await state.finish()
-        await message.answer("✅ Опрос сохранён!", reply_markup=ReplyKeyboardRemove())
+        # опрос и уведомление аудитории (outbox, уходит в фоне) — одной транзакцией
+        _, recipients = await publish_poll(
+            title=data["title"],
+            target_role=data["target_role"],
+            created_by=tg,
+            questions=questions,
+        )
+        await message.answer(f"✅ Опрос сохранён! Уведомление получат: {recipients}.",
+                             reply_markup=ReplyKeyboardRemove())
         return await return_to_main_menu(message)
 
     # нераспознанная команда
@@ -199,11 +169,8 @@ async def process_more_questions(message: types.Message, state: FSMContext):
 
 def register_poll_creation(dp: Dispatcher):
     # старт FSM – только когда FSM ещё не в работе
-    dp.register_message_handler(
-        start_poll_creation,
-        text="➕ Создать опрос",
-        state=None
-    )
+    commands.add("➕ Создать опрос", start_poll_creation, roles=STAFF_ROLES,
+                 deny="⛔ У вас нет прав для создания опросов.")
     # затем каждый шаг FSM по своему состоянию
     dp.register_message_handler(
         process_poll_title,
@@ -1,5 +1,7 @@
 # handlers/poll_editor.py
 
+from typing import Optional
+
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import StatesGroup, State
@@ -8,13 +10,17 @@ from sqlalchemy.future import select
 from sqlalchemy import delete
 
 from database import AsyncSessionLocal
-from models import User, Poll, Question, Answer, Group
+from models import Poll, Question, Answer, Group, User
 from handlers.common import BACK, BACK_BTN
 from handlers.back import return_to_main_menu
+from handlers import keyboards
+from handlers.commands import commands
+from handlers.filters import STAFF_ROLES
+from handlers.picker import PollPicker
+from services.polls import get_poll_snapshot, get_polls_page, invalidate_poll
 
 
 class PollEditorStates(StatesGroup):
-    choosing_poll         = State()
     choosing_mode         = State()
     choosing_field        = State()
     editing_title         = State()
@@ -28,57 +34,40 @@ class PollEditorStates(StatesGroup):
     confirming_opt_delete = State()
 
 
+MODE_MENU    = (("🔤 Параметры опроса",), ("📝 Вопросы",), ("❌ Готово",), (BACK,))
+FIELDS_MENU  = (("🔤 Название",), ("👥 Аудитория",), ("🏷 Группа",), (BACK,))
+ACTIONS_MENU = (("🔤 Изменить текст",), ("➕ Добавить вариант",), ("✂️ Удалить вариант",),
+                ("❌ Готово",), (BACK,))
+
+
 # ——— Шаг 1: выбор опроса —————————————————————————————
 async def start_poll_editor(message: types.Message, state: FSMContext):
     await state.finish()
-    tg = message.from_user.id
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(
-            select(User).where(User.tg_id == tg)
-        )).scalar_one_or_none()
-        if not me or me.role not in ("admin", "teacher"):
-            return await message.answer("⛔ Только админ или преподаватель может редактировать опросы.")
-        polls = (await s.execute(select(Poll))).scalars().all()
+    await picker.show(message)
 
-    if not polls:
-        return await message.answer("🚫 Нет опросов для редактирования.", reply_markup=BACK_BTN)
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    for i, p in enumerate(polls, 1):
-        kb.add(KeyboardButton(f"{i}. {p.title}"))
-    kb.add(BACK)
-
-    await state.update_data(poll_ids=[p.id for p in polls])
-    await PollEditorStates.choosing_poll.set()
-    await message.answer("✏️ Выберите опрос для редактирования:", reply_markup=kb)
+# ——— Шаг 2: опрос выбран (id из кнопки) ———————————————————
+async def choose_poll(query: types.CallbackQuery, poll_id: int,
+                      state: FSMContext, me: Optional[User]):
+    await query.message.delete_reply_markup()
+    await state.finish()
+    await state.update_data(edit_poll_id=poll_id)
 
+    kb = keyboards.reply(*MODE_MENU)
 
-# ——— Шаг 2: подтвердить или выйти —————————————————————————
-async def choose_poll(message: types.Message, state: FSMContext):
-    txt = message.text.strip()
-    if txt == BACK:
-        await state.finish()
-        return await return_to_main_menu(message)
-
-    data = await state.get_data()
-    poll_ids = data.get("poll_ids", [])
-    idx_part = txt.split(".", 1)[0]
-    if not idx_part.isdigit():
-        return await message.answer("Пожалуйста, нажмите кнопку с номером опроса.", reply_markup=BACK_BTN)
-    idx = int(idx_part) - 1
-    if idx < 0 or idx >= len(poll_ids):
-        return await message.answer("Неверный номер опроса.", reply_markup=BACK_BTN)
-
-    await state.update_data(edit_poll_id=poll_ids[idx])
+    await PollEditorStates.choosing_mode.set()
+    await query.message.answer("Что будем править?", reply_markup=kb)
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add(KeyboardButton("🔤 Параметры опроса"))
-    kb.add(KeyboardButton("📝 Вопросы"))
-    kb.add(KeyboardButton("❌ Готово"))
-    kb.add(BACK)
 
-    await PollEditorStates.choosing_mode.set()
-    await message.answer("Что будем править?", reply_markup=kb)
+picker = PollPicker(
+    "edit",
+    prompt="✏️ Выберите опрос для редактирования:",
+    empty="🚫 Нет опросов для редактирования.",
+    load=lambda _, after, before: get_polls_page(after, before),
+    on_pick=choose_poll,
+    roles=STAFF_ROLES,
+    deny="⛔ Только админ или преподаватель может редактировать опросы.",
+)
 
 
 # ——— Шаг 3: режим редактирования —————————————————————————
@@ -89,11 +78,7 @@ async def choose_mode(message: types.Message, state: FSMContext):
         return await return_to_main_menu(message)
 
     if txt == "🔤 Параметры опроса":
-        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        kb.add(KeyboardButton("🔤 Название"))
-        kb.add(KeyboardButton("👥 Аудитория"))
-        kb.add(KeyboardButton("🏷 Группа"))
-        kb.add(BACK)
+        kb = keyboards.reply(*FIELDS_MENU)
 
         await PollEditorStates.choosing_field.set()
         return await message.answer("Что правим в параметрах?", reply_markup=kb)
@@ -120,9 +105,7 @@ async def process_field_choice(message: types.Message, state: FSMContext):
         return await message.answer("Введите новый заголовок:", reply_markup=ReplyKeyboardRemove())
 
     if txt == "👥 Аудитория":
-        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        kb.add(KeyboardButton("студенты"), KeyboardButton("учителя"), KeyboardButton("все"))
-        kb.add(BACK)
+        kb = keyboards.targets()
 
         await PollEditorStates.editing_target.set()
         return await message.answer("Выберите новую аудиторию:", reply_markup=kb)
@@ -160,6 +143,7 @@ async def process_edit_title(message: types.Message, state: FSMContext):
             .values(title=txt)
         )
         await s.commit()
+    invalidate_poll(poll_id)
 
     await message.answer("✅ Заголовок обновлён.", reply_markup=ReplyKeyboardRemove())
     return await _return_to_mode_menu(message, state)
@@ -170,7 +154,7 @@ async def process_edit_target(message: types.Message, state: FSMContext):
     if txt == BACK.lower():
         return await _return_to_mode_menu(message, state)
 
-    mapping = {"студенты": "student", "учителя": "teacher", "все": "all"}
+    mapping = keyboards.TARGETS
     if txt not in mapping:
         return await message.answer("Пожалуйста, выберите кнопками.", reply_markup=BACK_BTN)
 
@@ -183,6 +167,7 @@ async def process_edit_target(message: types.Message, state: FSMContext):
             .values(target_role=mapping[txt])
         )
         await s.commit()
+    invalidate_poll(poll_id)
 
     await message.answer("✅ Аудитория обновлена.", reply_markup=ReplyKeyboardRemove())
     return await _return_to_mode_menu(message, state)
@@ -209,6 +194,7 @@ async def process_edit_group(message: types.Message, state: FSMContext):
             .values(group_id=gid)
         )
         await s.commit()
+    invalidate_poll(poll_id)
 
     await message.answer("✅ Группа обновлена.", reply_markup=ReplyKeyboardRemove())
     return await _return_to_mode_menu(message, state)
@@ -216,17 +202,17 @@ async def process_edit_group(message: types.Message, state: FSMContext):
 
 # ——— Шаг Вопросы: выбор вопроса —————————————————————————
 async def _ask_choose_question(message: types.Message, state: FSMContext, poll_id: int):
-    async with AsyncSessionLocal() as s:
-        qs = (await s.execute(select(Question).where(Question.poll_id == poll_id))).scalars().all()
+    # вопросы — из снимка опроса (кэш), порядок по id
+    snap = await get_poll_snapshot(poll_id)
+    qs = snap.questions if snap else ()
     if not qs:
         await message.answer("У опроса нет вопросов.", reply_markup=BACK_BTN)
         return await _return_to_mode_menu(message, state)
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    for i, q in enumerate(qs, 1):
-        kb.add(KeyboardButton(f"{i}. {q.question_text}"))
-    kb.add(BACK)
+    kb = keyboards.choice_list("edit_questions",
+                               ((q.id, f"{i}. {q.text}") for i, q in enumerate(qs, 1)))
 
+    # номер кнопки → id вопроса: выбор разбирается без запроса в БД
     await state.update_data(question_ids=[q.id for q in qs])
     await PollEditorStates.choosing_question.set()
     await message.answer("📝 Выберите вопрос:", reply_markup=kb)
@@ -248,12 +234,7 @@ async def choose_question(message: types.Message, state: FSMContext):
 
     await state.update_data(edit_q_id=q_ids[idx])
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add(KeyboardButton("🔤 Изменить текст"))
-    kb.add(KeyboardButton("➕ Добавить вариант"))
-    kb.add(KeyboardButton("✂️ Удалить вариант"))
-    kb.add(KeyboardButton("❌ Готово"))
-    kb.add(BACK)
+    kb = keyboards.reply(*ACTIONS_MENU)
 
     await PollEditorStates.action_menu.set()
     await message.answer("Выберите действие с вопросом:", reply_markup=kb)
@@ -275,17 +256,17 @@ async def action_menu_handler(message: types.Message, state: FSMContext):
 
     if txt == "✂️ Удалить вариант":
         data = await state.get_data()
-        q_id = data["edit_q_id"]
-        async with AsyncSessionLocal() as s:
-            opts = (await s.execute(select(Answer).where(Answer.question_id == q_id))).scalars().all()
+        snap = await get_poll_snapshot(data["edit_poll_id"])
+        q = snap.by_id.get(data["edit_q_id"]) if snap else None
+        opts = q.options if q else ()
         if not opts:
             return await message.answer("У этого вопроса нет вариантов.", reply_markup=BACK_BTN)
 
-        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        for i, opt in enumerate(opts, 1):
-            kb.add(KeyboardButton(f"{i}. {opt.answer_text}"))
-        kb.add(BACK)
+        kb = keyboards.choice_list("edit_options",
+                                   ((o.id, f"{i}. {o.text}") for i, o in enumerate(opts, 1)))
 
+        # номер кнопки → (id, текст) варианта, как показано пользователю
+        await state.update_data(option_choices=[[o.id, o.text] for o in opts])
         await PollEditorStates.choosing_opt_to_del.set()
         return await message.answer("Выберите вариант для удаления:", reply_markup=kb)
 
@@ -308,6 +289,7 @@ async def process_editing_q_text(message: types.Message, state: FSMContext):
             .values(question_text=txt)
         )
         await s.commit()
+    invalidate_poll(data["edit_poll_id"])
 
     await message.answer("✅ Текст вопроса обновлён.", reply_markup=ReplyKeyboardRemove())
     return await _return_to_actions(message, state)
@@ -322,8 +304,16 @@ async def process_adding_option(message: types.Message, state: FSMContext):
     data = await state.get_data()
     q_id = data["edit_q_id"]
     async with AsyncSessionLocal() as s:
+        existing = (await s.execute(
+            select(Answer.answer_text).where(Answer.question_id == q_id)
+        )).scalars().all()
+        # вариант выбирают кнопкой по тексту — дубликаты неразличимы
+        if txt.casefold() in {e.strip().casefold() for e in existing}:
+            return await message.answer("⛔ Такой вариант уже есть — введите другой.",
+                                        reply_markup=BACK_BTN)
         s.add(Answer(question_id=q_id, answer_text=txt))
         await s.commit()
+    invalidate_poll(data["edit_poll_id"])
 
     await message.answer(f"✅ Вариант «{txt}» добавлен.", reply_markup=ReplyKeyboardRemove())
     return await _return_to_actions(message, state)
@@ -336,24 +326,20 @@ async def choose_option_to_delete(message: types.Message, state: FSMContext):
         return await _return_to_actions(message, state)
 
     data = await state.get_data()
-    q_id = data["edit_q_id"]
+    choices = data.get("option_choices", [])
     idx_part = txt.split(".", 1)[0]
     if not idx_part.isdigit():
         return await message.answer("Пожалуйста, выберите вариант кнопкой.", reply_markup=BACK_BTN)
     idx = int(idx_part) - 1
-
-    async with AsyncSessionLocal() as s:
-        opts = (await s.execute(select(Answer).where(Answer.question_id == q_id))).scalars().all()
-    if idx < 0 or idx >= len(opts):
+    if idx < 0 or idx >= len(choices):
         return await message.answer("Неверный выбор.", reply_markup=BACK_BTN)
 
-    await state.update_data(del_opt_id=opts[idx].id)
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add(KeyboardButton("✅ Да"), KeyboardButton("❌ Нет"))
-    kb.add(BACK)
+    opt_id, opt_text = choices[idx]
+    await state.update_data(del_opt_id=opt_id)
+    kb = keyboards.reply(("✅ Да", "❌ Нет"), (BACK,))
 
     await PollEditorStates.confirming_opt_delete.set()
-    await message.answer(f"Удалить вариант «{opts[idx].answer_text}»?", reply_markup=kb)
+    await message.answer(f"Удалить вариант «{opt_text}»?", reply_markup=kb)
 
 
 async def confirm_option_delete(message: types.Message, state: FSMContext):
@@ -367,6 +353,7 @@ async def confirm_option_delete(message: types.Message, state: FSMContext):
         async with AsyncSessionLocal() as s:
             await s.execute(delete(Answer).where(Answer.id == opt_id))
             await s.commit()
+        invalidate_poll(data["edit_poll_id"])
         await message.answer("✅ Вариант удалён.", reply_markup=ReplyKeyboardRemove())
     else:
         await message.answer("❌ Удаление отменено.", reply_markup=ReplyKeyboardRemove())
@@ -376,28 +363,20 @@ async def confirm_option_delete(message: types.Message, state: FSMContext):
 
 # ——— Вспомогательные —————————————————————————————————————
 async def _return_to_mode_menu(message: types.Message, state: FSMContext):
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add(KeyboardButton("🔤 Параметры опроса"))
-    kb.add(KeyboardButton("📝 Вопросы"))
-    kb.add(KeyboardButton("❌ Готово"))
-    kb.add(BACK)
+    kb = keyboards.reply(*MODE_MENU)
     await PollEditorStates.choosing_mode.set()
     return await message.answer("Что правим дальше?", reply_markup=kb)
 
 async def _return_to_actions(message: types.Message, state: FSMContext):
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    kb.add(KeyboardButton("🔤 Изменить текст"))
-    kb.add(KeyboardButton("➕ Добавить вариант"))
-    kb.add(KeyboardButton("✂️ Удалить вариант"))
-    kb.add(KeyboardButton("❌ Готово"))
-    kb.add(BACK)
+    kb = keyboards.reply(*ACTIONS_MENU)
     await PollEditorStates.action_menu.set()
     return await message.answer("Выберите действие с вопросом:", reply_markup=kb)
 
 
 def register_poll_editor(dp: Dispatcher):
-    dp.register_message_handler(start_poll_editor, text="✏️ Редактировать опрос", state="*")
-    dp.register_message_handler(choose_poll, state=PollEditorStates.choosing_poll)
+    commands.add("✏️ Редактировать опрос", start_poll_editor, roles=STAFF_ROLES, any_state=True,
+                 deny="⛔ Только админ или преподаватель может редактировать опросы.")
+    picker.register(dp)
     dp.register_message_handler(choose_mode, state=PollEditorStates.choosing_mode)
 
     dp.register_message_handler(process_field_choice, state=PollEditorStates.choosing_field)
@@ -0,0 +1,118 @@
+# handlers/poll_import.py
+import tempfile
+from typing import Optional
+
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.filters.state import StatesGroup, State
+from aiogram.types import ContentType, InputFile
+from aiogram.utils.markdown import quote_html
+
+from models import User
+from services.broadcast import publish_poll
+from services.poll_format import DUMPERS, MAX_FILE_SIZE, PollFormatError, parse_poll_file
+from services.polls import get_poll_snapshot, get_polls_page
+from . import keyboards
+from .back import return_to_main_menu
+from .commands import commands
+from .common import BACK, BACK_BTN
+from .filters import STAFF_ROLES
+from .picker import PollPicker
+
+ASK_FILE = (
+    "Отправьте файл опроса .csv или .json.\n\n"
+    "CSV — две колонки, вопрос и его варианты подряд:\n"
+    "<pre>kind,text\n"
+    "title,Оценка курса\n"
+    "target,all\n"
+    "question,Как вам курс?\n"
+    "option,Отлично\n"
+    "option,Плохо\n"
+    "question,Что улучшить?</pre>\n"
+    "Вопрос без option — текстовый. Пример формата — «📤 Экспорт опроса»."
+)
+
+
+# файл до этого размера держится в памяти, больше — во временном файле
+SPOOL_SIZE = 64 * 1024
+
+
+class PollImport(StatesGroup):
+    waiting_file = State()
+
+
+async def start_import(message: types.Message, state: FSMContext):
+    await state.finish()
+    await PollImport.waiting_file.set()
+    await message.answer(ASK_FILE, reply_markup=BACK_BTN)
+
+
+async def process_import_file(message: types.Message, state: FSMContext):
+    if message.text and message.text.strip() == BACK:
+        await state.finish()
+        return await return_to_main_menu(message)
+    if message.document is None:
+        return await message.answer("⛔ Нужен файл .csv или .json.", reply_markup=BACK_BTN)
+    if (message.document.file_size or 0) > MAX_FILE_SIZE:
+        return await message.answer(f"⛔ Файл больше {MAX_FILE_SIZE // 1024} КБ.",
+                                    reply_markup=BACK_BTN)
+
+    # файл качается кусками; крупный уходит из памяти на диск, CSV читается из него построчно
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_SIZE) as f:
+        await message.document.download(destination_file=f)
+        try:
+            draft = parse_poll_file(f, message.document.file_name or "")
+        except PollFormatError as e:
+            # остаёмся в шаге — можно прислать исправленный файл
+            return await message.answer(f"⛔ {quote_html(str(e))}", reply_markup=BACK_BTN)
+
+    # шаг завершён до записи: при сбое ниже повтор не создаст второй опрос
+    await state.finish()
+    # опрос и уведомление аудитории (outbox) — одной транзакцией
+    _, recipients = await publish_poll(draft.title, draft.target_role, message.from_user.id,
+                                       draft.questions)
+    await message.answer(
+        f"✅ Опрос «{quote_html(draft.title)}» импортирован: вопросов {len(draft.questions)}.\n"
+        f"Уведомление получат: {recipients}.",
+        reply_markup=BACK_BTN,
+    )
+    return await return_to_main_menu(message)
+
+
+async def start_export(message: types.Message, state: FSMContext):
+    await state.finish()
+    await picker.show(message)
+
+
+async def send_poll_files(query: types.CallbackQuery, poll_id: int,
+                          state: FSMContext, me: Optional[User]):
+    # callback уже подтверждён PollPicker-ом
+    poll = await get_poll_snapshot(poll_id)
+    if not poll:
+        return await query.message.answer("❌ Опрос не найден.", reply_markup=BACK_BTN)
+    await query.message.delete_reply_markup()
+    for fmt, dump in DUMPERS.items():
+        await query.message.answer_document(InputFile(dump(poll), f"poll_{poll.id}.{fmt}"))
+    await query.message.answer(
+        "Файлы можно поправить и загрузить через «📥 Импорт опроса» — получится новый опрос.",
+        reply_markup=BACK_BTN,
+    )
+
+
+picker = PollPicker(
+    "dump",
+    prompt="📤 Выберите опрос для выгрузки:",
+    empty="🚫 Нет опросов.",
+    load=lambda _, after, before: get_polls_page(after, before),
+    on_pick=send_poll_files,
+    roles=STAFF_ROLES,
+)
+
+
+def register_poll_import(dp: Dispatcher):
+    commands.add(keyboards.IMPORT_POLL_BTN, start_import, roles=STAFF_ROLES,
+                 deny="⛔ У вас нет прав для создания опросов.")
+    commands.add(keyboards.EXPORT_POLL_BTN, start_export, roles=STAFF_ROLES)
+    picker.register(dp)
+    dp.register_message_handler(process_import_file, state=PollImport.waiting_file,
+                                content_types=[ContentType.TEXT, ContentType.DOCUMENT])
@@ -1,94 +1,84 @@
 # handlers/poll_management.py
 
+from typing import Optional
+
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
-from aiogram.dispatcher.filters.state import State, StatesGroup
 
-from sqlalchemy import delete
+from sqlalchemy import and_, delete, or_
 from sqlalchemy.future import select
 
 from database import AsyncSessionLocal
-from models import Poll, PollCompletion
-from .common import BACK
-from .back import return_to_main_menu
-
-class PollDeleteStates(StatesGroup):
-    choosing_poll = State()
+from models import Notification, Poll, PollCompletion, ReminderRun, ReminderSchedule, User
+from services.polls import get_polls_page, invalidate_poll
+from .commands import commands
+from .common import BACK_BTN
+from .filters import STAFF_ROLES
+from .menu import send_main_menu
+from .picker import PollPicker
 
 async def start_delete_poll(message: types.Message, state: FSMContext):
     """
-    Шаг 1: вывести список опросов для удаления.
+    Шаг 1: вывести список опросов для удаления (постранично, inline).
     """
     await state.finish()
-    # Получаем все опросы
-    async with AsyncSessionLocal() as s:
-        polls = (await s.execute(select(Poll))).scalars().all()
-
-    if not polls:
-        # Нет опросов — сразу в главное меню
-        return await return_to_main_menu(message)
-
-    # Строим клавиатуру с названиями опросов + «Назад»
-    kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    for p in polls:
-        kb.add(p.title)
-    kb.add(BACK)
+    await picker.show(message)
 
-    await PollDeleteStates.choosing_poll.set()
-    await message.answer(
-        "🗑 Выберите опрос для удаления:",
-        reply_markup=kb
-    )
-
-async def process_delete_poll(message: types.Message, state: FSMContext):
+async def process_delete_poll(query: types.CallbackQuery, poll_id: int,
+                              state: FSMContext, me: Optional[User]):
     """
     Шаг 2: обработать выбор и удалить опрос + связанные PollCompletion.
     """
-    text = message.text.strip()
-
-    # Если нажали «Назад» — завершаем FSM и возвращаем главное меню
-    if text == BACK:
-        await state.finish()
-        return await return_to_main_menu(message)
+    message = query.message
+    await message.delete_reply_markup()
 
-    # Ищем опрос по названию
     async with AsyncSessionLocal() as s:
-        poll = (await s.execute(
-            select(Poll).where(Poll.title == text)
-        )).scalar_one_or_none()
+        poll = await s.get(Poll, poll_id)
 
         if not poll:
-            # Если не нашли — остаёмся в том же состоянии
-            kb = types.ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-            kb.add(BACK)
-            return await message.answer(
-                "❌ Опрос не найден. Попробуйте ещё раз или нажмите «🔙 Назад».",
-                reply_markup=kb
-            )
+            # Опрос уже удалён (кнопка устарела)
+            return await message.answer("❌ Опрос не найден.", reply_markup=BACK_BTN)
 
+        title = poll.title
         # Удаляем все записи о прохождении опроса
         await s.execute(
             delete(PollCompletion).where(PollCompletion.poll_id == poll.id)
         )
+        # и его расписание напоминаний
+        await s.execute(
+            delete(ReminderSchedule).where(ReminderSchedule.poll_id == poll.id)
+        )
+        # и ещё не отправленные уведомления о нём (о публикации и напоминания)
+        runs = select(ReminderRun.id).where(ReminderRun.poll_id == poll.id)
+        await s.execute(
+            delete(Notification).where(
+                Notification.status == "pending",
+                or_(and_(Notification.kind == "poll_published", Notification.ref_id == poll.id),
+                    and_(Notification.kind == "reminder", Notification.ref_id.in_(runs))),
+            )
+        )
         # Удаляем сам опрос (вопросы/ответы через cascade в модели)
         await s.delete(poll)
         await s.commit()
+    invalidate_poll(poll_id)
 
     # Завершаем FSM и возвращаем в главное меню с подтверждением
     await state.finish()
     await message.answer(
-        f"✅ Опрос «{text}» успешно удалён.",
+        f"✅ Опрос «{title}» успешно удалён.",
         reply_markup=types.ReplyKeyboardRemove()
     )
-    return await return_to_main_menu(message)
+    return await send_main_menu(message, me)
+
+picker = PollPicker(
+    "delete",
+    prompt="🗑 Выберите опрос для удаления:",
+    empty="🚫 Нет опросов для удаления.",
+    load=lambda _, after, before: get_polls_page(after, before),
+    on_pick=process_delete_poll,
+    roles=STAFF_ROLES,
+)
 
 def register_poll_management(dp: Dispatcher):
-    dp.register_message_handler(
-        start_delete_poll,
-        text="🗑 Удалить опрос",
-        state=None
-    )
-    dp.register_message_handler(
-        process_delete_poll,
-        state=PollDeleteStates.choosing_poll
-    )
+    commands.add("🗑 Удалить опрос", start_delete_poll, roles=STAFF_ROLES)
+    picker.register(dp)
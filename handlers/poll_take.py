@@ -1,121 +1,87 @@
 # handlers/poll_take.py
+from typing import Optional
 
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import StatesGroup, State
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove
-from models import PollCompletion
-from sqlalchemy.future import select
-
-from database import AsyncSessionLocal
-from models import Poll, Question, Answer, Response, User
+from aiogram.types import ReplyKeyboardRemove
+
+from models import User
+from services.polls import (
+    QuestionSnapshot, get_poll_snapshot, get_available_polls, get_available_page,
+    invalidate_available,
+)
+from services.response_writer import ResponsesRejected, response_writer
+from . import keyboards
+from .commands import commands
 from .common import BACK, BACK_BTN
 from .back   import return_to_main_menu
+from .picker import PollPicker
 
 class PollTakeStates(StatesGroup):
-    choosing_poll = State()
     answering     = State()
 
-async def start_take_poll(message: types.Message, state: FSMContext):
+async def start_take_poll(message: types.Message, state: FSMContext, me: Optional[User]):
     await state.finish()
-    tg = message.from_user.id
-
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(
-            select(User).where(User.tg_id == tg)
-        )).scalar_one_or_none()
-
-        if not me:
-            return await message.answer("⛔ Вы не зарегистрированы.", reply_markup=BACK_BTN)
-
-        role = me.role
-
-        completed = (await s.execute(
-            select(PollCompletion.poll_id)
-            .where(PollCompletion.user_id == tg)
-        )).scalars().all()
-
-        polls = (await s.execute(
-            select(Poll)
-            .where(
-                Poll.target_role.in_([role, "all"]),
-                ~Poll.id.in_(completed)
-            )
-        )).scalars().all()
 
-    if not polls:
-        return await message.answer("🚫 Нет доступных опросов.", reply_markup=BACK_BTN)
+    if not me:
+        return await message.answer("⛔ Вы не зарегистрированы.", reply_markup=BACK_BTN)
 
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-    for p in polls:
-        kb.add(p.title)
-    kb.add(BACK)
+    # роль, группа и уже пройденные — одним запросом (и кэш на пользователя)
+    await picker.show(message)
 
-    await PollTakeStates.choosing_poll.set()
-    await message.answer("Выберите опрос для прохождения:", reply_markup=kb)
-
-async def process_poll_choice(message: types.Message, state: FSMContext):
+async def process_poll_choice(query: types.CallbackQuery, poll_id: int,
+                              state: FSMContext, me: Optional[User]):
     """
-    Шаг 2: получили название опроса → готовим список вопросов и отправляем первый.
+    Шаг 2: выбран опрос (id из кнопки) → готовим список вопросов и отправляем первый.
     """
-    txt = message.text.strip()
-    if txt == BACK:
-        await state.finish()
-        return await return_to_main_menu(message)
+    message = query.message
+    await message.delete_reply_markup()
 
-    # Находим опрос
-    async with AsyncSessionLocal() as s:
-        poll = (await s.execute(
-            select(Poll).where(Poll.title == txt)
-        )).scalar_one_or_none()
-    if not poll:
-        return await message.answer("❌ Опрос не найден.", reply_markup=BACK_BTN)
-
-    # Загружаем все вопросы
-    async with AsyncSessionLocal() as s:
-        qs = (await s.execute(
-            select(Question).where(Question.poll_id == poll.id)
-        )).scalars().all()
-    if not qs:
+    # Опрос должен быть среди доступных пользователю (кнопка могла устареть)
+    polls = await get_available_polls(query.from_user.id)
+    if not any(p.id == poll_id for p in polls):
+        return await message.answer("❌ Опрос недоступен.", reply_markup=BACK_BTN)
+
+    # Весь опрос (вопросы + варианты) одним снимком; дальше ответы не читают БД
+    snap = await get_poll_snapshot(poll_id)
+    if not snap or not snap.questions:
         return await message.answer("🚫 В этом опросе нет вопросов.", reply_markup=BACK_BTN)
 
     # Сохраняем в FSM: id опроса, список id вопросов и начальный индекс
     await state.update_data(
-        poll_id=poll.id,
-        question_ids=[q.id for q in qs],
+        poll_id=snap.id,
+        question_ids=[q.id for q in snap.questions],
         index=0
     )
 
     # Спрашиваем первый вопрос
-    await _send_current_question(message, state)
-
-async def _send_current_question(message: types.Message, state: FSMContext):
-    data = await state.get_data()
-    idx = data["index"]
-    q_id = data["question_ids"][idx]
+    await _send_question(message, snap.questions[0])
 
-    # Достаём вопрос
-    async with AsyncSessionLocal() as s:
-        q = (await s.execute(
-            select(Question).where(Question.id == q_id)
-        )).scalar_one()
+picker = PollPicker(
+    "take",
+    prompt="Выберите опрос для прохождения:",
+    empty="🚫 Нет доступных опросов.",
+    load=get_available_page,
+    on_pick=process_poll_choice,
+)
 
+async def _send_question(message: types.Message, q: QuestionSnapshot):
     # Если вариантный
-    if q.question_type == "single_choice":
-        async with AsyncSessionLocal() as s:
-            opts = (await s.execute(
-                select(Answer).where(Answer.question_id == q_id)
-            )).scalars().all()
-        kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
-        for o in opts:
-            kb.add(o.answer_text)
-        kb.add(BACK)
+    if q.type == "single_choice":
+        kb = keyboards.choice_list("options", ((o.id, o.text) for o in q.options))
         await PollTakeStates.answering.set()
-        await message.answer(q.question_text, reply_markup=kb)
+        await message.answer(q.text, reply_markup=kb)
     else:
         # Текстовый ответ
         await PollTakeStates.answering.set()
-        await message.answer(q.question_text, reply_markup=ReplyKeyboardRemove())
+        await message.answer(q.text, reply_markup=ReplyKeyboardRemove())
+
+async def _poll_changed(message: types.Message, state: FSMContext):
+    await state.finish()
+    await message.answer("❌ Опрос изменён или удалён. Начните прохождение заново.",
+                         reply_markup=BACK_BTN)
+    return await return_to_main_menu(message)
 
 async def process_answer(message: types.Message, state: FSMContext):
     """
@@ -132,63 +98,58 @@ async def process_answer(message: types.Message, state: FSMContext):
         await state.finish()
         return await return_to_main_menu(message)
 
-    # Получаем сам вопрос
-    async with AsyncSessionLocal() as s:
-        q = (await s.execute(
-            select(Question).where(Question.id == q_id)
-        )).scalar_one()
+    # Вопрос берём из снимка опроса
+    snap = await get_poll_snapshot(data["poll_id"])
+    q = snap.by_id.get(q_id) if snap else None
+    if q is None:
+        return await _poll_changed(message, state)
 
     # Определяем, какой ответ сохранять
     answer_id    = None
     response_txt = None
-    if q.question_type == "single_choice":
-        # Находим объект Answer по тексту
-        async with AsyncSessionLocal() as s:
-            a = (await s.execute(
-                select(Answer)
-                .where(Answer.question_id == q_id)
-                .where(Answer.answer_text  == txt)
-            )).scalar_one_or_none()
-        if not a:
+    if q.type == "single_choice":
+        # id варианта по тексту кнопки
+        answer_id = q.option_ids.get(txt)
+        if answer_id is None:
             return await message.answer("❌ Используйте кнопки.", reply_markup=BACK_BTN)
-        answer_id = a.id
     else:
         response_txt = txt
 
-    # Записываем в таблицу responses
-    async with AsyncSessionLocal() as s:
-        s.add(Response(
-            user_id        = tg,
-            question_id    = q_id,
-            answer_id      = answer_id,
-            response_text  = response_txt
-        ))
-        await s.commit()
+    # Ответ уходит в буфер и пишется в responses пачкой вместе с другими
+    response_writer.add_response(
+        user_id        = tg,
+        question_id    = q_id,
+        answer_id      = answer_id,
+        response_text  = response_txt
+    )
 
     # Переходим к следующему вопросу
     idx += 1
     if idx >= len(data["question_ids"]):
-        # Отмечаем прохождение опроса
-        async with AsyncSessionLocal() as s:
-            s.add(PollCompletion(user_id=tg, poll_id=data["poll_id"]))
-            await s.commit()
+        # Отмечаем прохождение опроса и ждём, пока всё будет записано
         await state.finish()
+        try:
+            await response_writer.complete(tg, data["poll_id"])
+        except ResponsesRejected:
+            # вопрос или вариант удалили, пока опрос проходили — прохождение не отмечено
+            invalidate_available(tg)
+            await message.answer("⚠️ Опрос изменился, пока вы его проходили, — ответы "
+                                 "сохранились не полностью. Пройдите его заново.",
+                                 reply_markup=BACK_BTN)
+            return await return_to_main_menu(message)
+        invalidate_available(tg)
         await message.answer("✅ Вы завершили опрос!", reply_markup=BACK_BTN)
         return await return_to_main_menu(message)
 
+    next_q = snap.by_id.get(data["question_ids"][idx])
+    if next_q is None:
+        return await _poll_changed(message, state)
     await state.update_data(index=idx)
-    return await _send_current_question(message, state)
+    return await _send_question(message, next_q)
 
 def register_poll_take(dp: Dispatcher):
-    dp.register_message_handler(
-        start_take_poll,
-        text="📋 Пройти опрос",
-        state=None
-    )
-    dp.register_message_handler(
-        process_poll_choice,
-        state=PollTakeStates.choosing_poll
-    )
+    commands.add("📋 Пройти опрос", start_take_poll)
+    picker.register(dp)
     dp.register_message_handler(
         process_answer,
         state=PollTakeStates.answering
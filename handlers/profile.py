@@ -5,6 +5,7 @@ from sqlalchemy.future import select
 
 from database import AsyncSessionLocal
 from models import User, Group
+from services.users import invalidate_users
 from .common import BACK, BACK_BTN
 from .back   import return_to_main_menu
 
@@ -70,6 +71,7 @@ async def process_group(message: types.Message, state: FSMContext):
         )).scalar_one_or_none()
         if grp: u.group_id = grp.id
         await s.commit()
+    invalidate_users([message.from_user.id])
     await state.finish()
     await message.answer("✅ Профиль сохранён.", reply_markup=BACK_BTN)
     return await return_to_main_menu(message)
@@ -0,0 +1,111 @@
+# handlers/reminders.py
+from typing import Optional
+
+from aiogram import types, Dispatcher
+from aiogram.dispatcher import FSMContext
+from aiogram.utils.exceptions import MessageNotModified
+from aiogram.utils.markdown import quote_html
+
+from config import load_config
+from models import User
+from services.polls import get_poll_snapshot, get_polls_page
+from services.reminders import cancel_reminders, get_reminder_info, remind_now, schedule_reminders
+from . import keyboards
+from .commands import commands
+from .common import BACK_BTN
+from .filters import STAFF_ROLES
+from .menu import send_main_menu
+from .picker import PollPicker
+
+cfg = load_config()
+
+
+async def start_reminders(message: types.Message, state: FSMContext):
+    await state.finish()
+    await picker.show(message)
+
+
+async def _render(poll_id: int) -> Optional[tuple[str, str]]:
+    poll = await get_poll_snapshot(poll_id)
+    if not poll:
+        return None
+    info = await get_reminder_info(poll_id)
+    if info.next_run_at is None:
+        plan = "не запланировано"
+    else:
+        every = keyboards.period(info.every_hours) if info.every_hours else "один раз"
+        plan  = f"{every}, ближайшее — {info.next_run_at.astimezone():%d.%m %H:%M}"
+    text = (f"⏰ Напоминания «{quote_html(poll.title)}»\n\n"
+            f"Ещё не прошли: <b>{info.pending}</b>\n"
+            f"Напоминание: {plan}")
+    kb = keyboards.reminder_actions(poll_id, info.every_hours, info.next_run_at is not None,
+                                    cfg.REMINDER_INTERVALS)
+    return text, kb
+
+
+async def show_reminders(query: types.CallbackQuery, poll_id: int,
+                         state: FSMContext, me: Optional[User]):
+    # callback уже подтверждён PollPicker-ом
+    await state.finish()
+    rendered = await _render(poll_id)
+    if not rendered:
+        return await query.message.answer("❌ Опрос не найден.", reply_markup=BACK_BTN)
+    text, kb = rendered
+    await query.message.edit_text(text, reply_markup=kb)
+
+
+async def reminders_callback(query: types.CallbackQuery, callback_data: dict,
+                             state: FSMContext, me: User):
+    act, poll_id = callback_data["act"], int(callback_data["poll"])
+    if act == "back":
+        await query.answer()
+        await state.finish()
+        await query.message.delete()
+        return await send_main_menu(query.message, me)
+
+    if await get_poll_snapshot(poll_id) is None:
+        # опрос удалили, пока сообщение висело
+        await query.answer("❌ Опрос не найден.")
+        return await query.message.delete()
+
+    if act == "now":
+        await remind_now(poll_id, me.tg_id)
+        note = "🔔 Напоминание будет отправлено в ближайшие минуты."
+    elif act == "every":
+        hours = int(callback_data["hours"])
+        if hours not in cfg.REMINDER_INTERVALS:
+            return await query.answer("❌ Период недоступен.")
+        await schedule_reminders(poll_id, me.tg_id, hours)
+        note = f"✅ Напоминания: {keyboards.period(hours)}"
+    else:
+        await cancel_reminders(poll_id)
+        note = "🔕 Напоминания выключены."
+
+    text, kb = await _render(poll_id)
+    try:
+        await query.message.edit_text(text, reply_markup=kb)
+    except MessageNotModified:
+        pass
+    await query.answer(note)
+
+
+async def _deny(query: types.CallbackQuery):
+    return await query.answer("⛔ У вас нет прав.", show_alert=True)
+
+
+picker = PollPicker(
+    "remind",
+    prompt="⏰ Выберите опрос:",
+    empty="🚫 Нет опросов.",
+    load=lambda _, after, before: get_polls_page(after, before),
+    on_pick=show_reminders,
+    roles=STAFF_ROLES,
+)
+
+
+def register_reminders(dp: Dispatcher):
+    commands.add(keyboards.REMIND_BTN, start_reminders, roles=STAFF_ROLES)
+    picker.register(dp)
+    flt = keyboards.remind_cb.filter()
+    dp.register_callback_query_handler(reminders_callback, flt, state="*", roles=STAFF_ROLES)
+    dp.register_callback_query_handler(_deny, flt, state="*")
@@ -1,42 +1,90 @@
+from typing import Optional
+
 from aiogram import types, Dispatcher
 from aiogram.dispatcher import FSMContext
 from aiogram.dispatcher.filters.state import StatesGroup, State
-from aiogram.types import ReplyKeyboardMarkup, ReplyKeyboardRemove, KeyboardButton
+from aiogram.types import InputFile, ReplyKeyboardRemove
+from aiogram.utils.exceptions import MessageNotModified
+from aiogram.utils.markdown import quote_html
 
 from sqlalchemy.future import select
 from sqlalchemy import update, insert
 
 from database import AsyncSessionLocal
-from models import User
+from models import Group, User
+from services.users import UserPage, export_users, get_users_page, invalidate_users, upsert_users
 from .common import BACK, BACK_BTN
 from .back import return_to_main_menu
+from . import keyboards
+from .commands import commands
+from .filters import STAFF_ROLES
 from config import load_config
 
 class UserMgmtStates(StatesGroup):
     waiting_for_id   = State()
     waiting_for_role = State()
 
+# ───── Просмотр пользователей ─────────────────────────────────────
+
+# inline-клавиатура — не больше 100 кнопок
+_MAX_GROUP_BUTTONS = 60
+
+
+def _render_users(page: UserPage, role: Optional[str], group_id: Optional[int]) -> str:
+    group = "все"
+    if group_id is not None:
+        group = quote_html(page.items[0].group_name) if page.items else f"#{group_id}"
+    lines = [f"👥 Пользователи — роль: {role or 'все'}, группа: {group}\n"]
+    lines += [
+        f"{u.tg_id}: {quote_html(u.surname or '-')} {quote_html(u.name or '-')} ({u.role}"
+        + (f", {quote_html(u.group_name)}" if u.group_name else "") + ")"
+        for u in page.items
+    ]
+    if not page.items:
+        lines.append("🚫 Нет пользователей.")
+    return "\n".join(lines)
+
+
 async def cmd_view_users(message: types.Message):
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(
-            select(User).where(User.tg_id==message.from_user.id)
-        )).scalar_one_or_none()
-        if not me or me.role not in ("admin","teacher"):
-            return await message.answer("⛔ У вас нет прав.")
-        users = (await s.execute(select(User))).scalars().all()
-    text = "\n".join(
-        f"{u.tg_id}: {u.surname or '-'} {u.name or '-'} ({u.role})"
-        for u in users
-    ) or "🚫 Нет пользователей."
-    await message.answer(text, reply_markup=BACK_BTN)
-
-async def start_add_user(message: types.Message, state: FSMContext):
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(
-            select(User).where(User.tg_id==message.from_user.id)
-        )).scalar_one_or_none()
-    if not me or me.role not in ("admin","teacher"):
-        return await message.answer("⛔ У вас нет прав.")
+    page = await get_users_page()
+    await message.answer(_render_users(page, None, None),
+                         reply_markup=keyboards.users_browser(page, None, None))
+
+
+async def users_browser_callback(query: types.CallbackQuery, callback_data: dict):
+    act      = callback_data["act"]
+    role     = None if callback_data["role"] == "-" else callback_data["role"]
+    group_id = int(callback_data["group"]) or None
+    cursor   = int(callback_data["cur"])
+
+    if act == "grp":
+        async with AsyncSessionLocal() as s:
+            groups = (await s.execute(
+                select(Group.id, Group.name).order_by(Group.name).limit(_MAX_GROUP_BUTTONS)
+            )).all()
+        await query.message.edit_reply_markup(keyboards.users_groups(groups, role))
+        return await query.answer()
+
+    if act == "exp":
+        await query.answer("⏳ Готовлю файл…")
+        fileobj, filename = await export_users("csv", role, group_id)
+        try:
+            return await query.message.answer_document(InputFile(fileobj, filename))
+        finally:
+            fileobj.close()
+
+    page = await get_users_page(role, group_id,
+                                after=cursor if act == "next" else None,
+                                before=cursor if act == "prev" else None)
+    try:
+        await query.message.edit_text(_render_users(page, role, group_id),
+                                      reply_markup=keyboards.users_browser(page, role, group_id))
+    except MessageNotModified:
+        pass
+    await query.answer()
+
+
+async def start_add_user(message: types.Message, state: FSMContext, me: User):
     await state.update_data(initiator=me.role)
     await UserMgmtStates.waiting_for_id.set()
     await message.answer("Введите Telegram ID пользователя:", reply_markup=ReplyKeyboardRemove())
@@ -50,10 +98,10 @@ async def process_user_id(message: types.Message, state: FSMContext):
         return await message.answer("⛔ Введите числовой ID.")
     await state.update_data(new_id=int(txt))
     initiator = (await state.get_data())["initiator"]
-    kb = ReplyKeyboardMarkup(resize_keyboard=True, one_time_keyboard=True)
     if initiator=="admin":
-        kb.add("admin")
-    kb.add("teacher","student").add(BACK)
+        kb = keyboards.reply(("admin",), ("teacher","student"), (BACK,))
+    else:
+        kb = keyboards.reply(("teacher","student"), (BACK,))
     await UserMgmtStates.waiting_for_role.set()
     await message.answer("Выберите роль для пользователя:", reply_markup=kb)
 
@@ -78,44 +126,31 @@ async def process_user_role(message: types.Message, state: FSMContext):
             ))
             msg = f"✅ Пользователь {new_id} добавлен с ролью «{txt}»."
         await s.commit()
+    invalidate_users([new_id])
     await state.finish()
     await message.answer(msg, reply_markup=BACK_BTN)
     return await return_to_main_menu(message)
 
 async def add_users_to_db():
-    """Seed ADMIN_IDS, TEACHER_IDS, STUDENT_IDS из config."""
+    """Seed ADMIN_IDS, TEACHER_IDS, STUDENT_IDS из config (один upsert на всех)."""
     cfg = load_config()
-    async with AsyncSessionLocal() as s:
-        for tg in cfg.ADMIN_IDS:
-            ex = (await s.execute(select(User).where(User.tg_id==tg))).scalar_one_or_none()
-            if ex:
-                await s.execute(update(User).where(User.tg_id==tg).values(role="admin"))
-            else:
-                s.add(User(tg_id=tg, role="admin"))
-        for tg in cfg.TEACHER_IDS:
-            ex = (await s.execute(select(User).where(User.tg_id==tg))).scalar_one_or_none()
-            if ex:
-                await s.execute(update(User).where(User.tg_id==tg).values(role="teacher"))
-            else:
-                s.add(User(tg_id=tg, role="teacher"))
-        for tg in cfg.STUDENT_IDS:
-            ex = (await s.execute(select(User).where(User.tg_id==tg))).scalar_one_or_none()
-            if ex:
-                await s.execute(update(User).where(User.tg_id==tg).values(role="student"))
-            else:
-                s.add(User(tg_id=tg, role="student"))
-        await s.commit()
+    # порядок как раньше: если ID указан в нескольких списках, побеждает последний
+    await upsert_users(
+        [{"tg_id": tg, "role": "admin"}   for tg in cfg.ADMIN_IDS]
+        + [{"tg_id": tg, "role": "teacher"} for tg in cfg.TEACHER_IDS]
+        + [{"tg_id": tg, "role": "student"} for tg in cfg.STUDENT_IDS]
+    )
 
 def register_user_management(dp: Dispatcher):
-    dp.register_message_handler(start_delete_user,
-                                text="🗑 Удалить пользователя", state=None)
+    commands.add("🗑 Удалить пользователя", start_delete_user, roles=STAFF_ROLES)
+    commands.add("Просмотр пользователей", cmd_view_users, roles=STAFF_ROLES)
+    dp.register_callback_query_handler(users_browser_callback,
+                                       keyboards.users_cb.filter(),
+                                       roles=STAFF_ROLES, state="*")
+    commands.add("➕ Добавить пользователя", start_add_user, roles=STAFF_ROLES)
+    commands.add("✏️ Редактировать пользователя", start_add_user, roles=STAFF_ROLES)
     dp.register_message_handler(process_user_deletion,
                                 state="waiting_for_deletion")
-    dp.register_message_handler(cmd_view_users,
-                                text="Просмотр пользователей", state=None)
-    dp.register_message_handler(start_add_user,
-                                text=["➕ Добавить пользователя","✏️ Редактировать пользователя"],
-                                state=None)
     dp.register_message_handler(process_user_id,
                                 state=UserMgmtStates.waiting_for_id)
     dp.register_message_handler(process_user_role,
@@ -123,24 +158,12 @@ def register_user_management(dp: Dispatcher):
 # ───── Удаление пользователей ─────────────────────────────────────
 
 async def start_delete_user(message: types.Message, state: FSMContext):
-    tg = message.from_user.id
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(select(User).where(User.tg_id == tg))).scalar_one_or_none()
-    if not me or me.role not in ("admin", "teacher"):
-        return await message.answer("⛔ У вас нет прав.")
-
     await message.answer("Введите Telegram ID пользователя для удаления:", reply_markup=BACK_BTN)
     await state.set_state("waiting_for_deletion")
 
 # ─── Удаление пользователей ─────────────────────────────────────
 
 async def start_delete_user(message: types.Message, state: FSMContext):
-    tg = message.from_user.id
-    async with AsyncSessionLocal() as s:
-        me = (await s.execute(select(User).where(User.tg_id == tg))).scalar_one_or_none()
-    if not me or me.role not in ("admin", "teacher"):
-        return await message.answer("⛔ У вас нет прав.")
-
     await message.answer("Введите Telegram ID пользователя для удаления:", reply_markup=BACK_BTN)
     await state.set_state("waiting_for_deletion")
 
@@ -160,6 +183,7 @@ async def process_user_deletion(message: types.Message, state: FSMContext):
             return await message.answer(f"🚫 Пользователь {del_id} не найден.", reply_markup=BACK_BTN)
         await s.delete(user)
         await s.commit()
+    invalidate_users([del_id])
 
     await state.finish()
     await message.answer(f"✅ Пользователь {del_id} удалён.", reply_markup=BACK_BTN)
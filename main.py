@@ -1,23 +1,30 @@
 import logging
 from aiogram import Bot, Dispatcher, types
-from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from aiogram.utils import executor
 
 from config import load_config
-from database import init_db
-from handlers import register_handlers
+from database import engine, init_db
+from handlers import register_middlewares, register_handlers
 
 # сидеры
 from handlers.user_management import add_users_to_db
 from handlers.group_management import seed_groups
+from services.broadcast import broadcaster
+from services.fsm_storage import build_storage
+from services.monitoring import install_db_hooks, start_monitoring, stop_monitoring
+from services.poll_drafts import start_draft_sweeper, stop_draft_sweeper
+from services.reminders import reminder_scheduler
+from services.response_writer import response_writer
 
 logging.basicConfig(level=logging.INFO)
 config = load_config()
 
 bot = Bot(token=config.BOT_TOKEN, parse_mode=types.ParseMode.HTML)
-dp  = Dispatcher(bot, storage=MemoryStorage())
+dp  = Dispatcher(bot, storage=build_storage(config))
 
 # Регистрируем все хендлеры
+install_db_hooks(engine)
+register_middlewares(dp)
 register_handlers(dp)
 
 async def on_startup(_):
@@ -26,7 +33,29 @@ async def on_startup(_):
     # seed-группы и seed-пользователей
     await seed_groups()
     await add_users_to_db()
+    await start_monitoring(config)
+    # рассылка: дошлёт и то, что осталось в outbox с прошлого запуска
+    broadcaster.start(bot)
+    # напоминания: курсор расписаний в БД, пропущенное при простое не дублируется
+    reminder_scheduler.start()
+    # брошенные черновики опросов и их метрики
+    start_draft_sweeper(dp.storage)
     logging.info("✅ on_startup completed")
 
+async def on_shutdown(_):
+    await reminder_scheduler.close()
+    await stop_draft_sweeper()
+    # неотправленное остаётся в outbox до следующего запуска
+    await broadcaster.close()
+    # дописываем в БД ответы, которые ещё в буфере
+    await response_writer.close()
+    # итоговая сводка по хендлерам и кэшам
+    await stop_monitoring()
+
 if __name__ == "__main__":
-    executor.start_polling(dp, skip_updates=False, on_startup=on_startup)
+    if config.BOT_MODE == "webhook":
+        from webhook import start_webhook
+        start_webhook(dp, config, on_startup=on_startup, on_shutdown=on_shutdown)
+    else:
+        executor.start_polling(dp, skip_updates=False,
+                               on_startup=on_startup, on_shutdown=on_shutdown)
@@ -1,11 +1,17 @@
 # models.py
 
-from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Text
+from sqlalchemy import Column, Integer, BigInteger, String, ForeignKey, Text, DateTime, Index, func, text
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
 from database import Base
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # просмотр пользователей: фильтр по роли/группе + keyset по id
+        Index("ix_users_role_id", "role", "id"),
+        Index("ix_users_group_id_id", "group_id", "id"),
+    )
     id           = Column(Integer, primary_key=True, index=True)
     tg_id        = Column(BigInteger, unique=True, nullable=False, index=True)
     role         = Column(String, nullable=False)            # "admin", "teacher", "student"
@@ -45,7 +51,7 @@ class Poll(Base):
 class Question(Base):
     __tablename__ = "questions"
     id             = Column(Integer, primary_key=True, index=True)
-    poll_id        = Column(Integer, ForeignKey("polls.id"), nullable=False)
+    poll_id        = Column(Integer, ForeignKey("polls.id"), nullable=False, index=True)
     question_text  = Column(Text, nullable=False)
     question_type  = Column(String, nullable=False)         # "text" или "single_choice"
 
@@ -58,7 +64,7 @@ class Question(Base):
 class Answer(Base):
     __tablename__ = "answers"
     id            = Column(Integer, primary_key=True, index=True)
-    question_id   = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    question_id   = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
     answer_text   = Column(Text, nullable=False)
 
     # Связи
@@ -68,6 +74,13 @@ class Answer(Base):
 
 class Response(Base):
     __tablename__ = "responses"
+    __table_args__ = (
+        # статистика: ответы по вопросу / подсчёт по варианту
+        Index("ix_responses_question_id_answer_id", "question_id", "answer_id"),
+        Index("ix_responses_answer_id", "answer_id"),
+        # ответы конкретного пользователя
+        Index("ix_responses_user_id_question_id", "user_id", "question_id"),
+    )
     id             = Column(Integer, primary_key=True, index=True)
     user_id        = Column(BigInteger, nullable=False)     # кто отвечал
     question_id    = Column(Integer, ForeignKey("questions.id"), nullable=False)
@@ -80,9 +93,82 @@ class Response(Base):
 
 class PollCompletion(Base):
     __tablename__ = "poll_completions"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        # один пользователь проходит опрос один раз; индекс же обслуживает NOT EXISTS
+        Index("uq_poll_completions_user_id_poll_id", "user_id", "poll_id", unique=True),
+        Index("ix_poll_completions_poll_id", "poll_id"),
+        {"extend_existing": True},
+    )
 
     id       = Column(Integer, primary_key=True, index=True)
     user_id  = Column(BigInteger, nullable=False)
     poll_id  = Column(Integer, ForeignKey("polls.id"), nullable=False)
 
+
+class FSMRecord(Base):
+    """Состояние и данные FSM (aiogram) для пары chat/user — см. services.fsm_storage."""
+    __tablename__ = "fsm_states"
+
+    chat        = Column(BigInteger, primary_key=True)
+    user        = Column(BigInteger, primary_key=True)
+    state       = Column(String, nullable=True)
+    data        = Column(JSONB, nullable=False, default=dict)
+    updated_at  = Column(DateTime(timezone=True), nullable=False,
+                         server_default=func.now(), index=True)
+
+
+class Notification(Base):
+    """
+    Outbox рассылки (см. services.broadcast): одна строка — одно сообщение одному чату.
+    Строка ждёт отправки, пока status = 'pending' и next_attempt_at в прошлом;
+    выбранная отправителем строка «арендуется» сдвигом next_attempt_at вперёд.
+    """
+    __tablename__ = "notifications"
+    __table_args__ = (
+        # повторная постановка той же рассылки ничего не дублирует
+        Index("uq_notifications_kind_ref_chat", "kind", "ref_id", "chat_id", unique=True),
+        # выборка очереди — только по ещё не отправленным
+        Index("ix_notifications_pending", "next_attempt_at", "id",
+              postgresql_where=text("status = 'pending'")),
+    )
+
+    id              = Column(BigInteger, primary_key=True)
+    kind            = Column(String, nullable=False)        # "poll_published", "reminder"
+    ref_id          = Column(Integer, nullable=False)       # id опроса / запуска напоминания
+    chat_id         = Column(BigInteger, nullable=False)
+    body            = Column(Text, nullable=False)
+    status          = Column(String, nullable=False, server_default="pending")  # pending | sent | failed
+    attempts        = Column(Integer, nullable=False, server_default="0")
+    next_attempt_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    sent_at         = Column(DateTime(timezone=True), nullable=True)
+
+
+class ReminderSchedule(Base):
+    """
+    Напоминание не прошедшим опрос (см. services.reminders): одно расписание на опрос.
+    next_run_at — курсор планировщика: сдвигается в той же транзакции, что ставит
+    напоминание в outbox, поэтому после перезапуска запуск не повторяется.
+    """
+    __tablename__ = "reminder_schedules"
+
+    id          = Column(Integer, primary_key=True)
+    poll_id     = Column(Integer, ForeignKey("polls.id"), nullable=False, unique=True)
+    every_hours = Column(Integer, nullable=True)                  # None — один раз
+    next_run_at = Column(DateTime(timezone=True), nullable=True, index=True)  # None — выключено
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
+    created_by  = Column(BigInteger, nullable=False)
+
+
+class ReminderRun(Base):
+    """Запуск напоминания; его id — ref_id строк outbox с kind = 'reminder'."""
+    __tablename__ = "reminder_runs"
+    __table_args__ = (
+        Index("uq_reminder_runs_schedule_id_due_at", "schedule_id", "due_at", unique=True),
+    )
+
+    id          = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, nullable=False)
+    poll_id     = Column(Integer, nullable=False)
+    due_at      = Column(DateTime(timezone=True), nullable=False)
+    recipients  = Column(Integer, nullable=False, server_default="0")
+    created_at  = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,353 @@
+# services/broadcast.py
+"""
+Рассылка уведомлений через outbox (таблица notifications).
+
+* Постановка: аудитория и строки outbox — одним INSERT ... SELECT (enqueue_*);
+  повторная постановка той же рассылки ничего не дублирует.
+* Отправка: Broadcaster в фоне арендует пачку строк (UPDATE ... FOR UPDATE
+  SKIP LOCKED), шлёт их с общим лимитом (TokenBucket) и интервалом на чат,
+  затем одним UPDATE на исход помечает sent / failed / повтор с backoff.
+  На 429 (RetryAfter) притормаживает всю рассылку на указанное Telegram время
+  и продлевает аренду ещё не отправленных строк пачки на эту паузу.
+* Перезапуск: всё неотправленное остаётся pending; строки, арендованные
+  перед падением, снова станут доступны по истечении аренды
+  (доставка «хотя бы один раз»).
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Iterable, Optional, Sequence
+
+from aiogram import Bot
+from aiogram.utils.exceptions import (
+    BadRequest, BotBlocked, BotKicked, CantInitiateConversation, RetryAfter, UserDeactivated,
+)
+from sqlalchemy import BigInteger, any_, bindparam, case, func, literal, text, update
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import Notification, Poll, User
+from .metrics import Counter
+from .polls import NewQuestion, audience_clause, insert_poll, invalidate_poll
+
+cfg = load_config()
+
+MESSAGES = Counter("broadcast_messages_total", "Сообщения рассылки по исходу",
+                   labels=("status",))
+
+# повторять бессмысленно: пользователь заблокировал бота, чат не существует и т.п.
+PERMANENT_ERRORS = (BotBlocked, BotKicked, UserDeactivated, CantInitiateConversation, BadRequest)
+# подряд 429 на одно сообщение — дальше пусть ждёт следующей пачки
+_FLOOD_RETRIES = 3
+# потолок backoff для повторов, сек
+_MAX_BACKOFF = 300
+
+
+class TokenBucket:
+    """
+    Общий лимит отправки: ``rate`` сообщений в секунду, до ``burst`` подряд.
+    Ожидающие обслуживаются по очереди (FIFO через lock).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate   = rate
+        self.burst  = burst
+        self._tokens = float(burst)
+        self._stamp  = time.monotonic()
+        self._paused_until = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def pause(self, seconds: float):
+        """Не выдавать токены ``seconds`` секунд (ответ 429) и начать после паузы с нуля."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    async def acquire(self):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    self._stamp = time.monotonic()
+                    continue
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass(frozen=True)
+class Outgoing:
+    id:       int
+    chat_id:  int
+    body:     str
+    attempts: int
+
+
+@dataclass
+class BatchResult:
+    sent:   list[int] = field(default_factory=list)
+    retry:  list[int] = field(default_factory=list)
+    failed: list[int] = field(default_factory=list)
+
+
+# литералом, а не параметром: иначе generic-план prepared statement не увидит
+# частичный индекс ix_notifications_pending
+_PENDING = text("notifications.status = 'pending'")
+
+
+def _ids(values: list[int]):
+    # массив одним параметром: не упираемся в лимит параметров asyncpg
+    return any_(bindparam(None, values, type_=ARRAY(BigInteger)))
+
+
+class Broadcaster:
+    """Фоновая отправка outbox; сам отправитель — send_batch(), он же в бенчмарке."""
+
+    def __init__(self, rate: float, burst: int, chat_interval: float, concurrency: int,
+                 batch: int, max_attempts: int, poll_interval: float):
+        self.bucket         = TokenBucket(rate, burst)
+        self._chat_interval = chat_interval
+        self._concurrency   = concurrency
+        self._batch         = batch
+        self._max_attempts  = max_attempts
+        self._poll_interval = poll_interval
+        # аренда пачки: время отправки по лимиту + запас
+        self._lease = timedelta(seconds=batch / rate + 60)
+        # строки текущей пачки, ещё не отправленные, и до какого момента они арендованы
+        self._inflight:    set[int] = set()
+        self._lease_until: float = 0.0
+        self._chat_next: dict[int, float] = {}
+        self._bot:    Optional[Bot] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task:   Optional[asyncio.Task]  = None
+
+    # ——— жизненный цикл ————————————————————————————————————————
+    def start(self, bot: Bot):
+        self._bot    = bot
+        self._wakeup = asyncio.Event()
+        self._task   = asyncio.create_task(self._loop())
+
+    def wakeup(self):
+        """Есть новые строки — не ждать poll_interval."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                rows = await self._claim()
+            except Exception:
+                logging.exception("broadcast: claim failed")
+                rows = []
+            if rows:
+                self._inflight = {r.id for r in rows}
+                result = await self.send_batch(rows)
+                self._inflight = set()
+                try:
+                    await self._mark(result)
+                except Exception:
+                    # строки вернутся в работу по истечении аренды
+                    logging.exception("broadcast: mark failed")
+                continue
+            # asyncio.wait, а не wait_for: отмена задачи при close() не теряется
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self._poll_interval)
+            finally:
+                waiter.cancel()
+            self._wakeup.clear()
+
+    # ——— outbox ——————————————————————————————————————————————
+    async def _claim(self) -> list[Outgoing]:
+        due = (
+            select(Notification.id)
+            .where(_PENDING, Notification.next_attempt_at <= func.now())
+            .order_by(Notification.next_attempt_at, Notification.id)
+            .limit(self._batch)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        async with AsyncSessionLocal() as s:
+            rows = (await s.execute(
+                update(Notification)
+                .where(Notification.id.in_(due))
+                .values(next_attempt_at=func.now() + self._lease)
+                .returning(Notification.id, Notification.chat_id,
+                           Notification.body, Notification.attempts)
+                .execution_options(synchronize_session=False)
+            )).all()
+            await s.commit()
+        self._lease_until = time.monotonic() + self._lease.total_seconds()
+        return sorted((Outgoing(*r) for r in rows), key=lambda o: o.id)
+
+    async def _extend_lease(self, pause: float):
+        """
+        После 429 неотправленные строки пачки уйдут позже — продлеваем их аренду,
+        иначе по её истечении их взял бы другой отправитель и разослал повторно.
+        """
+        ids = list(self._inflight)
+        if not ids:
+            return
+        lease = timedelta(seconds=pause + len(ids) / self.bucket.rate + 60)
+        until = time.monotonic() + lease.total_seconds()
+        if until <= self._lease_until:
+            return
+        # до запроса: параллельные 429 той же паузы не продлевают повторно
+        self._lease_until = until
+        try:
+            async with AsyncSessionLocal() as s:
+                await s.execute(
+                    update(Notification)
+                    .where(Notification.id == _ids(ids), _PENDING)
+                    .values(next_attempt_at=func.now() + lease)
+                    .execution_options(synchronize_session=False))
+                await s.commit()
+        except Exception:
+            logging.exception("broadcast: lease extension failed")
+
+    async def _mark(self, result: BatchResult):
+        opts = {"synchronize_session": False}
+        async with AsyncSessionLocal() as s:
+            if result.sent:
+                await s.execute(
+                    update(Notification).where(Notification.id == _ids(result.sent))
+                    .values(status="sent", sent_at=func.now(), attempts=Notification.attempts + 1)
+                    .execution_options(**opts))
+            if result.failed:
+                await s.execute(
+                    update(Notification).where(Notification.id == _ids(result.failed))
+                    .values(status="failed", attempts=Notification.attempts + 1)
+                    .execution_options(**opts))
+            if result.retry:
+                backoff = func.least(func.power(2, Notification.attempts), _MAX_BACKOFF)
+                await s.execute(
+                    update(Notification).where(Notification.id == _ids(result.retry))
+                    .values(
+                        attempts=Notification.attempts + 1,
+                        status=case((Notification.attempts + 1 >= self._max_attempts, "failed"),
+                                    else_="pending"),
+                        next_attempt_at=func.now() + func.make_interval(0, 0, 0, 0, 0, 0, backoff),
+                    )
+                    .execution_options(**opts))
+            await s.commit()
+
+    # ——— отправка ————————————————————————————————————————————
+    async def _chat_gate(self, chat_id: int):
+        # не чаще раза в chat_interval в один чат
+        now = time.monotonic()
+        at  = max(now, self._chat_next.get(chat_id, 0.0))
+        self._chat_next[chat_id] = at + self._chat_interval
+        if at > now:
+            await asyncio.sleep(at - now)
+
+    async def _send(self, row: Outgoing) -> str:
+        for _ in range(_FLOOD_RETRIES):
+            await self._chat_gate(row.chat_id)
+            await self.bucket.acquire()
+            try:
+                await self._bot.send_message(row.chat_id, row.body)
+                return "sent"
+            except RetryAfter as e:
+                # Telegram просит подождать — тормозим всю рассылку, не только этот чат
+                logging.warning(f"broadcast: flood control, pause {e.timeout}s")
+                self.bucket.pause(e.timeout)
+                await self._extend_lease(e.timeout)
+            except PERMANENT_ERRORS as e:
+                logging.info(f"broadcast: chat {row.chat_id} skipped: {e}")
+                return "failed"
+            except Exception:
+                logging.exception(f"broadcast: chat {row.chat_id} send failed")
+                return "retry"
+        return "retry"
+
+    async def send_batch(self, rows: Iterable[Outgoing]) -> BatchResult:
+        """
+        Отправить пачку с учётом всех лимитов. В БД ходит только продлить аренду
+        после 429, и то для пачки, взятой из outbox (_loop).
+        """
+        result = BatchResult()
+        sem = asyncio.Semaphore(self._concurrency)
+
+        async def one(row: Outgoing):
+            async with sem:
+                status = await self._send(row)
+            getattr(result, status).append(row.id)
+            self._inflight.discard(row.id)
+            MESSAGES.inc(status=status)
+
+        await asyncio.gather(*(one(r) for r in rows))
+        now = time.monotonic()
+        self._chat_next = {c: t for c, t in self._chat_next.items() if t > now}
+        return result
+
+
+broadcaster = Broadcaster(
+    rate=cfg.BROADCAST_RATE,
+    burst=cfg.BROADCAST_BURST,
+    chat_interval=cfg.BROADCAST_CHAT_INTERVAL,
+    concurrency=cfg.BROADCAST_CONCURRENCY,
+    batch=cfg.BROADCAST_BATCH,
+    max_attempts=cfg.BROADCAST_MAX_ATTEMPTS,
+    poll_interval=cfg.BROADCAST_POLL_INTERVAL,
+)
+
+
+def escape_html(col):
+    # бот шлёт в режиме HTML — название опроса экранируем прямо в SQL
+    return func.replace(func.replace(func.replace(col, "&", "&amp;"), "<", "&lt;"), ">", "&gt;")
+
+
+async def enqueue_poll_published(s: AsyncSession, poll_id: int) -> int:
+    """
+    Поставить в outbox (в сессии ``s``, без commit) уведомление о новом опросе
+    всей его аудитории (кроме автора). Аудитория и строки outbox — одним
+    INSERT ... SELECT. Возвращает число получателей.
+    """
+    body = (literal("📣 Новый опрос: «") + escape_html(Poll.title)
+            + literal("»\nНайдите его в «📋 Пройти опрос»."))
+    audience = (
+        select(literal("poll_published"), Poll.id, User.tg_id, body)
+        .select_from(Poll)
+        .join(User, audience_clause())
+        .where(Poll.id == poll_id, User.tg_id != Poll.created_by)
+    )
+    res = await s.execute(
+        pg_insert(Notification)
+        .from_select(["kind", "ref_id", "chat_id", "body"], audience)
+        .on_conflict_do_nothing(index_elements=["kind", "ref_id", "chat_id"])
+    )
+    return res.rowcount
+
+
+async def publish_poll(title: str, target_role: str, created_by: int,
+                       questions: Sequence[NewQuestion],
+                       group_id: Optional[int] = None) -> tuple[int, int]:
+    """
+    Сохранить новый опрос и поставить уведомление о нём одной транзакцией:
+    опроса без уведомления (или наоборот) не бывает. Возвращает
+    (id опроса, число получателей).
+    """
+    async with AsyncSessionLocal() as s:
+        poll_id    = await insert_poll(s, title, target_role, created_by, questions, group_id)
+        recipients = await enqueue_poll_published(s, poll_id)
+        await s.commit()
+    invalidate_poll(poll_id)
+    broadcaster.wakeup()
+    return poll_id, recipients
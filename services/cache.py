@@ -0,0 +1,84 @@
+# services/cache.py
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Асинхронный in-process кэш с TTL и вытеснением по LRU.
+
+    Значения загружаются через переданный loader; одновременные промахи
+    по одному ключу ждут одну и ту же загрузку (без «лавины» запросов в БД).
+    """
+
+    def __init__(self,
+                 loader: Callable[[Hashable], Awaitable[Any]],
+                 ttl: float,
+                 maxsize: int):
+        self._loader   = loader
+        self._ttl      = ttl
+        self._maxsize  = maxsize
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.hits   = 0
+        self.misses = 0
+
+    async def get(self, key: Hashable) -> Any:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires, value = entry
+            if expires > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+
+        self.misses += 1
+        fut = self._inflight.get(key)
+        if fut is not None:
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        try:
+            value = await self._loader(key)
+        except BaseException as e:
+            fut.set_exception(e)
+            # исключение уже отдано вызывающему — будущее помечаем прочитанным
+            fut.exception()
+            raise
+        else:
+            # если за время загрузки ключ инвалидировали — не кэшируем
+            if self._inflight.get(key) is fut:
+                self.set(key, value)
+            fut.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is fut:
+                del self._inflight[key]
+
+    def set(self, key: Hashable, value: Any):
+        self._data[key] = (time.monotonic() + self._ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self._maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None):
+        """Сбросить один ключ или (key=None) весь кэш."""
+        if key is None:
+            self._data.clear()
+            self._inflight.clear()
+        else:
+            self._data.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size":     len(self._data),
+            "hits":     self.hits,
+            "misses":   self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
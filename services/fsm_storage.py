@@ -0,0 +1,336 @@
+# services/fsm_storage.py
+import asyncio
+import copy
+import logging
+import time
+import typing
+from datetime import datetime, timedelta, timezone
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.dispatcher.storage import BaseStorage
+from sqlalchemy import delete, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal
+from models import FSMRecord
+
+Key = typing.Tuple[int, int]
+
+
+def _is_permanent(e: Exception) -> bool:
+    # повтор не поможет: БД отвергла строку или данные не сериализуются в JSON
+    return (isinstance(e, (IntegrityError, DataError))
+            or isinstance(e, StatementError) and not isinstance(e, DBAPIError))
+
+
+class _Record:
+    __slots__ = ("state", "data", "loaded_at")
+
+    def __init__(self, state: typing.Optional[str], data: dict):
+        self.state     = state
+        self.data      = data
+        self.loaded_at = time.monotonic()
+
+
+class PostgresStorage(BaseStorage):
+    """
+    FSM-хранилище aiogram в таблице fsm_states.
+
+    * Чтение: состояние и данные грузятся одним SELECT и держатся локально
+      ``cache_ttl`` секунд (несколько get_* за один апдейт — один запрос).
+    * Запись: изменения копятся и сбрасываются пачкой (multi-row upsert/delete)
+      через ``flush_interval`` секунд или сразу при ``batch_size`` изменений.
+      Если БД отвергла пачку, ключи пишутся по одному; ключ, который не
+      записывается сам по себе, отбрасывается с записью в лог.
+    * Брошенные сессии старше ``ttl`` секунд не читаются и периодически удаляются.
+
+    В режиме по умолчанию (write-behind) изменения последних ``flush_interval``
+    секунд теряются при падении процесса, а кэш чтения виден только своему
+    процессу — поэтому апдейты одного пользователя должны попадать в один
+    процесс. Для нескольких процессов на одной таблице (``write_through=True``,
+    см. build_storage) каждое изменение записывается до возврата из set_*,
+    а чтение идёт в БД, если нет незаписанной локальной копии.
+    """
+
+    def __init__(self,
+                 ttl: float = 7 * 24 * 3600,
+                 cache_ttl: float = 2.0,
+                 flush_interval: float = 0.05,
+                 batch_size: int = 500,
+                 cleanup_interval: float = 3600,
+                 write_through: bool = False):
+        self._ttl              = ttl
+        self._cache_ttl        = 0.0 if write_through else cache_ttl
+        self._flush_interval   = flush_interval
+        self._batch_size       = batch_size
+        self._cleanup_interval = cleanup_interval
+        self._write_through    = write_through
+
+        self._records: dict[Key, _Record] = {}
+        self._dirty:   set[Key] = set()
+        self._flushing: set[Key] = set()   # записываются прямо сейчас
+        # одна запись за раз: иначе более старая пачка могла бы закоммититься позже новой
+        self._flush_lock = asyncio.Lock()
+        self._wakeup:  typing.Optional[asyncio.Event] = None
+        self._tasks:   list[asyncio.Task] = []
+        self._closed   = False
+        self._last_evict = time.monotonic()
+
+    # ——— фоновые задачи ————————————————————————————————————————
+    def _ensure_started(self):
+        if self._tasks or self._closed:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._flush_loop()),
+            asyncio.create_task(self._cleanup_loop()),
+        ]
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            if len(self._dirty) < self._batch_size:
+                await asyncio.sleep(self._flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("fsm storage: flush failed, will retry")
+                await asyncio.sleep(1)
+                self._wakeup.set()
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self._cleanup_interval)
+            try:
+                await self.cleanup()
+            except Exception:
+                logging.exception("fsm storage: cleanup failed")
+
+    async def flush(self):
+        """Записать все накопленные изменения одной транзакцией."""
+        async with self._flush_lock:
+            if not self._dirty:
+                return
+            keys, self._dirty = self._dirty, set()
+            self._flushing = keys
+            try:
+                rows = self._snapshot(keys)
+                try:
+                    await self._write(rows)
+                except Exception as e:
+                    if len(keys) == 1 or not _is_permanent(e):
+                        raise
+                    logging.warning(f"fsm storage: batch rejected ({e.__class__.__name__}), "
+                                    f"writing keys one by one")
+                    await self._write_each(rows)
+            except Exception as e:
+                if len(keys) == 1 and _is_permanent(e):
+                    logging.error(f"fsm storage: dropped {keys.pop()}: {getattr(e, 'orig', e)}")
+                else:
+                    # вернём ключи в очередь — запишем в следующий раз
+                    self._dirty |= keys
+                    raise
+            except BaseException:
+                self._dirty |= keys
+                raise
+            finally:
+                self._flushing = set()
+            self._evict()
+
+    def _snapshot(self, keys: set[Key]) -> dict[Key, typing.Optional[dict]]:
+        # None — удалить строку
+        rows = {}
+        for key in keys:
+            rec = self._records.get(key)
+            if rec is None:
+                continue
+            if rec.state is None and not rec.data:
+                rows[key] = None
+            else:
+                rows[key] = {"chat": key[0], "user": key[1],
+                             "state": rec.state, "data": copy.deepcopy(rec.data)}
+        return rows
+
+    @staticmethod
+    def _statements(rows: dict[Key, typing.Optional[dict]]) -> list:
+        upserts = [r for r in rows.values() if r is not None]
+        deletes = [k for k, r in rows.items() if r is None]
+        stmts = []
+        if upserts:
+            stmt = pg_insert(FSMRecord).values(upserts)
+            stmts.append(stmt.on_conflict_do_update(
+                index_elements=[FSMRecord.chat, FSMRecord.user],
+                set_={
+                    "state":      stmt.excluded.state,
+                    "data":       stmt.excluded.data,
+                    "updated_at": datetime.now(timezone.utc),
+                },
+            ))
+        if deletes:
+            stmts.append(delete(FSMRecord).where(
+                tuple_(FSMRecord.chat, FSMRecord.user).in_(deletes)
+            ))
+        return stmts
+
+    async def _write(self, rows: dict[Key, typing.Optional[dict]]):
+        async with AsyncSessionLocal() as s:
+            for stmt in self._statements(rows):
+                await s.execute(stmt)
+            await s.commit()
+
+    async def _write_each(self, rows: dict[Key, typing.Optional[dict]]):
+        # одна транзакция, по SAVEPOINT на ключ: сбой сети — вся пачка в очередь
+        async with AsyncSessionLocal() as s:
+            for key, row in rows.items():
+                try:
+                    async with s.begin_nested():
+                        for stmt in self._statements({key: row}):
+                            await s.execute(stmt)
+                except Exception as e:
+                    if not _is_permanent(e):
+                        raise
+                    logging.error(f"fsm storage: dropped {key}: {getattr(e, 'orig', e)}")
+            await s.commit()
+
+    async def cleanup(self):
+        """Удалить сессии, которые не менялись дольше ttl."""
+        border = datetime.now(timezone.utc) - timedelta(seconds=self._ttl)
+        async with AsyncSessionLocal() as s:
+            await s.execute(delete(FSMRecord).where(FSMRecord.updated_at < border))
+            await s.commit()
+
+    def _evict(self):
+        # чистые записи держим не дольше cache_ttl
+        now = time.monotonic()
+        self._last_evict = now
+        stale = [k for k, r in self._records.items()
+                 if not self._is_pending(k) and now - r.loaded_at > self._cache_ttl]
+        for k in stale:
+            del self._records[k]
+
+    # ——— доступ к записям ———————————————————————————————————————
+    def _is_pending(self, key: Key) -> bool:
+        # локальная копия свежее БД, пока изменения не записаны
+        return key in self._dirty or key in self._flushing
+
+    async def _get(self, chat, user) -> _Record:
+        self._ensure_started()
+        if time.monotonic() - self._last_evict > self._cache_ttl:
+            self._evict()
+        key = tuple(map(int, self.check_address(chat=chat, user=user)))
+        rec = self._records.get(key)
+        if rec is not None and (self._is_pending(key)
+                                or time.monotonic() - rec.loaded_at <= self._cache_ttl):
+            return rec
+
+        border = datetime.now(timezone.utc) - timedelta(seconds=self._ttl)
+        async with AsyncSessionLocal() as s:
+            row = (await s.execute(
+                select(FSMRecord.state, FSMRecord.data)
+                .where(FSMRecord.chat == key[0],
+                       FSMRecord.user == key[1],
+                       FSMRecord.updated_at >= border)
+            )).first()
+        # пока шёл запрос, запись могли изменить локально — она свежее
+        if self._is_pending(key):
+            return self._records[key]
+        rec = _Record(row.state, row.data or {}) if row else _Record(None, {})
+        self._records[key] = rec
+        return rec
+
+    async def _touch(self, chat, user):
+        key = tuple(map(int, self.check_address(chat=chat, user=user)))
+        self._dirty.add(key)
+        self._records[key].loaded_at = time.monotonic()
+        if self._write_through:
+            # другой процесс может прочитать состояние сразу после этого апдейта
+            try:
+                return await self.flush()
+            except Exception:
+                # ключ остался в очереди — его дозапишет фоновая задача
+                if self._wakeup is not None:
+                    self._wakeup.set()
+                raise
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    # ——— API BaseStorage ————————————————————————————————————————
+    async def get_state(self, *, chat=None, user=None, default=None) -> typing.Optional[str]:
+        rec = await self._get(chat, user)
+        return rec.state if rec.state is not None else self.resolve_state(default)
+
+    async def get_data(self, *, chat=None, user=None, default=None) -> typing.Dict:
+        rec = await self._get(chat, user)
+        return copy.deepcopy(rec.data) if rec.data else copy.deepcopy(default or {})
+
+    async def set_state(self, *, chat=None, user=None, state=None):
+        rec = await self._get(chat, user)
+        rec.state = self.resolve_state(state)
+        await self._touch(chat, user)
+
+    async def set_data(self, *, chat=None, user=None, data: typing.Dict = None):
+        rec = await self._get(chat, user)
+        rec.data = copy.deepcopy(data or {})
+        await self._touch(chat, user)
+
+    async def update_data(self, *, chat=None, user=None, data: typing.Dict = None, **kwargs):
+        rec = await self._get(chat, user)
+        rec.data.update(copy.deepcopy(data or {}), **copy.deepcopy(kwargs))
+        await self._touch(chat, user)
+
+    async def reset_state(self, *, chat=None, user=None, with_data: typing.Optional[bool] = True):
+        rec = await self._get(chat, user)
+        rec.state = None
+        if with_data:
+            rec.data = {}
+        await self._touch(chat, user)
+
+    async def close(self):
+        self._closed = True
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.flush()
+
+    async def wait_closed(self):
+        pass
+
+
+def build_storage(cfg) -> BaseStorage:
+    """
+    FSM-хранилище по настройке FSM_STORAGE: postgres | redis | memory.
+
+    Postgres с FSM_INSTANCES > 1 (несколько процессов бота на одной таблице)
+    работает без локального кэша и с синхронной записью; при FSM_INSTANCES=1
+    все апдейты должны обрабатываться одним процессом.
+    """
+    kind = cfg.FSM_STORAGE
+    if kind == "postgres":
+        shared = cfg.FSM_INSTANCES > 1
+        if not shared:
+            logging.info("fsm storage: write-behind cache, a single bot process is expected "
+                         "(set FSM_INSTANCES for more)")
+        return PostgresStorage(
+            ttl=cfg.FSM_TTL,
+            cache_ttl=cfg.FSM_CACHE_TTL,
+            flush_interval=cfg.FSM_FLUSH_INTERVAL,
+            batch_size=cfg.FSM_BATCH_SIZE,
+            write_through=shared,
+        )
+    if kind == "redis":
+        # aiogram-реализация (подходит и совместимый сервер, напр. KeyDB); aiogram 2.25
+        # импортирует aioredis лениво — без проверки ошибка всплыла бы на первом апдейте
+        try:
+            import aioredis  # noqa: F401
+        except ImportError:
+            raise RuntimeError("FSM_STORAGE=redis requires aioredis<2: pip install 'aioredis<2'") from None
+        from aiogram.contrib.fsm_storage.redis import RedisStorage2
+        return RedisStorage2(cfg.REDIS_HOST, cfg.REDIS_PORT, db=cfg.REDIS_DB,
+                             state_ttl=int(cfg.FSM_TTL), data_ttl=int(cfg.FSM_TTL))
+    if kind == "memory":
+        return MemoryStorage()
+    raise ValueError(f"Unknown FSM_STORAGE: {kind!r}")
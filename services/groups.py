@@ -0,0 +1,29 @@
+# services/groups.py
+from typing import Iterable
+
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.future import select
+
+from database import AsyncSessionLocal
+from models import Group
+
+
+async def ensure_groups(names: Iterable[str]) -> dict[str, int]:
+    """
+    Создать недостающие группы одним INSERT ... ON CONFLICT (name) DO NOTHING.
+    Возвращает {название: id} для всех переданных названий.
+    """
+    names = list(dict.fromkeys(n.strip() for n in names if n and n.strip()))
+    if not names:
+        return {}
+    async with AsyncSessionLocal() as s:
+        await s.execute(
+            pg_insert(Group)
+            .values([{"name": n} for n in names])
+            .on_conflict_do_nothing(index_elements=[Group.name])
+        )
+        rows = (await s.execute(
+            select(Group.name, Group.id).where(Group.name.in_(names))
+        )).all()
+        await s.commit()
+    return {name: gid for name, gid in rows}
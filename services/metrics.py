@@ -0,0 +1,182 @@
+# services/metrics.py
+"""
+Минимальный реестр метрик в текстовом формате Prometheus (без внешних зависимостей).
+
+    checkout = Histogram("db_pool_checkout_seconds", "Ожидание соединения из пула")
+    checkout.observe(0.003)
+    REGISTRY.render()   # -> текст для /metrics
+"""
+import bisect
+import threading
+from collections import deque
+from typing import Callable, Optional
+
+# секунды: от 1 мс до 10 с
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(v) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+def _fmt(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, doc: str, labels: tuple = ()):
+        self.name   = name
+        self.doc    = doc
+        self.labels = tuple(labels)
+        # пишут из event loop и из потоков (to_thread) — обновления под локом
+        self._lock  = threading.Lock()
+        REGISTRY.register(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(labels.get(n, "") for n in self.labels)
+
+    def samples(self) -> list[tuple[str, tuple, float]]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.type}"]
+        for suffix, (names, values), v in self.samples():
+            lines.append(f"{self.name}{suffix}{_labels(names, values)} {_fmt(v)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """
+    Растёт через inc() или читается функцией ``func`` у того, кто уже считает сам
+    (например, счётчики попаданий кэша); для метрики с метками ``func``
+    возвращает {значения меток: число}.
+    """
+    type = "counter"
+
+    def __init__(self, name, doc, labels=(), func: Optional[Callable[[], float]] = None):
+        super().__init__(name, doc, labels)
+        self._values: dict[tuple, float] = {}
+        self._func = func
+
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def samples(self):
+        if self._func is not None:
+            value = self._func()
+            if isinstance(value, dict):
+                return [("", (self.labels, k), v) for k, v in value.items()]
+            return [("", ((), ()), value)]
+        with self._lock:
+            return [("", (self.labels, k), v) for k, v in self._values.items()]
+
+
+class Gauge(_Metric):
+    """
+    Значение задаётся через set() или считается при чтении функцией ``func``.
+    Для метрики с метками ``func`` возвращает {значения меток: число}.
+    """
+    type = "gauge"
+
+    def __init__(self, name, doc, labels=(), func: Optional[Callable[[], float]] = None):
+        super().__init__(name, doc, labels)
+        self._values: dict[tuple, float] = {}
+        self._func = func
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self):
+        if self._func is not None:
+            value = self._func()
+            if isinstance(value, dict):
+                return [("", (self.labels, k), v) for k, v in value.items()]
+            return [("", ((), ()), value)]
+        with self._lock:
+            return [("", (self.labels, k), v) for k, v in self._values.items()]
+
+
+class _Series:
+    __slots__ = ("buckets", "sum", "count", "recent")
+
+    def __init__(self, n: int, window: int):
+        self.buckets = [0] * n
+        self.sum     = 0.0
+        self.count   = 0
+        self.recent  = deque(maxlen=window)   # для перцентилей в логах
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS, window: int = 2048):
+        super().__init__(name, doc, labels)
+        self._bounds = tuple(sorted(buckets))
+        self._window = window
+        self._series: dict[tuple, _Series] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = _Series(len(self._bounds), self._window)
+            i = bisect.bisect_left(self._bounds, value)
+            if i < len(self._bounds):
+                s.buckets[i] += 1
+            s.sum   += value
+            s.count += 1
+            s.recent.append(value)
+
+    def percentiles(self, qs=(0.5, 0.95, 0.99)) -> dict[tuple, dict]:
+        """{значения меток: {"count", "p50", ...}} по последним ``window`` наблюдениям."""
+        with self._lock:
+            snap = {k: (s.count, sorted(s.recent)) for k, s in self._series.items()}
+        out = {}
+        for key, (count, recent) in snap.items():
+            row = {"count": count}
+            for q in qs:
+                row[f"p{round(q * 100):g}"] = recent[min(len(recent) - 1, int(q * len(recent)))] if recent else 0.0
+            out[key] = row
+        return out
+
+    def samples(self):
+        out = []
+        with self._lock:
+            series = [(k, list(s.buckets), s.sum, s.count) for k, s in self._series.items()]
+        for key, buckets, total, count in series:
+            acc = 0
+            for bound, n in zip(self._bounds, buckets):
+                acc += n
+                out.append(("_bucket", (self.labels + ("le",), key + (_fmt(bound),)), acc))
+            out.append(("_bucket", (self.labels + ("le",), key + ("+Inf",)), count))
+            out.append(("_sum",    (self.labels, key), total))
+            out.append(("_count",  (self.labels, key), count))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
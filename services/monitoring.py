@@ -0,0 +1,166 @@
+# services/monitoring.py
+"""
+Метрики обработки апдейтов: время хендлера, число SQL-запросов и время в БД
+на апдейт (с привязкой к имени хендлера), состояние кэшей.
+
+Отдаются в формате Prometheus на METRICS_HOST:METRICS_PORT/metrics и раз в
+METRICS_LOG_INTERVAL секунд пишутся в лог сводкой с перцентилями.
+"""
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from aiohttp import web
+from sqlalchemy import event
+
+from .metrics import REGISTRY, Counter, Gauge, Histogram
+from .polls import available_cache, poll_cache
+from .response_writer import response_writer
+from .users import user_cache
+
+BACKGROUND = "background"   # запросы вне апдейтов: фоновая запись, очистка и т.п.
+UNHANDLED  = "unhandled"    # апдейт не подошёл ни одному хендлеру
+
+HANDLER_SECONDS   = Histogram("bot_handler_seconds", "Время обработки апдейта",
+                              labels=("handler",))
+UPDATE_QUERIES    = Histogram("bot_update_db_queries", "SQL-запросов за апдейт",
+                              labels=("handler",), buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55))
+UPDATE_DB_SECONDS = Histogram("bot_update_db_seconds", "Время в БД за апдейт",
+                              labels=("handler",))
+DB_QUERIES        = Counter("db_queries_total", "Выполненные SQL-запросы",
+                            labels=("handler",))
+
+CACHES = {"users": user_cache, "polls": poll_cache, "available_polls": available_cache}
+
+
+def _cache_stat(field: str):
+    return lambda: {(name,): c.stats()[field] for name, c in CACHES.items()}
+
+
+# попадания и промахи только растут — счётчики, чтобы работали rate() и сбросы
+Counter("cache_hits_total",   "Попадания в кэш", labels=("cache",), func=_cache_stat("hits"))
+Counter("cache_misses_total", "Промахи кэша",    labels=("cache",), func=_cache_stat("misses"))
+Gauge("cache_size",   "Записей в кэше",   labels=("cache",), func=_cache_stat("size"))
+Gauge("response_writer_pending", "Ответы в буфере, ещё не записанные в БД",
+      func=response_writer.pending)
+
+
+class UpdateStats:
+    __slots__ = ("task", "started", "handler", "queries", "db_time")
+
+    def __init__(self):
+        # запросы считаем только из задачи апдейта: фоновые задачи, созданные
+        # во время апдейта, наследуют контекст, но не должны попадать в его счёт
+        self.task    = asyncio.current_task()
+        self.started = time.perf_counter()
+        self.handler = UNHANDLED
+        self.queries = 0
+        self.db_time = 0.0
+
+
+_current: ContextVar[Optional[UpdateStats]] = ContextVar("update_stats", default=None)
+
+
+def begin_update():
+    _current.set(UpdateStats())
+
+
+def set_handler(handler):
+    stats = _current.get()
+    if stats is not None:
+        stats.handler = f"{handler.__module__.rsplit('.', 1)[-1]}.{handler.__qualname__}"
+
+
+def end_update():
+    stats = _current.get()
+    if stats is None:
+        return
+    _current.set(None)
+    HANDLER_SECONDS.observe(time.perf_counter() - stats.started, handler=stats.handler)
+    UPDATE_QUERIES.observe(stats.queries, handler=stats.handler)
+    UPDATE_DB_SECONDS.observe(stats.db_time, handler=stats.handler)
+
+
+# ——— SQLAlchemy ————————————————————————————————————————————————
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    # контекст задачи доходит до greenlet'а SQLAlchemy, поэтому апдейт виден и здесь
+    stats = _current.get()
+    if stats is not None and stats.task is asyncio.current_task():
+        stats.queries += 1
+        stats.db_time += elapsed
+        DB_QUERIES.inc(handler=stats.handler)
+    else:
+        DB_QUERIES.inc(handler=BACKGROUND)
+
+
+def install_db_hooks(engine):
+    """Подписаться на события движка (AsyncEngine или обычного Engine)."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# ——— вывод ———————————————————————————————————————————————————
+def log_summary():
+    times   = HANDLER_SECONDS.percentiles()
+    queries = UPDATE_QUERIES.percentiles()
+    for (handler,), t in sorted(times.items(), key=lambda kv: -kv[1]["p95"]):
+        q = queries.get((handler,), {})
+        logging.info(
+            f"[metrics] {handler}: n={t['count']} "
+            f"p50={t['p50'] * 1000:.1f}ms p95={t['p95'] * 1000:.1f}ms p99={t['p99'] * 1000:.1f}ms "
+            f"queries p50={q.get('p50', 0):g} p95={q.get('p95', 0):g}"
+        )
+    for name, cache in CACHES.items():
+        logging.info(f"[metrics] cache {name}: {cache.stats()}")
+
+
+_runner:   Optional[web.AppRunner] = None
+_log_task: Optional[asyncio.Task]  = None
+
+
+async def _log_loop(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            log_summary()
+        except Exception:
+            logging.exception("metrics: summary failed")
+
+
+async def _handle_metrics(_: web.Request) -> web.Response:
+    return web.Response(body=REGISTRY.render().encode(),
+                        headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+
+async def start_monitoring(cfg):
+    """HTTP /metrics (если METRICS_PORT != 0) и периодическая сводка в лог."""
+    global _runner, _log_task
+    if cfg.METRICS_PORT and _runner is None:
+        app = web.Application()
+        app.router.add_get("/metrics", _handle_metrics)
+        _runner = web.AppRunner(app, access_log=None)
+        await _runner.setup()
+        await web.TCPSite(_runner, cfg.METRICS_HOST, cfg.METRICS_PORT).start()
+        logging.info(f"✅ metrics on http://{cfg.METRICS_HOST}:{cfg.METRICS_PORT}/metrics")
+    if cfg.METRICS_LOG_INTERVAL > 0 and _log_task is None:
+        _log_task = asyncio.create_task(_log_loop(cfg.METRICS_LOG_INTERVAL))
+
+
+async def stop_monitoring():
+    global _runner, _log_task
+    if _log_task is not None:
+        _log_task.cancel()
+        await asyncio.gather(_log_task, return_exceptions=True)
+        _log_task = None
+    if _runner is not None:
+        await _runner.cleanup()
+        _runner = None
+    log_summary()
@@ -0,0 +1,178 @@
+# services/poll_drafts.py
+"""
+Черновик создаваемого опроса — в данных FSM (ключ ``draft``), а не в памяти
+процесса: переживает перезапуск и виден любому воркеру с общим FSM-хранилищем.
+
+* Лимиты: те же, что у импорта из файла (services.poll_format), плюс общий
+  объём текста POLL_DRAFT_MAX_BYTES.
+* TTL: черновик, не менявшийся дольше POLL_DRAFT_TTL, не продолжается
+  (проверяется при каждом чтении, в любом хранилище); брошенные черновики
+  удаляются вместе с записью FSM фоновой задачей.
+* Метрики: poll_drafts / poll_drafts_bytes — живые черновики в FSM-хранилище
+  (обновляются той же задачей).
+Фоновая задача есть для postgres и memory; в redis записи истекают по FSM_TTL,
+метрик нет — об этом пишется предупреждение при старте.
+"""
+import asyncio
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import Optional
+
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.dispatcher import FSMContext
+from aiogram.dispatcher.storage import BaseStorage
+from sqlalchemy import delete, func
+from sqlalchemy.future import select
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import FSMRecord
+from .fsm_storage import PostgresStorage
+from .metrics import Gauge
+from .poll_format import MAX_OPTION, MAX_OPTIONS, MAX_QUESTION, MAX_QUESTIONS
+from .polls import NewQuestion
+
+cfg = load_config()
+
+DRAFT_KEY = "draft"
+
+DRAFTS       = Gauge("poll_drafts", "Незавершённые черновики опросов в FSM-хранилище")
+DRAFTS_BYTES = Gauge("poll_drafts_bytes", "Объём черновиков опросов в FSM-хранилище, байт")
+
+
+class DraftError(ValueError):
+    """Черновик не принял изменение; текст — для пользователя."""
+
+
+class DraftExpired(DraftError):
+    """Черновика нет или он брошен дольше POLL_DRAFT_TTL — создание начинается заново."""
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+async def start_draft(state: FSMContext):
+    await state.update_data({DRAFT_KEY: {"touched_at": time.time(), "bytes": 0, "questions": []}})
+
+
+async def _load(state: FSMContext) -> dict:
+    draft = (await state.get_data()).get(DRAFT_KEY)
+    if draft is None or time.time() - draft["touched_at"] > cfg.POLL_DRAFT_TTL:
+        raise DraftExpired("⌛ Черновик опроса устарел — начните создание заново.")
+    return draft
+
+
+def _grow(draft: dict, text: str):
+    size = draft["bytes"] + _size(text)
+    if size > cfg.POLL_DRAFT_MAX_BYTES:
+        raise DraftError(f"Опрос больше {cfg.POLL_DRAFT_MAX_BYTES // 1024} КБ текста — "
+                         f"завершите его или загрузите файлом (📥 Импорт опроса).")
+    draft["bytes"] = size
+    draft["touched_at"] = time.time()
+
+
+async def add_question(state: FSMContext, text: str):
+    draft = await _load(state)
+    if len(text) > MAX_QUESTION:
+        raise DraftError(f"Вопрос длиннее {MAX_QUESTION} символов.")
+    if len(draft["questions"]) >= MAX_QUESTIONS:
+        raise DraftError(f"В опросе уже {MAX_QUESTIONS} вопросов.")
+    _grow(draft, text)
+    draft["questions"].append({"text": text, "answers": []})
+    await state.update_data({DRAFT_KEY: draft})
+
+
+async def add_option(state: FSMContext, text: str):
+    """Вариант к последнему вопросу."""
+    draft = await _load(state)
+    answers = draft["questions"][-1]["answers"]
+    if len(text) > MAX_OPTION:
+        raise DraftError(f"Вариант длиннее {MAX_OPTION} символов.")
+    if text in answers:
+        # вариант выбирают кнопкой по тексту — дубликаты неразличимы
+        raise DraftError("Такой вариант уже есть.")
+    if len(answers) >= MAX_OPTIONS:
+        raise DraftError(f"У вопроса уже {MAX_OPTIONS} вариантов.")
+    _grow(draft, text)
+    answers.append(text)
+    await state.update_data({DRAFT_KEY: draft})
+
+
+async def draft_questions(state: FSMContext) -> list[NewQuestion]:
+    draft = await _load(state)
+    return [NewQuestion(q["text"], tuple(q["answers"])) for q in draft["questions"]]
+
+
+# ——— фоновая задача: TTL и метрики ———————————————————————————————
+_task: Optional[asyncio.Task] = None
+
+
+async def sweep_drafts():
+    """Удалить записи FSM с брошенными черновиками и обновить метрики."""
+    has_draft = FSMRecord.data.has_key(DRAFT_KEY)
+    border = datetime.now(timezone.utc) - timedelta(seconds=cfg.POLL_DRAFT_TTL)
+    async with AsyncSessionLocal() as s:
+        # запись не менялась дольше TTL — значит, и в кэше хранилища её уже нет
+        await s.execute(delete(FSMRecord).where(has_draft, FSMRecord.updated_at < border))
+        size = func.pg_column_size(FSMRecord.data.op("->")(DRAFT_KEY))
+        count, size = (await s.execute(
+            select(func.count(), func.coalesce(func.sum(size), 0)).where(has_draft)
+        )).one()
+        await s.commit()
+    DRAFTS.set(count)
+    DRAFTS_BYTES.set(size)
+
+
+async def sweep_memory_drafts(storage: MemoryStorage):
+    """То же для MemoryStorage — обход его словаря, сброс через API хранилища."""
+    now, count, size, expired = time.time(), 0, 0, []
+    for chat, users in storage.data.items():
+        for user, rec in users.items():
+            draft = rec["data"].get(DRAFT_KEY)
+            if draft is None:
+                continue
+            if now - draft["touched_at"] > cfg.POLL_DRAFT_TTL:
+                expired.append((chat, user))
+            else:
+                count += 1
+                size  += _size(json.dumps(draft, ensure_ascii=False))
+    for chat, user in expired:
+        await storage.reset_state(chat=chat, user=user)
+    DRAFTS.set(count)
+    DRAFTS_BYTES.set(size)
+
+
+async def _loop(sweep, interval: float):
+    while True:
+        try:
+            await sweep()
+        except Exception:
+            logging.exception("poll drafts: sweep failed")
+        await asyncio.sleep(interval)
+
+
+def start_draft_sweeper(storage: BaseStorage):
+    global _task
+    if _task is not None:
+        return
+    if isinstance(storage, PostgresStorage):
+        sweep = sweep_drafts
+    elif isinstance(storage, MemoryStorage):
+        sweep = partial(sweep_memory_drafts, storage)
+    else:
+        logging.warning(f"poll drafts: no sweeper for {type(storage).__name__} — abandoned drafts "
+                        f"expire by FSM_TTL, poll_drafts gauges stay empty")
+        return
+    _task = asyncio.create_task(_loop(sweep, cfg.POLL_DRAFT_SWEEP_INTERVAL))
+
+
+async def stop_draft_sweeper():
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
@@ -0,0 +1,127 @@
+# services/poll_export.py
+import asyncio
+import csv
+import io
+import tempfile
+from typing import Optional
+
+from sqlalchemy.future import select
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import Question, Response
+from .poll_stats import collect_poll_stats
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX — опциональная зависимость
+    Workbook = None
+
+cfg = load_config()
+
+HEADER = ["Вопрос", "Ответ/Ответчик", "Количество", "Процент"]
+
+
+class _CsvSink:
+    """CSV (UTF-8 с BOM, чтобы Excel понимал кириллицу)."""
+    ext = "csv"
+
+    def __init__(self, fileobj, title: str = ""):
+        self._text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+        self._writer = csv.writer(self._text)
+
+    def write_rows(self, rows: list):
+        self._writer.writerows(rows)
+
+    def close(self):
+        self._text.flush()
+        self._text.detach()
+
+
+class _XlsxSink:
+    """XLSX в write-only режиме: openpyxl сам держит строки во временном файле."""
+    ext = "xlsx"
+
+    def __init__(self, fileobj, title: str = "Статистика"):
+        self._file = fileobj
+        self._wb = Workbook(write_only=True)
+        self._ws = self._wb.create_sheet(title)
+
+    def write_rows(self, rows: list):
+        for row in rows:
+            self._ws.append(row)
+
+    def close(self):
+        self._wb.save(self._file)
+
+
+SINKS = {"csv": _CsvSink}
+if Workbook is not None:
+    SINKS["xlsx"] = _XlsxSink
+
+
+async def export_poll(poll_id: int, fmt: str = "csv") -> Optional[tuple]:
+    """
+    Выгрузка статистики опроса в файл.
+
+    Счётчики по вариантам берутся одним запросом, свободные ответы читаются
+    серверным курсором порциями по EXPORT_CHUNK_SIZE и сразу пишутся в
+    SpooledTemporaryFile (в памяти не больше EXPORT_SPOOL_MAX байт, дальше — диск).
+    Запись порций выполняется в пуле потоков, чтобы не блокировать event loop.
+
+    Возвращает (файл, имя_файла) или None, если опроса нет.
+    Файл открыт и перемотан в начало — закрыть его должен вызывающий.
+    """
+    sink_cls = SINKS[fmt]
+    chunk = cfg.EXPORT_CHUNK_SIZE
+    out = tempfile.SpooledTemporaryFile(max_size=cfg.EXPORT_SPOOL_MAX, mode="w+b")
+    try:
+        async with AsyncSessionLocal() as s:
+            stats = await collect_poll_stats(s, poll_id, with_texts=False)
+            if not stats:
+                out.close()
+                return None
+
+            sink = sink_cls(out)
+            await asyncio.to_thread(sink.write_rows, [HEADER])
+
+            questions = iter(stats.questions)
+            current   = None
+            has_texts = False
+
+            def finish(q, answered: bool) -> list:
+                # строки вопроса, которые не приходят из курсора
+                if q.type != "text":
+                    return [[q.text, o.text, o.count, f"{o.percent:.1f}%"] for o in q.options]
+                return [] if answered else [[q.text, "-", "-", "-"]]
+
+            result = await s.stream(
+                select(Response.question_id, Response.user_id, Response.response_text)
+                .join(Question, Question.id == Response.question_id)
+                .where(Question.poll_id == poll_id, Question.question_type == "text")
+                .order_by(Response.question_id, Response.id)
+                .execution_options(yield_per=chunk)
+            )
+            async for part in result.partitions(chunk):
+                rows = []
+                for q_id, uid, txt in part:
+                    # оба потока упорядочены по id вопроса — сливаем их
+                    while current is None or current.id != q_id:
+                        if current is not None:
+                            rows += finish(current, has_texts)
+                        current, has_texts = next(questions), False
+                    rows.append([current.text, uid, txt, "-"])
+                    has_texts = True
+                await asyncio.to_thread(sink.write_rows, rows)
+
+            rows = finish(current, has_texts) if current is not None else []
+            for q in questions:
+                rows += finish(q, False)
+            await asyncio.to_thread(sink.write_rows, rows)
+            await asyncio.to_thread(sink.close)
+
+        out.seek(0)
+        return out, f"{stats.poll.title}.{sink_cls.ext}"
+    except BaseException:
+        out.close()
+        raise
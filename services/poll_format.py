@@ -0,0 +1,209 @@
+# services/poll_format.py
+"""
+Опрос целиком в файле — для импорта больших анкет и выгрузки существующих.
+
+CSV (UTF-8, разделитель «,» или «;», первая строка — заголовок kind,text):
+    kind,text
+    title,Оценка курса
+    target,all
+    question,Как вам курс?
+    option,Отлично
+    option,Плохо
+    question,Что улучшить?
+Варианты (option) относятся к последнему вопросу; вопрос без вариантов — текстовый.
+target: student / teacher / all (или студенты / учителя / все).
+
+JSON:
+    {"title": "...", "target_role": "all",
+     "questions": [{"text": "...", "options": ["...", "..."]}, ...]}
+
+CSV разбирается построчно прямо из файла, лимиты проверяются по ходу чтения —
+слишком большой файл отбрасывается на первой лишней строке. JSON читается
+целиком (у json из stdlib нет потокового разбора), поэтому размер файла
+проверяется до разбора.
+"""
+import csv
+import io
+import json
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Optional
+
+from .polls import NewQuestion, PollSnapshot
+
+MAX_FILE_SIZE = 1024 * 1024
+MAX_QUESTIONS = 200
+MAX_OPTIONS   = 20
+MAX_TITLE     = 200
+MAX_QUESTION  = 1000
+# вариант — текст reply-кнопки
+MAX_OPTION    = 100
+
+TARGETS = {"student": "student", "teacher": "teacher", "all": "all",
+           "студенты": "student", "учителя": "teacher", "все": "all"}
+
+
+class PollFormatError(ValueError):
+    """Файл опроса не разобран; текст — для пользователя."""
+
+
+@dataclass
+class PollDraft:
+    title:       str
+    target_role: str
+    questions:   list[NewQuestion]
+
+
+class _Builder:
+    """Собирает опрос по элементам и проверяет лимиты сразу при добавлении."""
+
+    def __init__(self):
+        self.title:  Optional[str] = None
+        self.target: Optional[str] = None
+        self._questions: list[tuple[str, list[str]]] = []
+
+    def set_title(self, text: str, where: str):
+        if not text or len(text) > MAX_TITLE:
+            raise PollFormatError(f"{where}: заголовок пустой или длиннее {MAX_TITLE} символов")
+        self.title = text
+
+    def set_target(self, text: str, where: str):
+        target = TARGETS.get(text.lower())
+        if target is None:
+            raise PollFormatError(f"{where}: неизвестная аудитория «{text}» "
+                                  f"(student, teacher или all)")
+        self.target = target
+
+    def add_question(self, text: str, where: str):
+        if not text or len(text) > MAX_QUESTION:
+            raise PollFormatError(f"{where}: вопрос пустой или длиннее {MAX_QUESTION} символов")
+        if len(self._questions) >= MAX_QUESTIONS:
+            raise PollFormatError(f"{where}: больше {MAX_QUESTIONS} вопросов")
+        self._questions.append((text, []))
+
+    def add_option(self, text: str, where: str):
+        if not self._questions:
+            raise PollFormatError(f"{where}: вариант ответа до первого вопроса")
+        if not text or len(text) > MAX_OPTION:
+            raise PollFormatError(f"{where}: вариант пустой или длиннее {MAX_OPTION} символов")
+        options = self._questions[-1][1]
+        if text in options:
+            # вариант выбирают кнопкой по тексту — дубликаты неразличимы
+            raise PollFormatError(f"{where}: вариант «{text}» повторяется")
+        if len(options) >= MAX_OPTIONS:
+            raise PollFormatError(f"{where}: больше {MAX_OPTIONS} вариантов у вопроса")
+        options.append(text)
+
+    def build(self) -> PollDraft:
+        if self.title is None:
+            raise PollFormatError("Нет заголовка опроса (title)")
+        if not self._questions:
+            raise PollFormatError("В опросе нет ни одного вопроса")
+        return PollDraft(
+            title=self.title,
+            target_role=self.target or "all",
+            questions=[NewQuestion(text, tuple(options)) for text, options in self._questions],
+        )
+
+
+def parse_poll_csv(lines: Iterable[str]) -> PollDraft:
+    lines = iter(lines)
+    head  = next(lines, "")
+    delimiter = ";" if head.count(";") > head.count(",") else ","
+    columns = [c.strip().lower() for c in next(csv.reader([head], delimiter=delimiter), [])]
+    if columns[:2] != ["kind", "text"]:
+        raise PollFormatError("Первая строка CSV должна быть заголовком: kind,text")
+
+    b = _Builder()
+    for lineno, values in enumerate(csv.reader(lines, delimiter=delimiter), start=2):
+        if not any(v.strip() for v in values):
+            continue
+        kind = values[0].strip().lower()
+        # запятые внутри текста без кавычек — не ошибка
+        text = delimiter.join(values[1:]).strip()
+        where = f"Строка {lineno}"
+        if kind == "title":
+            b.set_title(text, where)
+        elif kind == "target":
+            b.set_target(text, where)
+        elif kind == "question":
+            b.add_question(text, where)
+        elif kind == "option":
+            b.add_option(text, where)
+        else:
+            raise PollFormatError(f"{where}: неизвестный тип «{kind}» "
+                                  f"(title, target, question, option)")
+    return b.build()
+
+
+def parse_poll_json(fileobj: BinaryIO) -> PollDraft:
+    try:
+        data = json.load(io.TextIOWrapper(fileobj, encoding="utf-8-sig"))
+    except (UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise PollFormatError(f"Некорректный JSON: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get("questions"), list):
+        raise PollFormatError('Ожидается объект {"title": ..., "questions": [...]}')
+
+    b = _Builder()
+    b.set_title(str(data.get("title") or "").strip(), "title")
+    if data.get("target_role"):
+        b.set_target(str(data["target_role"]).strip(), "target_role")
+    for i, q in enumerate(data["questions"], start=1):
+        where = f"Вопрос {i}"
+        if not isinstance(q, dict):
+            raise PollFormatError(f'{where}: ожидается {{"text": ..., "options": [...]}}')
+        b.add_question(str(q.get("text") or "").strip(), where)
+        for option in q.get("options") or ():
+            b.add_option(str(option).strip(), where)
+    return b.build()
+
+
+def parse_poll_file(fileobj: BinaryIO, filename: str = "") -> PollDraft:
+    """
+    Разобрать файл опроса из двоичного файлового объекта (с seek); формат —
+    по расширению, без него — по первому символу.
+    """
+    if fileobj.seek(0, io.SEEK_END) > MAX_FILE_SIZE:
+        raise PollFormatError(f"Файл больше {MAX_FILE_SIZE // 1024} КБ")
+    fileobj.seek(0)
+    name = filename.lower()
+    if name.endswith(".json"):
+        is_json = True
+    elif name.endswith(".csv"):
+        is_json = False
+    else:
+        is_json = fileobj.read(256).lstrip()[:1] in (b"{", b"[")
+        fileobj.seek(0)
+    if is_json:
+        return parse_poll_json(fileobj)
+    text = io.TextIOWrapper(fileobj, encoding="utf-8-sig", errors="replace", newline="")
+    return parse_poll_csv(text)
+
+
+# ——— выгрузка ————————————————————————————————————————————————
+def dump_poll_csv(poll: PollSnapshot) -> io.BytesIO:
+    out = io.BytesIO()
+    text = io.TextIOWrapper(out, encoding="utf-8-sig", newline="")
+    writer = csv.writer(text)
+    writer.writerow(("kind", "text"))
+    writer.writerow(("title", poll.title))
+    writer.writerow(("target", poll.target_role))
+    for q in poll.questions:
+        writer.writerow(("question", q.text))
+        writer.writerows(("option", o.text) for o in q.options)
+    text.flush()
+    text.detach()
+    out.seek(0)
+    return out
+
+
+def dump_poll_json(poll: PollSnapshot) -> io.BytesIO:
+    data = {
+        "title": poll.title,
+        "target_role": poll.target_role,
+        "questions": [{"text": q.text, "options": [o.text for o in q.options]}
+                      for q in poll.questions],
+    }
+    return io.BytesIO(json.dumps(data, ensure_ascii=False, indent=2).encode("utf-8"))
+
+
+DUMPERS = {"csv": dump_poll_csv, "json": dump_poll_json}
@@ -0,0 +1,89 @@
+# services/poll_stats.py
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from models import Poll, Question, Answer, Response
+
+
+@dataclass
+class OptionStat:
+    text:    str
+    count:   int
+    percent: float
+
+
+@dataclass
+class QuestionStat:
+    id:      int
+    text:    str
+    type:    str
+    options: list[OptionStat]           = field(default_factory=list)
+    # свободные ответы: (user_id, response_text)
+    texts:   list[tuple[int, str]]      = field(default_factory=list)
+
+
+@dataclass
+class PollStats:
+    poll:      Poll
+    questions: list[QuestionStat]
+
+
+async def collect_poll_stats(s: AsyncSession, poll_id: int,
+                             with_texts: bool = True) -> Optional[PollStats]:
+    """
+    Статистика по всем вопросам опроса за фиксированное число запросов,
+    независимо от количества вопросов:
+      1) сам опрос,
+      2) счётчики по всем вариантам всех вопросов (один GROUP BY),
+      3) свободные ответы на текстовые вопросы (если with_texts).
+    """
+    poll = (await s.execute(
+        select(Poll).where(Poll.id == poll_id)
+    )).scalar_one_or_none()
+    if not poll:
+        return None
+
+    rows = (await s.execute(
+        select(
+            Question.id,
+            Question.question_text,
+            Question.question_type,
+            Answer.id,
+            Answer.answer_text,
+            func.count(Response.id),
+        )
+        .outerjoin(Answer,   Answer.question_id == Question.id)
+        .outerjoin(Response, Response.answer_id == Answer.id)
+        .where(Question.poll_id == poll_id)
+        .group_by(Question.id, Answer.id)
+        .order_by(Question.id, Answer.id)
+    )).all()
+
+    by_id: dict[int, QuestionStat] = {}
+    for q_id, q_text, q_type, a_id, a_text, cnt in rows:
+        q = by_id.get(q_id)
+        if q is None:
+            q = by_id[q_id] = QuestionStat(id=q_id, text=q_text, type=q_type)
+        if a_id is not None and q_type != "text":
+            q.options.append(OptionStat(text=a_text, count=cnt, percent=0.0))
+
+    for q in by_id.values():
+        total = sum(o.count for o in q.options) or 1
+        for o in q.options:
+            o.percent = o.count / total * 100
+
+    if with_texts and any(q.type == "text" for q in by_id.values()):
+        texts = (await s.execute(
+            select(Response.question_id, Response.user_id, Response.response_text)
+            .join(Question, Question.id == Response.question_id)
+            .where(Question.poll_id == poll_id, Question.question_type == "text")
+            .order_by(Response.question_id, Response.id)
+        )).all()
+        for q_id, uid, txt in texts:
+            by_id[q_id].texts.append((uid, txt))
+
+    return PollStats(poll=poll, questions=list(by_id.values()))
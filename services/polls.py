@@ -0,0 +1,259 @@
+# services/polls.py
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional, Sequence
+
+from sqlalchemy import and_, cast, exists, func, insert, or_
+from sqlalchemy.dialects.postgresql import REGCLASS
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+from sqlalchemy.orm import selectinload
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import Answer, Poll, PollCompletion, Question, User
+from .cache import TTLCache
+
+cfg = load_config()
+
+
+@dataclass(frozen=True)
+class OptionSnapshot:
+    id:   int
+    text: str
+
+
+@dataclass(frozen=True)
+class QuestionSnapshot:
+    id:         int
+    text:       str
+    type:       str
+    options:    tuple[OptionSnapshot, ...]
+    # текст кнопки → id варианта (для разбора ответа без запроса в БД)
+    option_ids: Mapping[str, int]
+
+
+@dataclass(frozen=True)
+class PollSnapshot:
+    id:          int
+    title:       str
+    target_role: str
+    group_id:    Optional[int]
+    questions:   tuple[QuestionSnapshot, ...]
+    by_id:       Mapping[int, QuestionSnapshot]
+
+
+async def _load_snapshot(poll_id: int) -> Optional[PollSnapshot]:
+    async with AsyncSessionLocal() as s:
+        poll = (await s.execute(
+            select(Poll)
+            .options(selectinload(Poll.questions).selectinload(Question.answers))
+            .where(Poll.id == poll_id)
+        )).scalar_one_or_none()
+    if not poll:
+        return None
+
+    questions = []
+    for q in sorted(poll.questions, key=lambda q: q.id):
+        options = tuple(OptionSnapshot(a.id, a.answer_text)
+                        for a in sorted(q.answers, key=lambda a: a.id))
+        questions.append(QuestionSnapshot(
+            id=q.id,
+            text=q.question_text,
+            type=q.question_type,
+            options=options,
+            option_ids=MappingProxyType({o.text: o.id for o in options}),
+        ))
+    return PollSnapshot(
+        id=poll.id,
+        title=poll.title,
+        target_role=poll.target_role,
+        group_id=poll.group_id,
+        questions=tuple(questions),
+        by_id=MappingProxyType({q.id: q for q in questions}),
+    )
+
+
+# Неизменяемые снимки опросов {poll_id: PollSnapshot | None}
+poll_cache = TTLCache(_load_snapshot, ttl=cfg.POLL_CACHE_TTL, maxsize=cfg.POLL_CACHE_SIZE)
+
+
+async def get_poll_snapshot(poll_id: int) -> Optional[PollSnapshot]:
+    """Опрос со всеми вопросами и вариантами; из БД — только при первом обращении."""
+    return await poll_cache.get(poll_id)
+
+
+@dataclass(frozen=True)
+class PollListItem:
+    id:    int
+    title: str
+
+
+def audience_clause():
+    """Пользователь (User) входит в аудиторию опроса (Poll): роль или «all», группа или без группы."""
+    return and_(
+        or_(Poll.target_role == User.role, Poll.target_role == "all"),
+        or_(Poll.group_id.is_(None), Poll.group_id == User.group_id),
+    )
+
+
+def available_polls_stmt(tg_id: int):
+    """
+    Опросы, которые пользователь может пройти, — одним запросом:
+    роль (или «all»), группа (или опрос без группы) и NOT EXISTS по прохождениям.
+    """
+    completed = exists().where(
+        PollCompletion.poll_id == Poll.id,
+        PollCompletion.user_id == tg_id,
+    )
+    return (
+        select(Poll.id, Poll.title)
+        .join(User, User.tg_id == tg_id)
+        .where(audience_clause(), ~completed)
+        .order_by(Poll.id)
+    )
+
+
+async def _load_available(tg_id: int) -> tuple[PollListItem, ...]:
+    async with AsyncSessionLocal() as s:
+        rows = (await s.execute(available_polls_stmt(tg_id))).all()
+    return tuple(PollListItem(r.id, r.title) for r in rows)
+
+
+# Доступные опросы {tg_id: (PollListItem, ...)}
+available_cache = TTLCache(_load_available,
+                           ttl=cfg.AVAILABLE_POLLS_TTL, maxsize=cfg.AVAILABLE_POLLS_SIZE)
+
+
+async def get_available_polls(tg_id: int) -> tuple[PollListItem, ...]:
+    """Непройденные опросы пользователя по роли и группе (через кэш)."""
+    return await available_cache.get(tg_id)
+
+
+@dataclass(frozen=True)
+class PollPage:
+    items:    tuple[PollListItem, ...]
+    has_prev: bool
+    has_next: bool
+
+
+def _make_page(items: list, limit: int, after: Optional[int], before: Optional[int]) -> PollPage:
+    """items — до limit + 1 строк по порядку обхода; лишняя строка = есть ещё страница."""
+    more  = len(items) > limit
+    items = items[:limit]
+    if before is not None:
+        # шли назад (id DESC) — разворачиваем, следующая страница заведомо есть
+        return PollPage(tuple(reversed(items)), has_prev=more, has_next=True)
+    return PollPage(tuple(items), has_prev=after is not None, has_next=more)
+
+
+def poll_page_stmt(after: Optional[int] = None, before: Optional[int] = None, limit: int = 10):
+    """
+    Keyset-страница всех опросов: ``id > after`` (вперёд) или ``id < before`` (назад),
+    limit + 1 строк — по лишней видно, есть ли страница дальше. Без OFFSET,
+    по первичному ключу: цена страницы не зависит от её номера.
+    """
+    stmt = select(Poll.id, Poll.title)
+    if before is not None:
+        return stmt.where(Poll.id < before).order_by(Poll.id.desc()).limit(limit + 1)
+    if after is not None:
+        stmt = stmt.where(Poll.id > after)
+    return stmt.order_by(Poll.id).limit(limit + 1)
+
+
+async def get_polls_page(after: Optional[int] = None, before: Optional[int] = None,
+                         limit: int = cfg.POLL_PAGE_SIZE) -> PollPage:
+    """Страница списка всех опросов (для управления, редактора, статистики)."""
+    async with AsyncSessionLocal() as s:
+        rows = (await s.execute(poll_page_stmt(after, before, limit))).all()
+    return _make_page([PollListItem(r.id, r.title) for r in rows], limit, after, before)
+
+
+async def get_available_page(tg_id: int, after: Optional[int] = None, before: Optional[int] = None,
+                             limit: int = cfg.POLL_PAGE_SIZE) -> PollPage:
+    """Страница доступных пользователю опросов — тот же keyset по id, но поверх кэша."""
+    polls = await get_available_polls(tg_id)
+    ids   = [p.id for p in polls]
+    if before is not None:
+        end   = bisect_left(ids, before)
+        items = list(reversed(polls[max(0, end - limit - 1):end]))
+    else:
+        start = bisect_right(ids, after) if after is not None else 0
+        items = list(polls[start:start + limit + 1])
+    return _make_page(items, limit, after, before)
+
+
+def invalidate_available(tg_id: Optional[int] = None):
+    """Сбросить список одного пользователя (прошёл опрос, сменил роль/группу) или всех."""
+    available_cache.invalidate(tg_id)
+
+
+# растёт при любом изменении опросов — версия для кэшей, построенных из их содержимого
+_version = 0
+
+
+def polls_version() -> int:
+    return _version
+
+
+def invalidate_poll(poll_id: Optional[int] = None):
+    """Вызывать после создания, удаления или любого изменения опроса, его вопросов или вариантов."""
+    global _version
+    _version += 1
+    poll_cache.invalidate(poll_id)
+    # название/аудитория могли поменяться — списки доступных опросов тоже неактуальны
+    available_cache.invalidate()
+
+
+@dataclass(frozen=True)
+class NewQuestion:
+    text:    str
+    answers: tuple[str, ...] = ()   # пусто — текстовый вопрос
+
+
+async def insert_poll(s: AsyncSession, title: str, target_role: str, created_by: int,
+                      questions: Sequence[NewQuestion], group_id: Optional[int] = None) -> int:
+    """
+    Записать опрос с вопросами и вариантами в сессию ``s`` без commit: опрос,
+    все вопросы и все варианты — по одному INSERT (плюс выборка id вопросов),
+    сколько бы вопросов ни было. Возвращает id опроса; после commit вызывающий
+    сбрасывает кэш (invalidate_poll).
+    """
+    poll_id = (await s.execute(
+        insert(Poll)
+        .values(title=title, target_role=target_role, group_id=group_id, created_by=created_by)
+        .returning(Poll.id)
+    )).scalar_one()
+
+    # id вопросов берём из последовательности заранее и вставляем явно:
+    # порядок строк RETURNING не гарантирован, а так вопрос i получает
+    # i-й по возрастанию id (вопросы выводятся в порядке id) и свои варианты
+    seq = cast(func.pg_get_serial_sequence(Question.__tablename__, "id"), REGCLASS)
+    q_ids = sorted((await s.execute(
+        select(func.nextval(seq)).select_from(func.generate_series(1, len(questions)))
+    )).scalars().all())
+    await s.execute(insert(Question), [
+        {"id": q_id, "poll_id": poll_id, "question_text": q.text,
+         "question_type": "single_choice" if q.answers else "text"}
+        for q_id, q in zip(q_ids, questions)
+    ])
+
+    answers = [{"question_id": q_id, "answer_text": a}
+               for q_id, q in zip(q_ids, questions) for a in q.answers]
+    if answers:
+        await s.execute(insert(Answer), answers)
+    return poll_id
+
+
+async def create_poll(title: str, target_role: str, created_by: int,
+                      questions: Sequence[NewQuestion], group_id: Optional[int] = None) -> int:
+    """
+    Сохранить опрос одной транзакцией (см. insert_poll). При ошибке не остаётся
+    наполовину записанного опроса. Возвращает id опроса.
+    """
+    async with AsyncSessionLocal() as s:
+        poll_id = await insert_poll(s, title, target_role, created_by, questions, group_id)
+        await s.commit()
+    invalidate_poll(poll_id)
+    return poll_id
@@ -0,0 +1,193 @@
+# services/reminders.py
+"""
+Напоминания тем, кто ещё не прошёл опрос.
+
+* Расписания — таблица reminder_schedules (одно на опрос): период в часах или
+  «один раз»; next_run_at — курсор планировщика.
+* ReminderScheduler раз в REMINDER_TICK секунд забирает наступившие расписания
+  (FOR UPDATE SKIP LOCKED) и для каждого одним INSERT ... SELECT с анти-join
+  по poll_completions ставит сообщения в outbox (kind = 'reminder',
+  ref_id = id запуска). Отправляет их Broadcaster с общими лимитами.
+* Запуск, строки outbox и сдвиг курсора — одна транзакция: после падения
+  либо всё уже сделано, либо будет сделано заново, но не дважды.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import delete, exists, func, literal, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.future import select
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import Notification, Poll, PollCompletion, ReminderRun, ReminderSchedule, User
+from .broadcast import broadcaster, escape_html
+from .metrics import Counter
+from .polls import audience_clause
+
+cfg = load_config()
+
+QUEUED = Counter("reminders_queued_total", "Напоминаний поставлено в outbox")
+
+
+def non_completers_stmt(poll_id: int, *columns):
+    """
+    Аудитория опроса без прошедших его (и без автора) — анти-join
+    NOT EXISTS по poll_completions, один запрос на опрос.
+    """
+    completed = exists().where(
+        PollCompletion.poll_id == Poll.id,
+        PollCompletion.user_id == User.tg_id,
+    )
+    return (
+        select(*columns)
+        .select_from(Poll)
+        .join(User, audience_clause())
+        .where(Poll.id == poll_id, User.tg_id != Poll.created_by, ~completed)
+    )
+
+
+@dataclass(frozen=True)
+class ReminderInfo:
+    pending:     int                  # сколько ещё не прошли
+    every_hours: Optional[int]
+    next_run_at: Optional[datetime]   # None — напоминаний нет
+
+
+async def get_reminder_info(poll_id: int) -> ReminderInfo:
+    async with AsyncSessionLocal() as s:
+        pending = (await s.execute(non_completers_stmt(poll_id, func.count()))).scalar_one()
+        sch = (await s.execute(
+            select(ReminderSchedule).where(ReminderSchedule.poll_id == poll_id)
+        )).scalar_one_or_none()
+    if sch is None:
+        return ReminderInfo(pending, None, None)
+    return ReminderInfo(pending, sch.every_hours, sch.next_run_at)
+
+
+async def _upsert(poll_id: int, created_by: int, **values):
+    async with AsyncSessionLocal() as s:
+        await s.execute(
+            pg_insert(ReminderSchedule)
+            .values(poll_id=poll_id, created_by=created_by, **values)
+            .on_conflict_do_update(index_elements=["poll_id"], set_=values)
+        )
+        await s.commit()
+
+
+async def schedule_reminders(poll_id: int, created_by: int, every_hours: int):
+    """Напоминать каждые ``every_hours`` часов, первый раз — через период."""
+    await _upsert(poll_id, created_by, every_hours=every_hours,
+                  next_run_at=func.now() + timedelta(hours=every_hours))
+
+
+async def remind_now(poll_id: int, created_by: int):
+    """Напомнить при ближайшей проверке; период, если он задан, сохраняется."""
+    await _upsert(poll_id, created_by, next_run_at=func.now())
+    reminder_scheduler.wakeup()
+
+
+async def cancel_reminders(poll_id: int):
+    async with AsyncSessionLocal() as s:
+        await s.execute(delete(ReminderSchedule).where(ReminderSchedule.poll_id == poll_id))
+        await s.commit()
+
+
+def _next_run(sch: ReminderSchedule, now: datetime) -> Optional[datetime]:
+    if sch.every_hours is None:
+        return None
+    step = timedelta(hours=sch.every_hours)
+    nxt  = sch.next_run_at + step
+    # бот стоял дольше периода — пропущенные запуски не догоняем
+    return nxt if nxt > now else now + step
+
+
+class ReminderScheduler:
+    """Фоновая проверка расписаний в цикле событий бота."""
+
+    def __init__(self, tick: float, batch: int):
+        self._tick   = tick
+        self._batch  = batch
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task:   Optional[asyncio.Task]  = None
+
+    def start(self):
+        self._wakeup = asyncio.Event()
+        self._task   = asyncio.create_task(self._loop())
+
+    def wakeup(self):
+        """Появилось расписание «сейчас» — не ждать тика."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def close(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                if await self.run_due():
+                    broadcaster.wakeup()
+            except Exception:
+                logging.exception("reminders: run failed")
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self._tick)
+            finally:
+                waiter.cancel()
+            self._wakeup.clear()
+
+    async def run_due(self) -> int:
+        """Выполнить наступившие расписания; возвращает число поставленных сообщений."""
+        queued = 0
+        async with AsyncSessionLocal() as s:
+            now = (await s.execute(select(func.now()))).scalar_one()
+            due = (await s.execute(
+                select(ReminderSchedule)
+                .where(ReminderSchedule.next_run_at <= now)
+                .order_by(ReminderSchedule.next_run_at)
+                .limit(self._batch)
+                .with_for_update(skip_locked=True)
+            )).scalars().all()
+            for sch in due:
+                queued += await self._run(s, sch)
+                sch.last_run_at = now
+                sch.next_run_at = _next_run(sch, now)
+            await s.commit()
+        if queued:
+            QUEUED.inc(queued)
+        return queued
+
+    @staticmethod
+    async def _run(s, sch: ReminderSchedule) -> int:
+        run_id = (await s.execute(
+            pg_insert(ReminderRun)
+            .values(schedule_id=sch.id, poll_id=sch.poll_id, due_at=sch.next_run_at)
+            .on_conflict_do_nothing(index_elements=["schedule_id", "due_at"])
+            .returning(ReminderRun.id)
+        )).scalar_one_or_none()
+        if run_id is None:
+            return 0
+
+        body = (literal("⏰ Вы ещё не прошли опрос «") + escape_html(Poll.title)
+                + literal("».\nОн ждёт вас в «📋 Пройти опрос»."))
+        res = await s.execute(
+            pg_insert(Notification)
+            .from_select(["kind", "ref_id", "chat_id", "body"], non_completers_stmt(
+                sch.poll_id, literal("reminder"), literal(run_id), User.tg_id, body))
+            .on_conflict_do_nothing(index_elements=["kind", "ref_id", "chat_id"])
+        )
+        await s.execute(
+            update(ReminderRun).where(ReminderRun.id == run_id).values(recipients=res.rowcount)
+        )
+        return res.rowcount
+
+
+reminder_scheduler = ReminderScheduler(tick=cfg.REMINDER_TICK, batch=cfg.REMINDER_BATCH)
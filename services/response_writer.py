@@ -0,0 +1,225 @@
+# services/response_writer.py
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import DataError, IntegrityError
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import Response, PollCompletion
+from .metrics import Counter
+
+cfg = load_config()
+
+# asyncpg ограничивает число параметров в запросе (32767) — режем на части
+_CHUNK = 1000
+
+# повтор не поможет: строка ссылается на удалённый вопрос/вариант, битые данные
+PERMANENT_ERRORS = (IntegrityError, DataError)
+
+DROPPED = Counter("response_writer_dropped_total", "Строки, которые буфер ответов не смог записать",
+                  labels=("reason",))
+
+
+class ResponsesRejected(Exception):
+    """БД отвергла часть ответов пользователя (опрос изменили, пока его проходили)."""
+
+
+@dataclass
+class _Batch:
+    responses:   list[dict]
+    completions: list[dict]
+    # (user_id, future) — ожидающие complete()
+    waiters:     list[tuple[int, asyncio.Future]] = field(default_factory=list)
+    attempts:    int = 0
+
+
+def _resolve(waiters: list[tuple[int, asyncio.Future]], error: Optional[BaseException] = None,
+             rejected: frozenset = frozenset()):
+    for user_id, w in waiters:
+        if w.done():
+            continue
+        if error is None and user_id in rejected:
+            w.set_exception(ResponsesRejected(user_id))
+        elif error is None:
+            w.set_result(None)
+        else:
+            w.set_exception(error)
+
+
+class ResponseWriter:
+    """
+    Write-behind буфер ответов на опросы.
+
+    Ответы (Response) и отметки о прохождении (PollCompletion) всех пользователей
+    копятся в памяти и пишутся одной транзакцией с multi-row INSERT — раз в
+    ``interval`` секунд или сразу, как только набралось ``batch_size`` строк.
+    ``complete()`` дожидается записи, поэтому к моменту «✅ Вы завершили опрос!»
+    все строки пользователя уже в БД.
+
+    Ошибки записи:
+    * постоянные (IntegrityError, DataError — например, вопрос удалили, пока его
+      ответы лежали в буфере): пачка пишется заново построчно, каждая строка в
+      своём SAVEPOINT; отвергнутые строки отбрасываются с записью в лог,
+      прохождение такого пользователя не отмечается, а его ``complete()``
+      бросает ResponsesRejected;
+    * остальные (соединение, таймаут): пачка повторяется со следующей записью,
+      не больше ``max_retries`` раз, затем отбрасывается с записью в лог.
+    Плохие строки не задерживают ни новые ответы, ни ожидающих ``complete()``.
+    """
+
+    def __init__(self, batch_size: int, interval: float, max_retries: int = 5):
+        self._batch_size  = batch_size
+        self._interval    = interval
+        self._max_retries = max_retries
+        self._responses:   list[dict] = []
+        self._completions: list[dict] = []
+        self._waiters:     list[tuple[int, asyncio.Future]] = []
+        self._retry:       list[_Batch] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task:   Optional[asyncio.Task]  = None
+        self._lock:   Optional[asyncio.Lock]  = None
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._lock   = asyncio.Lock()
+            self._task   = asyncio.create_task(self._loop())
+
+    def pending(self) -> int:
+        return (len(self._responses) + len(self._completions)
+                + sum(len(b.responses) + len(b.completions) for b in self._retry))
+
+    def add_response(self, user_id: int, question_id: int,
+                     answer_id: Optional[int] = None, response_text: Optional[str] = None):
+        self._ensure_started()
+        self._responses.append({
+            "user_id":       user_id,
+            "question_id":   question_id,
+            "answer_id":     answer_id,
+            "response_text": response_text,
+        })
+        if self.pending() >= self._batch_size:
+            self._wakeup.set()
+
+    async def complete(self, user_id: int, poll_id: int):
+        """
+        Отметить прохождение и дождаться, пока все накопленные строки будут записаны.
+        ResponsesRejected — часть ответов пользователя БД не приняла, прохождение не отмечено.
+        """
+        self._ensure_started()
+        self._completions.append({"user_id": user_id, "poll_id": poll_id})
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append((user_id, fut))
+        self._wakeup.set()
+        await fut
+
+    async def _loop(self):
+        while True:
+            # asyncio.wait, а не wait_for: отмена задачи при close() не теряется
+            waiter = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({waiter}, timeout=self._interval)
+            finally:
+                waiter.cancel()
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("response writer: flush failed")
+
+    async def flush(self):
+        if self._lock is None:
+            return
+        async with self._lock:
+            batches, self._retry = self._retry, []
+            if self._responses or self._completions or self._waiters:
+                batches.append(_Batch(self._responses, self._completions, self._waiters))
+                self._responses, self._completions, self._waiters = [], [], []
+            for i, batch in enumerate(batches):
+                try:
+                    await self._process(batch)
+                except BaseException:
+                    # отмена посреди записи: незаписанное вернётся при close()
+                    self._retry[:0] = batches[i:]
+                    raise
+
+    async def _process(self, batch: _Batch):
+        rejected = frozenset()
+        try:
+            try:
+                await self._write(batch)
+            except PERMANENT_ERRORS as e:
+                logging.warning(f"response writer: batch rejected ({e.__class__.__name__}), "
+                                f"writing row by row")
+                rejected = await self._write_rows(batch)
+        except Exception as e:
+            batch.attempts += 1
+            if batch.attempts < self._max_retries:
+                logging.warning(f"response writer: flush failed ({e!r}), "
+                                f"retry {batch.attempts}/{self._max_retries}")
+                self._retry.append(batch)
+                return
+            logging.error(f"response writer: giving up after {batch.attempts} attempts ({e!r}), "
+                          f"dropped responses={batch.responses} completions={batch.completions}")
+            DROPPED.inc(len(batch.responses) + len(batch.completions), reason="retries")
+            return _resolve(batch.waiters, e)
+        _resolve(batch.waiters, rejected=rejected)
+
+    @staticmethod
+    async def _write(batch: _Batch):
+        async with AsyncSessionLocal() as s:
+            for i in range(0, len(batch.responses), _CHUNK):
+                await s.execute(insert(Response).values(batch.responses[i:i + _CHUNK]))
+            for i in range(0, len(batch.completions), _CHUNK):
+                await s.execute(
+                    pg_insert(PollCompletion)
+                    .values(batch.completions[i:i + _CHUNK])
+                    .on_conflict_do_nothing()
+                )
+            await s.commit()
+
+    @staticmethod
+    async def _write_rows(batch: _Batch) -> frozenset:
+        """Записать пачку построчно; вернуть пользователей, чьи строки отвергнуты."""
+        rejected = set()
+
+        async def write(stmt, kind: str, row: dict):
+            try:
+                async with s.begin_nested():
+                    await s.execute(stmt)
+            except PERMANENT_ERRORS as e:
+                logging.error(f"response writer: dropped {kind} {row}: {getattr(e, 'orig', e)}")
+                DROPPED.inc(reason="rejected")
+                rejected.add(row["user_id"])
+
+        # одна транзакция, по SAVEPOINT на строку: отвергнутая строка не откатывает остальные
+        async with AsyncSessionLocal() as s:
+            for r in batch.responses:
+                await write(insert(Response).values(r), "response", r)
+            for c in batch.completions:
+                if c["user_id"] in rejected:
+                    # ответы записаны не все — опрос можно будет пройти заново
+                    logging.error(f"response writer: completion {c} skipped, responses rejected")
+                    DROPPED.inc(reason="rejected")
+                    continue
+                await write(pg_insert(PollCompletion).values(c).on_conflict_do_nothing(),
+                            "completion", c)
+            await s.commit()
+        return frozenset(rejected)
+
+    async def close(self):
+        """Остановить фоновую запись и сбросить всё, что осталось в буфере."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self.flush()
+
+
+response_writer = ResponseWriter(cfg.RESPONSE_BATCH_SIZE, cfg.RESPONSE_FLUSH_INTERVAL,
+                                 cfg.RESPONSE_MAX_RETRIES)
@@ -0,0 +1,106 @@
+# services/roster.py
+"""
+Импорт списка пользователей из CSV.
+
+Формат (первая строка — заголовок, разделитель «,» или «;»):
+    tg_id,role,group,surname,name,patronymic
+Обязательны tg_id и role; пустые ячейки не затирают уже заполненные поля.
+
+    python -m services.roster roster.csv
+"""
+import asyncio
+import csv
+import logging
+import re
+import sys
+from dataclasses import dataclass, field
+
+from .groups import ensure_groups
+from .users import ROLES, upsert_users
+
+OPTIONAL = ("surname", "name", "patronymic")
+
+
+@dataclass
+class RosterResult:
+    imported: int = 0
+    skipped:  list[tuple[int, str]] = field(default_factory=list)   # (номер строки, причина)
+
+
+def parse_roster(lines) -> tuple[list[dict], list[tuple[int, str]]]:
+    """Разобрать CSV: строки для upsert_users (group — ещё название) и пропущенные строки."""
+    lines = iter(lines)
+    head  = next(lines, "")
+    delimiter = ";" if head.count(";") > head.count(",") else ","
+    columns = [c.strip().lower() for c in next(csv.reader([head], delimiter=delimiter), [])]
+    if "tg_id" not in columns or "role" not in columns:
+        raise ValueError("В заголовке должны быть колонки tg_id и role")
+
+    rows, skipped = [], []
+    has_group = "group" in columns
+    for lineno, values in enumerate(csv.reader(lines, delimiter=delimiter), start=2):
+        if not any(v.strip() for v in values):
+            continue
+        raw  = {c: v.strip() for c, v in zip(columns, values)}
+        tg   = raw.get("tg_id", "")
+        role = raw.get("role", "").lower()
+        if not tg.lstrip("-").isdigit():
+            skipped.append((lineno, f"неверный tg_id «{tg}»"))
+            continue
+        if role not in ROLES:
+            skipped.append((lineno, f"неизвестная роль «{role}»"))
+            continue
+        row = {"tg_id": int(tg), "role": role}
+        if has_group:
+            row["group"] = raw.get("group") or None
+        for col in OPTIONAL:
+            if col in columns:
+                row[col] = raw.get(col) or None
+        rows.append(row)
+    return rows, skipped
+
+
+def parse_ids(text: str) -> tuple[list[int], list[str]]:
+    """
+    Список Telegram ID из вставленного текста или файла: через пробелы, запятые,
+    «;» или с новой строки. Возвращает (id, нераспознанные фрагменты).
+    """
+    ids, bad = [], []
+    for token in re.split(r"[\s,;]+", text):
+        if not token:
+            continue
+        if token.isdigit():
+            ids.append(int(token))
+        else:
+            bad.append(token)
+    return ids, bad
+
+
+async def import_roster(path: str) -> RosterResult:
+    """Группы — одним INSERT ... ON CONFLICT DO NOTHING, пользователи — через upsert_users."""
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        rows, skipped = parse_roster(f)
+
+    if rows and "group" in rows[0]:
+        group_ids = await ensure_groups(r["group"] for r in rows if r["group"])
+        for r in rows:
+            r["group_id"] = group_ids.get(r.pop("group"))
+
+    return RosterResult(imported=await upsert_users(rows), skipped=skipped)
+
+
+async def _main(path: str):
+    from database import engine
+    try:
+        res = await import_roster(path)
+    finally:
+        await engine.dispose()
+    for lineno, reason in res.skipped:
+        logging.warning(f"строка {lineno}: {reason}")
+    print(f"✅ Импортировано пользователей: {res.imported}, пропущено строк: {len(res.skipped)}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        sys.exit("usage: python -m services.roster roster.csv")
+    asyncio.run(_main(sys.argv[1]))
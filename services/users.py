@@ -0,0 +1,241 @@
+# services/users.py
+import asyncio
+import tempfile
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from sqlalchemy import BigInteger, any_, bindparam, func, literal_column, update
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.future import select
+
+from config import load_config
+from database import AsyncSessionLocal
+from models import Group, User
+from .cache import TTLCache
+from .poll_export import SINKS
+from .polls import invalidate_available
+
+cfg = load_config()
+
+
+async def _load_user(tg_id: int) -> Optional[User]:
+    async with AsyncSessionLocal() as s:
+        return (await s.execute(
+            select(User).where(User.tg_id == tg_id)
+        )).scalar_one_or_none()
+
+
+# Кэш {tg_id: User | None}. Храним и «не найден», чтобы незарегистрированные
+# пользователи не били в БД на каждое нажатие.
+user_cache = TTLCache(_load_user, ttl=cfg.USER_CACHE_TTL, maxsize=cfg.USER_CACHE_SIZE)
+
+
+async def get_user(tg_id: int) -> Optional[User]:
+    """Пользователь по Telegram ID (через кэш). Объект отсоединён от сессии — только для чтения."""
+    return await user_cache.get(tg_id)
+
+
+def invalidate_users(tg_ids: Optional[Iterable[int]] = None):
+    """Вызывать после любой записи в users. Без аргументов — сбросить всё."""
+    # доступные опросы зависят от роли и группы пользователя
+    if tg_ids is None:
+        user_cache.invalidate()
+        invalidate_available()
+        return
+    for tg in tg_ids:
+        user_cache.invalidate(tg)
+        invalidate_available(tg)
+
+
+ROLES = ("admin", "teacher", "student")
+
+# asyncpg: не больше 32767 параметров на запрос
+_MAX_PARAMS = 32767
+
+
+async def upsert_users(rows: Iterable[dict]) -> int:
+    """
+    Массовое добавление/обновление пользователей: INSERT ... ON CONFLICT (tg_id) DO UPDATE.
+
+    Все строки должны иметь одинаковый набор ключей (tg_id, role и по желанию
+    group_id/surname/name/patronymic). Роль перезаписывается всегда, остальные
+    поля — только если в строке не None. Повторы tg_id схлопываются, побеждает
+    последний. Возвращает число уникальных tg_id.
+    """
+    unique = {r["tg_id"]: r for r in rows}
+    if not unique:
+        return 0
+    rows = list(unique.values())
+    chunk = _MAX_PARAMS // len(rows[0])
+
+    async with AsyncSessionLocal() as s:
+        for i in range(0, len(rows), chunk):
+            stmt = pg_insert(User).values(rows[i:i + chunk])
+            set_ = {
+                col: (stmt.excluded[col] if col == "role"
+                      else func.coalesce(stmt.excluded[col], User.__table__.c[col]))
+                for col in rows[0] if col != "tg_id"
+            }
+            await s.execute(stmt.on_conflict_do_update(index_elements=[User.tg_id], set_=set_))
+        await s.commit()
+    invalidate_users(unique)
+    return len(rows)
+
+
+
+@dataclass(frozen=True)
+class BulkResult:
+    inserted: int
+    updated:  int
+    skipped:  int   # уже были с такой ролью/группой или не найдены
+
+
+async def bulk_set_role(tg_ids: Iterable[int], role: str) -> BulkResult:
+    """
+    Выдать роль списку пользователей одной транзакцией:
+    INSERT ... ON CONFLICT (tg_id) DO UPDATE ... WHERE роль другая RETURNING (xmax = 0).
+    xmax = 0 у только что вставленной строки — так отличаем добавленных от обновлённых;
+    строки с той же ролью не трогаются и не возвращаются.
+    """
+    ids = list(dict.fromkeys(tg_ids))
+    inserted = updated = 0
+    chunk = _MAX_PARAMS // 2
+    async with AsyncSessionLocal() as s:
+        for i in range(0, len(ids), chunk):
+            stmt = pg_insert(User).values([{"tg_id": tg, "role": role} for tg in ids[i:i + chunk]])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[User.tg_id],
+                set_={"role": stmt.excluded.role},
+                where=User.role != stmt.excluded.role,
+            ).returning(literal_column("xmax = 0"))
+            for (is_new,) in (await s.execute(stmt)).all():
+                if is_new:
+                    inserted += 1
+                else:
+                    updated += 1
+        await s.commit()
+    invalidate_users(ids)
+    return BulkResult(inserted, updated, len(ids) - inserted - updated)
+
+
+async def bulk_assign_group(tg_ids: Iterable[int], group_name: str) -> BulkResult:
+    """
+    Перевести список пользователей в группу одной транзакцией (группа создаётся при
+    необходимости). Один UPDATE ... WHERE tg_id = ANY(:ids) — массив одним параметром;
+    незарегистрированные и уже состоящие в группе — в skipped.
+    """
+    ids = list(dict.fromkeys(tg_ids))
+    async with AsyncSessionLocal() as s:
+        await s.execute(
+            pg_insert(Group).values(name=group_name)
+            .on_conflict_do_nothing(index_elements=[Group.name])
+        )
+        group_id = (await s.execute(
+            select(Group.id).where(Group.name == group_name)
+        )).scalar_one()
+        changed = (await s.execute(
+            update(User)
+            .where(User.tg_id == any_(bindparam("ids", ids, type_=ARRAY(BigInteger))),
+                   User.group_id.is_distinct_from(group_id))
+            .values(group_id=group_id)
+            .returning(User.tg_id)
+            .execution_options(synchronize_session=False)
+        )).scalars().all()
+        await s.commit()
+    invalidate_users(changed)
+    return BulkResult(0, len(changed), len(ids) - len(changed))
+
+
+@dataclass(frozen=True)
+class UserRow:
+    id:         int
+    tg_id:      int
+    role:       str
+    surname:    Optional[str]
+    name:       Optional[str]
+    group_name: Optional[str]
+
+
+@dataclass(frozen=True)
+class UserPage:
+    items:    tuple[UserRow, ...]
+    has_prev: bool
+    has_next: bool
+
+
+def users_page_stmt(role: Optional[str] = None, group_id: Optional[int] = None,
+                    after: Optional[int] = None, before: Optional[int] = None,
+                    limit: int = 20):
+    """
+    Keyset-страница пользователей (limit + 1 строк) с фильтром по роли и/или группе.
+    Фильтр + ORDER BY id обслуживают индексы (role, id) и (group_id, id).
+    """
+    stmt = (
+        select(User.id, User.tg_id, User.role, User.surname, User.name,
+               Group.name.label("group_name"))
+        .outerjoin(Group, Group.id == User.group_id)
+    )
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if group_id is not None:
+        stmt = stmt.where(User.group_id == group_id)
+    if before is not None:
+        return stmt.where(User.id < before).order_by(User.id.desc()).limit(limit + 1)
+    if after is not None:
+        stmt = stmt.where(User.id > after)
+    return stmt.order_by(User.id).limit(limit + 1)
+
+
+async def get_users_page(role: Optional[str] = None, group_id: Optional[int] = None,
+                         after: Optional[int] = None, before: Optional[int] = None,
+                         limit: int = cfg.USER_PAGE_SIZE) -> UserPage:
+    async with AsyncSessionLocal() as s:
+        rows = (await s.execute(users_page_stmt(role, group_id, after, before, limit))).all()
+    items = [UserRow(*r) for r in rows]
+    more  = len(items) > limit
+    items = items[:limit]
+    if before is not None:
+        return UserPage(tuple(reversed(items)), has_prev=more, has_next=True)
+    return UserPage(tuple(items), has_prev=after is not None, has_next=more)
+
+
+USERS_HEADER = ["Telegram ID", "Фамилия", "Имя", "Отчество", "Роль", "Группа"]
+
+
+async def export_users(fmt: str = "csv", role: Optional[str] = None,
+                       group_id: Optional[int] = None) -> tuple:
+    """
+    Все пользователи (с тем же фильтром, что в просмотре) в файл.
+
+    Строки читаются серверным курсором порциями по EXPORT_CHUNK_SIZE и сразу
+    пишутся в SpooledTemporaryFile — память не зависит от числа пользователей.
+    Возвращает (файл, имя_файла); файл перемотан в начало, закрывает вызывающий.
+    """
+    sink_cls = SINKS[fmt]
+    chunk = cfg.EXPORT_CHUNK_SIZE
+    stmt = (
+        select(User.tg_id, User.surname, User.name, User.patronymic, User.role, Group.name)
+        .outerjoin(Group, Group.id == User.group_id)
+        .order_by(User.id)
+        .execution_options(yield_per=chunk)
+    )
+    if role is not None:
+        stmt = stmt.where(User.role == role)
+    if group_id is not None:
+        stmt = stmt.where(User.group_id == group_id)
+
+    out = tempfile.SpooledTemporaryFile(max_size=cfg.EXPORT_SPOOL_MAX, mode="w+b")
+    try:
+        sink = sink_cls(out, title="Пользователи")
+        await asyncio.to_thread(sink.write_rows, [USERS_HEADER])
+        async with AsyncSessionLocal() as s:
+            result = await s.stream(stmt)
+            async for part in result.partitions(chunk):
+                await asyncio.to_thread(sink.write_rows, [list(r) for r in part])
+        await asyncio.to_thread(sink.close)
+        out.seek(0)
+        return out, f"users.{sink_cls.ext}"
+    except BaseException:
+        out.close()
+        raise
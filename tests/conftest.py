@@ -0,0 +1,7 @@
+# tests/conftest.py
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+# config.load_config() читается при импорте модулей — токен-заглушка, БД не нужна
+os.environ.setdefault("BOT_TOKEN", "123456:TEST-token")
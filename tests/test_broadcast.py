@@ -0,0 +1,61 @@
+# tests/test_broadcast.py
+import asyncio
+
+from aiogram.utils.exceptions import RetryAfter
+from sqlalchemy.dialects import postgresql
+
+import services.broadcast as broadcast
+from services.broadcast import Broadcaster, Outgoing
+
+
+class FloodBot:
+    """Первое сообщение получает 429, остальные уходят."""
+
+    def __init__(self):
+        self.sent = []
+        self.flooded = False
+
+    async def send_message(self, chat_id, text):
+        if not self.flooded:
+            self.flooded = True
+            raise RetryAfter(0.01)
+        self.sent.append(chat_id)
+
+
+class RecordingSession:
+    def __init__(self, log: list):
+        self.log = log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self.log.append(stmt.compile(dialect=postgresql.dialect()))
+
+    async def commit(self):
+        pass
+
+
+def test_retry_after_extends_lease_of_unsent_rows(monkeypatch):
+    log = []
+    monkeypatch.setattr(broadcast, "AsyncSessionLocal", lambda: RecordingSession(log))
+
+    async def run():
+        b = Broadcaster(rate=1000, burst=10, chat_interval=0, concurrency=1,
+                        batch=3, max_attempts=3, poll_interval=1)
+        b._bot = FloodBot()
+        rows = [Outgoing(i, 100 + i, "hi", 0) for i in (1, 2, 3)]
+        # как в _loop после _claim: вся пачка арендована
+        b._inflight = {r.id for r in rows}
+        result = await b.send_batch(rows)
+        assert sorted(result.sent) == [1, 2, 3] and b._bot.sent == [101, 102, 103]
+        assert not b._inflight
+    asyncio.run(run())
+
+    assert len(log) == 1
+    stmt = log[0]
+    assert str(stmt).startswith("UPDATE notifications SET next_attempt_at")
+    assert sorted(next(v for v in stmt.params.values() if isinstance(v, list))) == [1, 2, 3]
@@ -0,0 +1,93 @@
+# tests/test_fsm_storage.py
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import DataError, OperationalError
+
+import services.fsm_storage as fsm
+from services.fsm_storage import PostgresStorage
+
+
+class FakeSession:
+    """Пишет upsert-ы в общий dict; данные с ключом "bad" БД отвергает."""
+
+    def __init__(self, db: dict, outage: list):
+        self.db = db
+        self.outage = outage
+        self.pending: list[tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        if self.outage:
+            raise OperationalError("INSERT", {}, self.outage[0])
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        n = sum(1 for k in params if k.startswith("chat"))
+        for i in range(n):
+            sfx = f"_m{i}"
+            data = params["data" + sfx]
+            if "bad" in data:
+                raise DataError("INSERT", params, Exception("invalid input syntax for type json"))
+            self.pending.append(((params["chat" + sfx], params["user" + sfx]), data))
+
+    def begin_nested(self):
+        return Savepoint(self)
+
+    async def commit(self):
+        self.db.update(self.pending)
+        self.pending = []
+
+
+class Savepoint:
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    async def __aenter__(self):
+        self.mark = len(self.session.pending)
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is not None:
+            del self.session.pending[self.mark:]
+        return False
+
+
+def _fill(storage: PostgresStorage, users: dict):
+    # записи как после чтения из пустой БД
+    for user, data in users.items():
+        storage._records[(user, user)] = fsm._Record("s", data)
+        storage._dirty.add((user, user))
+
+
+def test_rejected_key_does_not_block_the_batch(monkeypatch):
+    db, outage = {}, []
+    monkeypatch.setattr(fsm, "AsyncSessionLocal", lambda: FakeSession(db, outage))
+
+    async def run():
+        storage = PostgresStorage()
+        _fill(storage, {1: {"x": 1}, 2: {"bad": 1}, 3: {"x": 3}})
+        await storage.flush()
+        assert db == {(1, 1): {"x": 1}, (3, 3): {"x": 3}}
+        assert not storage._dirty
+    asyncio.run(run())
+
+
+def test_transient_error_keeps_keys_queued(monkeypatch):
+    db, outage = {}, [ConnectionError("connection reset")]
+    monkeypatch.setattr(fsm, "AsyncSessionLocal", lambda: FakeSession(db, outage))
+
+    async def run():
+        storage = PostgresStorage()
+        _fill(storage, {1: {"x": 1}, 2: {"x": 2}})
+        try:
+            await storage.flush()
+        except OperationalError:
+            pass
+        assert storage._dirty == {(1, 1), (2, 2)} and db == {}
+        outage.clear()
+        await storage.flush()
+        assert db == {(1, 1): {"x": 1}, (2, 2): {"x": 2}}
+    asyncio.run(run())
@@ -0,0 +1,64 @@
+# tests/test_group_management.py
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from aiogram import Bot, Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from handlers.commands import DENY_TEXT, commands
+from handlers.group_management import GroupStates, register_group_management
+from handlers.middleware import UserMiddleware
+from services.users import user_cache
+
+STUDENT, TEACHER = 501, 502
+
+
+class RecordingBot(Bot):
+    """Bot без сети: запоминает тексты отправленных сообщений."""
+
+    def __init__(self):
+        super().__init__("123456:TEST-token")
+        self.texts = []
+
+    async def request(self, method, data=None, files=None, **kwargs):
+        self.texts.append((data or {}).get("text"))
+        return {"message_id": len(self.texts), "date": int(time.time()),
+                "chat": {"id": int(data["chat_id"]), "type": "private"}}
+
+
+def _message(user_id: int, text: str) -> types.Update:
+    return types.Update(**{
+        "update_id": user_id,
+        "message": {
+            "message_id": 1, "date": 0, "text": text,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "u"},
+        },
+    })
+
+
+@pytest.mark.parametrize("button,state", [
+    ("➕ Создать группу", GroupStates.waiting_name.state),
+    ("🔀 Назначить группу", GroupStates.waiting_user_id.state),
+])
+def test_group_commands_are_staff_only(button, state):
+    async def run():
+        bot = RecordingBot()
+        dp  = Dispatcher(bot, storage=MemoryStorage())
+        Bot.set_current(bot)
+        Dispatcher.set_current(dp)
+        dp.middleware.setup(UserMiddleware())
+        commands.register(dp)
+        register_group_management(dp)
+        user_cache.set(STUDENT, SimpleNamespace(role="student", group_id=None))
+        user_cache.set(TEACHER, SimpleNamespace(role="teacher", group_id=None))
+
+        for uid in (STUDENT, TEACHER):
+            await asyncio.create_task(dp.updates_handler.notify(_message(uid, button)))
+
+        assert await dp.storage.get_state(chat=STUDENT, user=STUDENT) is None
+        assert await dp.storage.get_state(chat=TEACHER, user=TEACHER) == state
+        assert bot.texts[0] == DENY_TEXT
+    asyncio.run(run())
@@ -0,0 +1,32 @@
+# tests/test_poll_drafts.py
+import asyncio
+import time
+
+import pytest
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+from aiogram.dispatcher import FSMContext
+
+from services import poll_drafts
+from services.poll_drafts import DRAFT_KEY, DRAFTS, DraftExpired
+
+
+def test_memory_sweep_drops_expired_drafts_and_counts_live_ones():
+    async def run():
+        storage = MemoryStorage()
+        live, stale = FSMContext(storage, 1, 1), FSMContext(storage, 2, 2)
+        for state in (live, stale):
+            await state.set_state("PollCreation:question")
+            await poll_drafts.start_draft(state)
+            await poll_drafts.add_question(state, "Вопрос?")
+        draft = (await stale.get_data())[DRAFT_KEY]
+        draft["touched_at"] = time.time() - poll_drafts.cfg.POLL_DRAFT_TTL - 1
+        await stale.update_data({DRAFT_KEY: draft})
+
+        with pytest.raises(DraftExpired):
+            await poll_drafts.add_question(stale, "Ещё?")
+        await poll_drafts.sweep_memory_drafts(storage)
+
+        assert await stale.get_state() is None and await stale.get_data() == {}
+        assert await live.get_state() == "PollCreation:question"
+        assert [v for *_, v in DRAFTS.samples()] == [1]
+    asyncio.run(run())
@@ -0,0 +1,52 @@
+# tests/test_poll_format.py
+import io
+import tempfile
+
+import pytest
+
+from services.poll_format import MAX_QUESTIONS, PollFormatError, parse_poll_file
+
+CSV = "kind;text\ntitle;Оценка курса\nquestion;Как вам курс?\noption;Отлично\noption;Плохо\nquestion;Что улучшить?\n"
+
+
+class CountingFile(io.BytesIO):
+    """Считает, сколько байт прочитал разбор."""
+
+    def __init__(self, data: bytes):
+        super().__init__(data)
+        self.consumed = 0
+
+    def read1(self, size=-1):
+        chunk = super().read1(size)
+        self.consumed += len(chunk)
+        return chunk
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.consumed += len(chunk)
+        return chunk
+
+
+def test_csv_from_spooled_file():
+    with tempfile.SpooledTemporaryFile(max_size=16) as f:
+        f.write(CSV.encode("utf-8-sig"))
+        draft = parse_poll_file(f, "poll.csv")
+    assert draft.title == "Оценка курса" and draft.target_role == "all"
+    assert [(q.text, q.answers) for q in draft.questions] == [
+        ("Как вам курс?", ("Отлично", "Плохо")), ("Что улучшить?", ()),
+    ]
+
+
+def test_json_detected_without_extension():
+    raw = '{"title": "T", "questions": [{"text": "Q", "options": ["a", "b"]}]}'.encode()
+    draft = parse_poll_file(io.BytesIO(raw), "upload")
+    assert [(q.text, q.answers) for q in draft.questions] == [("Q", ("a", "b"))]
+
+
+def test_csv_stops_at_first_line_over_the_limit():
+    head = "kind,text\ntitle,T\n" + "question,Q\n" * (MAX_QUESTIONS + 1)
+    raw = (head + "question,Q\n" * 10000).encode()
+    f = CountingFile(raw)
+    with pytest.raises(PollFormatError, match=f"Строка {MAX_QUESTIONS + 3}"):
+        parse_poll_file(f, "poll.csv")
+    assert f.consumed < len(raw) // 4
@@ -0,0 +1,148 @@
+# tests/test_response_writer.py
+import asyncio
+
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+import services.response_writer as rw
+from services.response_writer import ResponseWriter, ResponsesRejected
+
+DELETED_QUESTION = 99
+
+
+class FakeDB:
+    """Таблицы в памяти; вопрос DELETED_QUESTION удалён — FK на него нарушается."""
+
+    def __init__(self, outages: int = 0):
+        self.rows: list[tuple] = []
+        self.outages = outages
+
+    def session(self):
+        return FakeSession(self)
+
+
+class FakeSession:
+    def __init__(self, db: FakeDB):
+        self.db = db
+        self.pending: list[tuple] = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        if self.db.outages:
+            self.db.outages -= 1
+            raise OperationalError("INSERT", {}, ConnectionError("connection reset"))
+        table = stmt.table.name
+        params = stmt.compile(dialect=postgresql.dialect()).params
+        if table == "responses" and DELETED_QUESTION in params.values():
+            raise IntegrityError("INSERT", params, Exception("violates foreign key constraint"))
+        keys = sorted(k for k in params if k.startswith("user_id"))
+        self.pending += [(table, params[k]) for k in keys]
+
+    def begin_nested(self):
+        return Savepoint(self)
+
+    async def commit(self):
+        self.db.rows += self.pending
+        self.pending = []
+
+
+class Savepoint:
+    def __init__(self, session: FakeSession):
+        self.session = session
+
+    async def __aenter__(self):
+        self.mark = len(self.session.pending)
+
+    async def __aexit__(self, exc_type, *exc):
+        if exc_type is not None:
+            del self.session.pending[self.mark:]
+        return False
+
+
+def _run(db: FakeDB, monkeypatch, scenario):
+    monkeypatch.setattr(rw, "AsyncSessionLocal", db.session)
+
+    async def run():
+        writer = ResponseWriter(batch_size=100, interval=0.01, max_retries=3)
+        try:
+            await scenario(writer)
+        finally:
+            await writer.close()
+        return writer
+    return asyncio.run(run())
+
+
+def test_fk_violation_drops_only_the_bad_row(monkeypatch):
+    db = FakeDB()
+    outcome = {}
+
+    async def finish(writer, user_id):
+        try:
+            await writer.complete(user_id, 5)
+            outcome[user_id] = "ok"
+        except ResponsesRejected:
+            outcome[user_id] = "rejected"
+
+    async def scenario(writer):
+        writer.add_response(1, 10, answer_id=100)
+        writer.add_response(2, DELETED_QUESTION, answer_id=990)
+        writer.add_response(2, 11, response_text="c")
+        await asyncio.gather(finish(writer, 1), finish(writer, 2))
+        # буфер не застрял: следующие ответы пишутся сразу
+        writer.add_response(3, 12, response_text="d")
+        await finish(writer, 3)
+
+    writer = _run(db, monkeypatch, scenario)
+    # у пользователя 2 отвергнут один ответ: остальное записано, прохождение — нет
+    assert sorted(db.rows) == [("poll_completions", 1), ("poll_completions", 3),
+                               ("responses", 1), ("responses", 2), ("responses", 3)]
+    assert outcome == {1: "ok", 2: "rejected", 3: "ok"}
+    assert writer.pending() == 0
+
+
+def test_partial_reject_fails_only_affected_waiters(monkeypatch):
+    db = FakeDB()
+
+    async def scenario(writer):
+        writer.add_response(1, 10, response_text="a")
+        writer.add_response(2, DELETED_QUESTION, answer_id=990)
+        results = await asyncio.gather(writer.complete(1, 5), writer.complete(2, 5),
+                                       return_exceptions=True)
+        assert results[0] is None
+        assert isinstance(results[1], ResponsesRejected)
+
+    _run(db, monkeypatch, scenario)
+    assert sorted(db.rows) == [("poll_completions", 1), ("responses", 1)]
+
+
+def test_transient_error_is_retried(monkeypatch):
+    db = FakeDB(outages=2)
+
+    async def scenario(writer):
+        writer.add_response(1, 10, response_text="a")
+        await writer.complete(1, 5)
+
+    writer = _run(db, monkeypatch, scenario)
+    assert sorted(db.rows) == [("poll_completions", 1), ("responses", 1)]
+    assert writer.pending() == 0
+
+
+def test_retries_are_capped(monkeypatch):
+    db = FakeDB(outages=1000)
+    errors = []
+
+    async def scenario(writer):
+        writer.add_response(1, 10, response_text="a")
+        try:
+            await writer.complete(1, 5)
+        except OperationalError as e:
+            errors.append(e)
+
+    writer = _run(db, monkeypatch, scenario)
+    assert len(errors) == 1 and db.rows == []
+    assert writer.pending() == 0
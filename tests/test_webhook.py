@@ -0,0 +1,48 @@
+# tests/test_webhook.py
+import asyncio
+
+from aiogram import Bot, Dispatcher, types
+from aiogram.contrib.fsm_storage.memory import MemoryStorage
+
+from webhook import UpdatePool
+
+
+def _message(update_id: int, user_id: int) -> types.Update:
+    return types.Update(**{
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "u"},
+            "text": "hi",
+        },
+    })
+
+
+def test_fsm_state_does_not_leak_between_users_on_one_shard():
+    async def run():
+        bot = Bot("123456:TEST-token")
+        dp  = Dispatcher(bot, storage=MemoryStorage())
+        seen = []
+
+        async def in_flow(message: types.Message):
+            seen.append((message.from_user.id, "flow"))
+
+        async def idle(message: types.Message):
+            seen.append((message.from_user.id, "idle"))
+
+        dp.register_message_handler(in_flow, state="flow")
+        dp.register_message_handler(idle, state=None)
+        # пользователь 1 посреди сценария, у пользователя 2 состояния нет
+        await dp.storage.set_state(chat=1, user=1, state="flow")
+
+        # один воркер — оба пользователя в одной очереди, строго по очереди
+        pool = UpdatePool(dp, workers=1, queue_size=10)
+        pool.start()
+        for i, user_id in enumerate((1, 2, 1, 2), start=1):
+            assert pool.submit(_message(i, user_id))
+        await pool.stop()
+        return seen
+
+    assert asyncio.run(run()) == [(1, "flow"), (2, "idle"), (1, "flow"), (2, "idle")]
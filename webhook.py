@@ -0,0 +1,140 @@
+# webhook.py
+import asyncio
+import logging
+from typing import Awaitable, Callable, Optional
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher, types
+
+from config import Config
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class UpdatePool:
+    """
+    Ограниченный пул обработки апдейтов.
+
+    Апдейты раскладываются по ``workers`` очередям по id пользователя:
+    апдейты одного пользователя обрабатываются строго по порядку (FSM не гоняется
+    сам с собой), разные пользователи — параллельно.
+    """
+
+    def __init__(self, dp: Dispatcher, workers: int, queue_size: int):
+        self.dp = dp
+        per_worker = max(1, queue_size // workers)
+        self._queues = [asyncio.Queue(maxsize=per_worker) for _ in range(workers)]
+        self._tasks: list[asyncio.Task] = []
+
+    @staticmethod
+    def _shard_key(update: types.Update) -> int:
+        obj  = update.message or update.callback_query or update.edited_message
+        user = getattr(obj, "from_user", None)
+        return user.id if user else update.update_id
+
+    def submit(self, update: types.Update) -> bool:
+        """Поставить апдейт в очередь. False — очередь полна."""
+        q = self._queues[self._shard_key(update) % len(self._queues)]
+        try:
+            q.put_nowait(update)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    async def _worker(self, q: asyncio.Queue):
+        Bot.set_current(self.dp.bot)
+        Dispatcher.set_current(self.dp)
+        while True:
+            update = await q.get()
+            try:
+                # через updates_handler, как в polling: срабатывают update-middleware.
+                # Отдельная задача — свой контекст: aiogram кэширует состояние FSM
+                # в ContextVar (StateFilter.ctx_state), иначе оно протекло бы
+                # в следующий апдейт этого воркера
+                await asyncio.create_task(self.dp.updates_handler.notify(update))
+            except Exception:
+                logging.exception(f"webhook: update {update.update_id} failed")
+            finally:
+                q.task_done()
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._worker(q)) for q in self._queues]
+
+    async def stop(self, timeout: float = 10):
+        """Дообработать то, что уже принято, и остановить воркеры."""
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(q.join() for q in self._queues)), timeout
+            )
+        except asyncio.TimeoutError:
+            logging.warning("webhook: shutdown timeout, pending updates dropped")
+        for t in self._tasks:
+            t.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def pending(self) -> int:
+        return sum(q.qsize() for q in self._queues)
+
+
+def build_app(dp: Dispatcher, path: str, workers: int, queue_size: int,
+              secret: Optional[str] = None) -> web.Application:
+    """
+    aiohttp-приложение: принимает апдейт, сразу отвечает 200 и отдаёт его в пул.
+    При переполнении отвечает 503 — Telegram повторит доставку позже.
+    """
+    app  = web.Application()
+    pool = UpdatePool(dp, workers, queue_size)
+    app["update_pool"] = pool
+
+    async def handle(request: web.Request) -> web.Response:
+        if secret and request.headers.get(SECRET_HEADER) != secret:
+            return web.Response(status=403)
+        try:
+            update = types.Update(**await request.json())
+        except Exception:
+            return web.Response(status=400)
+        if not pool.submit(update):
+            return web.Response(status=503)
+        return web.Response()
+
+    async def start_pool(_):
+        pool.start()
+
+    async def stop_pool(_):
+        await pool.stop()
+
+    app.router.add_post(path, handle)
+    app.on_startup.append(start_pool)
+    app.on_shutdown.append(stop_pool)
+    return app
+
+
+def start_webhook(dp: Dispatcher, cfg: Config,
+                  on_startup: Callable[[Dispatcher], Awaitable] = None,
+                  on_shutdown: Callable[[Dispatcher], Awaitable] = None):
+    """Запуск бота в режиме webhook (BOT_MODE=webhook)."""
+    app = build_app(dp, cfg.WEBHOOK_PATH, cfg.WEBHOOK_WORKERS,
+                    cfg.WEBHOOK_QUEUE_SIZE, cfg.WEBHOOK_SECRET or None)
+
+    async def _startup(_):
+        if on_startup:
+            await on_startup(dp)
+        await dp.bot.set_webhook(
+            cfg.WEBHOOK_URL.rstrip("/") + cfg.WEBHOOK_PATH,
+            secret_token=cfg.WEBHOOK_SECRET or None,
+            max_connections=cfg.WEBHOOK_MAX_CONNECTIONS,
+        )
+        logging.info(f"✅ webhook set, workers={cfg.WEBHOOK_WORKERS}")
+
+    async def _shutdown(_):
+        # вызывается после остановки пула (on_shutdown приложения идут по порядку)
+        if on_shutdown:
+            await on_shutdown(dp)
+        await dp.storage.close()
+        await dp.storage.wait_closed()
+        session = await dp.bot.get_session()
+        await session.close()
+
+    app.on_startup.insert(0, _startup)
+    app.on_shutdown.append(_shutdown)
+    web.run_app(app, host=cfg.WEBAPP_HOST, port=cfg.WEBAPP_PORT)